@@ -0,0 +1,23 @@
+# Cryptanalysis tools for the encryptors in the registry
+# (run as CLIs, e.g. `python -m analysis.differential image.png --algorithm fodhnn`)
+#
+# Names are re-exported lazily so `python -m analysis.<tool>` does not import
+# the tool module twice.
+
+import importlib
+
+_EXPORTS = {
+    'DifferentialReport': '.differential',
+    'differential_analysis': '.differential',
+    'npcr_uaci_critical_values': '.differential',
+    'KeySensitivityReport': '.key_sensitivity',
+    'key_sensitivity_analysis': '.key_sensitivity',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
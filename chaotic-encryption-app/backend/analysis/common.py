@@ -0,0 +1,95 @@
+"""
+Helpers shared by the analysis tools: worker pools that keep one image and
+one shared encryptor per process, ciphertext-difference statistics, and
+image loading for the CLIs.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from encryption.encryptor_interface import EncryptorInterface
+from encryption.registry import get_encryptor
+
+
+EncryptorSpec = Union[str, EncryptorInterface]
+
+
+def resolve_encryptor(encryptor: EncryptorSpec, config: Optional[Dict[str, Any]] = None) -> EncryptorInterface:
+    """Registry instance for an algorithm name, or the given instance as is."""
+    if isinstance(encryptor, str):
+        return get_encryptor(encryptor, **(config or {}))
+    return encryptor
+
+
+def require_deterministic(enc: EncryptorInterface, analysis: str) -> None:
+    """
+    Reject encryptors whose ciphertexts differ on every call (random nonce).
+
+    Comparing two of their ciphertexts measures the nonce, not the change made
+    to the image or key, and a wrong key fails authentication instead of
+    decrypting to noise.
+    """
+    if not enc.deterministic:
+        raise ValueError(f"{analysis} needs a deterministic cipher; {enc.get_algorithm_name()} "
+                         "draws a random nonce per encryption")
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def make_pool(workers: int, initializer, initargs: Tuple) -> ProcessPoolExecutor:
+    """Spawn-based pool whose workers run ``initializer(*initargs)`` once."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def chunked(items, n_chunks: int):
+    """Split a list into about ``n_chunks`` contiguous chunks."""
+    n_chunks = max(1, min(n_chunks, len(items)))
+    size = -(-len(items) // n_chunks)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def ciphertext_difference(c1: np.ndarray, c2: np.ndarray) -> Tuple[float, float]:
+    """
+    NPCR and UACI (percent) between two ciphertexts over all channels.
+
+    Unlike utils.calculate_npcr/uaci this does not convert to gray: every
+    byte of the ciphertext counts, as in the usual differential-attack tests.
+    """
+    if c1.shape != c2.shape:
+        raise ValueError("Images must have the same dimensions")
+    diff = cv2.absdiff(c1, c2)
+    npcr = np.count_nonzero(diff) / diff.size * 100
+    uaci = int(diff.sum(dtype=np.int64)) / (diff.size * 255) * 100
+    return float(npcr), float(uaci)
+
+
+def summarize(values) -> Dict[str, float]:
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        'mean': float(arr.mean()),
+        'std': float(arr.std(ddof=1)) if arr.size > 1 else 0.0,
+        'min': float(arr.min()),
+        'max': float(arr.max()),
+    }
+
+
+def load_image(path: str, algorithm: str) -> np.ndarray:
+    """Read an image for analysis (grayscale for the gray-only algorithms)."""
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError(f"Failed to read image: {path}")
+    if algorithm == 'bulban':
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
@@ -0,0 +1,233 @@
+"""
+Differential-attack (NPCR/UACI) analysis.
+
+Encrypts an image once, then encrypts N copies that each differ from it in a
+single pixel, and compares every such ciphertext with the reference one. A
+cipher resisting differential attacks changes ~99.6% of the ciphertext
+(NPCR) by ~33.46% on average (UACI) for any one-pixel change; the critical
+values of Wu, Noonan & Agaian (2011) say whether the observed values are
+consistent with a random-like cipher at a given significance level.
+
+Trials run on a process pool. Every worker receives the image and the
+reference ciphertext once and uses the registry's shared encryptor, whose
+warm cache builds the key schedule for (key, shape) on the first trial and
+reuses it for the rest.
+
+Usage:
+    python -m analysis.differential test_images/lena.png --algorithm fodhnn --trials 200
+
+    from analysis import differential_analysis
+    report = differential_analysis('fodhnn', image, key='secret', trials=200)
+    print(report.npcr['mean'], report.passes['npcr'][0.05])
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import stats
+
+from .common import (
+    EncryptorSpec, chunked, ciphertext_difference, default_workers, load_image,
+    make_pool, require_deterministic, resolve_encryptor, summarize,
+)
+
+
+SIGNIFICANCE_LEVELS = (0.05, 0.01, 0.001)
+
+# One flip: (row, col, channel, new value)
+Flip = Tuple[int, int, int, int]
+
+
+def npcr_uaci_critical_values(pixels: int, alpha: float = 0.05, levels: int = 256) -> Dict[str, Any]:
+    """
+    Critical values for NPCR and UACI (percent) over ``pixels`` compared values.
+
+    ``pixels`` must be the count NPCR/UACI are averaged over: H*W for a gray
+    image, H*W*C for a colour one (ciphertext_difference compares every byte).
+    NPCR passes if it is above ``npcr``; UACI passes if it lies inside
+    ``uaci`` (Wu, Noonan & Agaian, "NPCR and UACI randomness tests for
+    image encryption", 2011).
+    """
+    F = levels - 1
+    # Phi^-1 in the paper is the upper-tail quantile (1.645 for alpha=0.05)
+    npcr = (F - stats.norm.isf(alpha) * np.sqrt(F / pixels)) / (F + 1)
+    mu = (F + 2) / (3 * F + 3)
+    sigma = np.sqrt((F + 2) * (F * F + 2 * F + 3) / (18 * (F + 1) ** 2 * pixels * F))
+    z = stats.norm.isf(alpha / 2)
+    return {
+        'npcr': float(npcr * 100),
+        'uaci': [float((mu - z * sigma) * 100), float((mu + z * sigma) * 100)],
+    }
+
+
+@dataclass
+class DifferentialReport:
+    """Result of differential_analysis (NPCR/UACI values in percent)."""
+    algorithm: str
+    shape: Tuple[int, ...]
+    trials: int
+    npcr: Dict[str, float]
+    uaci: Dict[str, float]
+    critical_values: Dict[float, Dict[str, Any]]
+    # fraction of trials passing, per significance level
+    passes: Dict[str, Dict[float, float]]
+    elapsed: float
+    samples: List[Tuple[float, float]] = field(default_factory=list, repr=False)
+
+    def to_dict(self, include_samples: bool = False) -> Dict[str, Any]:
+        data = asdict(self)
+        if not include_samples:
+            data.pop('samples')
+        return data
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(algorithm: str, config: Dict[str, Any], image: np.ndarray,
+                 reference: np.ndarray, key: str) -> None:
+    _worker_state.update(encryptor=resolve_encryptor(algorithm, config), image=image,
+                         reference=reference, key=key)
+
+
+def _run_flips(flips: List[Flip]) -> List[Tuple[float, float]]:
+    s = _worker_state
+    return _encrypt_flips(s['encryptor'], s['image'], s['reference'], s['key'], flips)
+
+
+def _encrypt_flips(encryptor, image: np.ndarray, reference: np.ndarray, key: str,
+                   flips: List[Flip]) -> List[Tuple[float, float]]:
+    results = []
+    work = image.copy()
+    for row, col, channel, value in flips:
+        index = (row, col, channel) if work.ndim == 3 else (row, col)
+        original = work[index]
+        work[index] = value
+        results.append(ciphertext_difference(reference, encryptor.encrypt_image(work, key)))
+        work[index] = original
+    return results
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+
+def one_pixel_flips(shape: Tuple[int, ...], image: np.ndarray, trials: int, seed=None) -> List[Flip]:
+    """Random pixel positions, each with its value's lowest bit flipped."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, shape[0], size=trials)
+    cols = rng.integers(0, shape[1], size=trials)
+    channels = rng.integers(0, shape[2], size=trials) if len(shape) == 3 else np.zeros(trials, int)
+    flips = []
+    for r, c, ch in zip(rows.tolist(), cols.tolist(), channels.tolist()):
+        value = image[r, c, ch] if image.ndim == 3 else image[r, c]
+        flips.append((r, c, ch, int(value) ^ 1))
+    return flips
+
+
+def differential_analysis(encryptor: EncryptorSpec, image: np.ndarray, key: str,
+                          trials: int = 100, workers: Optional[int] = None, seed=None,
+                          config: Optional[Dict[str, Any]] = None) -> DifferentialReport:
+    """
+    Run ``trials`` one-pixel-change encryptions and report NPCR/UACI statistics.
+
+    Args:
+        encryptor: Registry algorithm name, or an EncryptorInterface instance
+            (instances are run in this process; pass a name to use a pool)
+        image: Plain image (uint8, gray or color)
+        key: Encryption key
+        trials: Number of one-pixel changes
+        workers: Worker processes (default: cpu count; 0 runs inline)
+        seed: Seed for choosing the changed pixels
+        config: Encryptor config for registry names (e.g. {'memory_window': 64})
+
+    Raises:
+        ValueError: For encryptors with a random nonce (aes_gcm), whose
+            ciphertexts differ completely on every call
+    """
+    if trials < 1:
+        raise ValueError("trials must be positive")
+    start = time.perf_counter()
+    enc = resolve_encryptor(encryptor, config)
+    require_deterministic(enc, 'differential analysis')
+    enc.validate_image(image)
+    reference = enc.encrypt_image(image, key)
+    flips = one_pixel_flips(image.shape, image, trials, seed)
+
+    workers = default_workers() if workers is None else workers
+    if workers <= 0 or not isinstance(encryptor, str):
+        samples = _encrypt_flips(enc, image, reference, key, flips)
+    else:
+        workers = min(workers, trials)
+        with make_pool(workers, _init_worker, (encryptor, config or {}, image, reference, key)) as pool:
+            samples = [r for chunk in pool.map(_run_flips, chunked(flips, workers * 4)) for r in chunk]
+
+    # Same N as ciphertext_difference, which counts over every value (H*W*C)
+    pixels = reference.size
+    npcr_values = np.array([s[0] for s in samples])
+    uaci_values = np.array([s[1] for s in samples])
+    critical = {a: npcr_uaci_critical_values(pixels, a) for a in SIGNIFICANCE_LEVELS}
+    passes = {
+        'npcr': {a: float(np.mean(npcr_values > c['npcr'])) for a, c in critical.items()},
+        'uaci': {a: float(np.mean((uaci_values >= c['uaci'][0]) & (uaci_values <= c['uaci'][1])))
+                 for a, c in critical.items()},
+    }
+    return DifferentialReport(
+        algorithm=enc.get_algorithm_name(),
+        shape=tuple(image.shape),
+        trials=trials,
+        npcr=summarize(npcr_values),
+        uaci=summarize(uaci_values),
+        critical_values=critical,
+        passes=passes,
+        elapsed=time.perf_counter() - start,
+        samples=samples,
+    )
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="One-pixel differential (NPCR/UACI) analysis of an encryptor.")
+    p.add_argument("image", help="Plain image to analyse.")
+    p.add_argument("--algorithm", default="lasm_fb", help="Registry algorithm name.")
+    p.add_argument("--key", default="super-secret-key")
+    p.add_argument("--trials", type=int, default=100, help="Number of one-pixel changes.")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (0 = inline).")
+    p.add_argument("--seed", type=int, default=None, help="Seed for choosing changed pixels.")
+    p.add_argument("--json", default=None, help="Write the report (with per-trial samples) here.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    image = load_image(args.image, args.algorithm)
+    try:
+        report = differential_analysis(args.algorithm, image, args.key, trials=args.trials,
+                                       workers=args.workers, seed=args.seed)
+    except ValueError as e:
+        raise SystemExit(f"[differential] error: {e}")
+    print(f"[differential] {report.algorithm} on {args.image} {report.shape}, "
+          f"{report.trials} trials in {report.elapsed:.1f}s")
+    for name in ('npcr', 'uaci'):
+        s = getattr(report, name)
+        print(f"  {name.upper()}: mean {s['mean']:.4f}%  std {s['std']:.4f}  "
+              f"min {s['min']:.4f}  max {s['max']:.4f}")
+    for alpha, c in report.critical_values.items():
+        lo, hi = c['uaci']
+        print(f"  alpha={alpha}: NPCR* > {c['npcr']:.4f}% (pass {report.passes['npcr'][alpha]:.0%}), "
+              f"UACI* in [{lo:.4f}, {hi:.4f}]% (pass {report.passes['uaci'][alpha]:.0%})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(include_samples=True), f, indent=2)
+        print(f"  report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,105 +11,21 @@ import base64
 from werkzeug.utils import secure_filename
 import hashlib
 import secrets
+import threading
+import time
 from functools import wraps
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
-from encryption.fodhnn_encryptor import FODHNNEncryptor
-from encryption.another_2d import LASMEncryptorFB
-from encryption.acm_2dscl import HybridEncryptorFB
-from encryption.bulban_encryptor import BulbanEncryptor
-from encryption.aes_encryptor import AESEncryptor
+from pipeline import (
+    save_encrypted_image, load_encrypted_image, prepare_image, get_api_encryptor,
+)
+from jobs import JobQueue, DeferredMetrics, QueueFull, OPERATIONS
+from executor import EncryptionExecutor, ExecutorSaturated
+from rate_limit import limiter_from_env
+from key_store import KeyStore, SOURCE_ENV
 
 
-from utils import calculate_entropy, calculate_npcr, calculate_uaci
-
-def save_encrypted_image(image: np.ndarray, filepath: str) -> bool:
-    """
-    Save encrypted image with optimized compression for high-entropy data.
-    
-    For encrypted images with high entropy, we use multiple strategies:
-    1. Try maximum PNG compression first
-    2. If that fails, try JPEG with high quality
-    3. As a last resort, save as uncompressed binary with .enc extension
-    
-    Args:
-        image: Encrypted image as numpy array
-        filepath: Path where to save the image
-        
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    try:
-        # Strategy 1: Maximum PNG compression
-        success = cv2.imwrite(filepath, image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
-        
-        if success:
-            return True
-            
-        # Strategy 2: JPEG with high quality (better for some high-entropy data)
-        jpeg_path = filepath.replace('.png', '.jpg')
-        success = cv2.imwrite(jpeg_path, image, [cv2.IMWRITE_JPEG_QUALITY, 95])
-        if success:
-            # Rename the file back to original extension
-            os.rename(jpeg_path, filepath)
-            return True
-        
-        # Strategy 3: Save as binary format (most efficient for high-entropy data)
-        binary_path = filepath.replace('.png', '.enc')
-        with open(binary_path, 'wb') as f:
-            # Write image dimensions first
-            f.write(image.shape[0].to_bytes(4, 'big'))  # height
-            f.write(image.shape[1].to_bytes(4, 'big'))  # width
-            if len(image.shape) == 3:
-                f.write(image.shape[2].to_bytes(4, 'big'))  # channels
-            else:
-                f.write((1).to_bytes(4, 'big'))  # grayscale = 1 channel
-            # Write raw image data
-            f.write(image.tobytes())
-        
-        # Rename to original extension
-        os.rename(binary_path, filepath)
-        return True
-        
-    except Exception as e:
-        print(f"Error saving encrypted image: {e}")
-        return False
-
-def load_encrypted_image(filepath: str) -> np.ndarray:
-    """
-    Load encrypted image that may have been saved in different formats.
-    
-    Args:
-        filepath: Path to the encrypted image file
-        
-    Returns:
-        np.ndarray: Loaded image array, or None if failed
-    """
-    try:
-        # First try standard OpenCV loading
-        image = cv2.imread(filepath)
-        if image is not None:
-            return image
-            
-        # If that fails, try loading as binary format
-        with open(filepath, 'rb') as f:
-            height = int.from_bytes(f.read(4), 'big')
-            width = int.from_bytes(f.read(4), 'big')
-            channels = int.from_bytes(f.read(4), 'big')
-            
-            if channels == 1:
-                shape = (height, width)
-            else:
-                shape = (height, width, channels)
-                
-            # Read raw image data
-            data = f.read()
-            image = np.frombuffer(data, dtype=np.uint8).reshape(shape)
-            return image
-            
-    except Exception as e:
-        print(f"Error loading encrypted image: {e}")
-        return None
+from utils import compute_metrics, sample_metrics
 
 app = Flask(__name__)
 
@@ -125,7 +41,7 @@ CORS(
     app,
     resources={r"/api/*": {"origins": cors_origins}},
     supports_credentials=True,
-    methods=["GET", "POST", "OPTIONS"],
+    methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization", "X-API-Key"],
     max_age=3600,
 )
@@ -138,66 +54,228 @@ MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 
-# Ensure upload folder exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Background jobs: images larger than this (pixels) are queued instead of processed inline.
+# Off (0) by default: a queued /api/encrypt or /api/decrypt answers 202 with a job record
+# instead of the image, so only enable it for clients that poll /api/jobs/<id>.
+ASYNC_PIXEL_THRESHOLD = int(os.getenv('ASYNC_PIXEL_THRESHOLD', 0))
+JOB_FOLDER = os.getenv('JOB_FOLDER', 'job_state')
+
+job_queue = JobQueue(JOB_FOLDER, UPLOAD_FOLDER)
+
+# Encrypt-response metrics: 'full' (default), 'sampled', 'deferred' or 'none'
+METRICS_MODES = ('full', 'sampled', 'deferred', 'none')
+METRICS_SAMPLE_SIZE = int(os.getenv('METRICS_SAMPLE_SIZE', 65536))
+deferred_metrics = DeferredMetrics(JOB_FOLDER)
+
+# Interactive encrypt/decrypt calls run on a bounded worker pool
+# (ENCRYPT_POOL_SIZE, ENCRYPT_QUEUE_DEPTH, ENCRYPT_TIMEOUT; pool size 0 runs inline).
+# Started below when run directly; under gunicorn by the hook in gunicorn.conf.py
+encryption_executor = EncryptionExecutor.from_env()
 
 def _h(s): return hashlib.sha256(s.encode()).hexdigest()
 
+# Validated keys are remembered this long (seconds) before being re-hashed
+API_KEY_CACHE_TTL = float(os.getenv('API_KEY_CACHE_TTL', 60))
+# last_used timestamps are written back at most this often (seconds)
+API_KEY_FLUSH_INTERVAL = float(os.getenv('API_KEY_FLUSH_INTERVAL', 30))
+# How often (seconds) to check the key store for keys added/revoked by other workers
+API_KEY_REFRESH_INTERVAL = float(os.getenv('API_KEY_REFRESH_INTERVAL', 1))
+
+
+class ValidationStats:
+    """Counters for API key validation (hits/misses of the cache, latency)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = self.cache_hits = self.cache_misses = self.rejected = 0
+        self.total_ns = self.max_ns = 0
+
+    def record(self, elapsed_ns, hit, valid):
+        with self._lock:
+            self.calls += 1
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+            if not valid:
+                self.rejected += 1
+            self.total_ns += elapsed_ns
+            self.max_ns = max(self.max_ns, elapsed_ns)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'rejected': self.rejected,
+                'mean_us': self.total_ns / self.calls / 1000 if self.calls else 0.0,
+                'max_us': self.max_ns / 1000,
+            }
+
+
+def development_keys():
+    """Default keys for local development; only ever kept in memory"""
+    created_at = datetime.now().isoformat()
+    return {
+        _h('dev_key_1'): {
+            'name': 'Development Key 1',
+            'permissions': ['encrypt', 'decrypt', 'download'],
+            'rate_limit': 100,
+            'created_at': created_at,
+            'last_used': None
+        },
+        _h('dev_key_2'): {
+            'name': 'Development Key 2',
+            'permissions': ['encrypt', 'decrypt'],
+            'rate_limit': 50,
+            'created_at': created_at,
+            'last_used': None
+        }
+    }
+
 
 # API Key Management System
 class APIKeyManager:
-    def __init__(self):
+    def __init__(self, store=None, cache_ttl=API_KEY_CACHE_TTL, flush_interval=API_KEY_FLUSH_INTERVAL,
+                 refresh_interval=API_KEY_REFRESH_INTERVAL, dev_keys=None):
+        # Persistent store shared by all workers (API_KEY_DB); api_keys is its in-process copy
+        self.store = store if store is not None else KeyStore()
         self.api_keys = {}
-        self.load_api_keys()
-
+        # Development keys are opt-in (FLASK_ENV=development) and never written to the store
+        if dev_keys is None:
+            dev_keys = os.getenv('FLASK_ENV') == 'development'
+        self.dev_keys = development_keys() if dev_keys else {}
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self._revision = None
+        self._next_refresh = 0.0
+        # presented key -> (expires_at, key_hash); only valid keys are cached
+        self._validated = {}
+        # key_hash -> time.time() of the latest use, not yet written to last_used
+        self._pending_last_used = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.stats = ValidationStats()
 
     def load_api_keys(self):
-        """Load API keys from environment variables or create default ones"""
-        # Load from environment variables
+        """Sync the key store with the API_KEYS environment variable and load it"""
+        # When set, API_KEYS is the source of truth for env keys: listed keys are added or
+        # updated, env keys no longer listed are revoked. Generated keys are left alone.
         api_keys_env = os.getenv('API_KEYS', '')
         if api_keys_env:
             try:
-                self.api_keys = json.loads(api_keys_env)
-            except json.JSONDecodeError:
+                env_keys = json.loads(api_keys_env)
+                if not isinstance(env_keys, dict):
+                    raise ValueError('API_KEYS must be a JSON object')
+                self.store.sync(env_keys, source=SOURCE_ENV)
+            except ValueError:
                 print("Warning: Invalid API_KEYS format in environment variables")
-                self.api_keys = {}
-        
-        # If no keys in environment, create default development keys
-        if not self.api_keys:
-            self.api_keys = {
-                _h('dev_key_1'): {
-                    'name': 'Development Key 1',
-                    'permissions': ['encrypt', 'decrypt', 'download'],
-                    'rate_limit': 100,
-                    'created_at': datetime.now().isoformat(),
-                    'last_used': None
-                },
-                _h('dev_key_2'): {
-                    'name': 'Development Key 2',
-                    'permissions': ['encrypt', 'decrypt'],
-                    'rate_limit': 50,
-                    'created_at': datetime.now().isoformat(),
-                    'last_used': None
-                }
-            }
-            print("Warning: Using default development API keys. Set API_KEYS environment variable for production!")
+
+        self._reload()
+        self.invalidate_cache()
+        self._loaded = True
+        if self.dev_keys:
+            print("Warning: Using default development API keys (FLASK_ENV=development). "
+                  "Set API_KEYS for production!")
+
+    def _ensure_loaded(self):
+        # The store is opened on first use, so importing the app touches no files
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self.load_api_keys()
+
+    def _reload(self):
+        self._revision, keys = self.store.load()
+        self.api_keys = {**self.dev_keys, **keys}
+
+    def refresh(self, force=False):
+        """Reload the in-process key copy if the store changed since the last load"""
+        self._ensure_loaded()
+        if force or self.store.revision() != self._revision:
+            self._reload()
     
     def validate_api_key(self, api_key):
         """Validate API key and return key info"""
+        return self.resolve_api_key(api_key)[1]
+
+    def resolve_api_key(self, api_key):
+        """Validate API key and return (key_hash, key_info), or (None, None)"""
         if not api_key:
-            return None
-        
-        # Hash the provided key for comparison
-        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
-        
-        # Check if key exists
-        if key_hash in self.api_keys:
-            key_info = self.api_keys[key_hash]
-            # Update last used timestamp
-            key_info['last_used'] = datetime.now().isoformat()
-            return key_info
-        
-        return None
+            return None, None
+        self._ensure_loaded()
+        start = time.perf_counter_ns()
+        now = time.monotonic()
+        if now >= self._next_refresh:
+            self._next_refresh = now + self.refresh_interval
+            self.refresh()
+
+        cached = self._validated.get(api_key)
+        hit = cached is not None and cached[0] > now
+        if hit:
+            key_hash = cached[1]
+        else:
+            # Hash the provided key for comparison
+            key_hash = _h(api_key)
+        key_info = self.api_keys.get(key_hash)
+        if key_info is None and not hit:
+            # Read through to the store: the key may have just been created by another worker
+            key_info = self.store.get(key_hash)
+            if key_info is not None:
+                self.api_keys[key_hash] = key_info
+
+        if key_info is None:
+            # Revoked while cached, or never valid
+            self._validated.pop(api_key, None)
+            self.stats.record(time.perf_counter_ns() - start, hit, False)
+            return None, None
+
+        with self._lock:
+            if not hit:
+                self._validated[api_key] = (now + self.cache_ttl, key_hash)
+            self._pending_last_used[key_hash] = time.time()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush_last_used()
+        self.stats.record(time.perf_counter_ns() - start, hit, True)
+        return key_hash, key_info
+
+    def flush_last_used(self):
+        """Write batched last_used timestamps into the key records and the store"""
+        with self._lock:
+            pending, self._pending_last_used = self._pending_last_used, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        updates = []
+        for key_hash, used_at in pending.items():
+            last_used = datetime.fromtimestamp(used_at).isoformat()
+            updates.append((key_hash, last_used))
+            key_info = self.api_keys.get(key_hash)
+            if key_info is not None:
+                key_info['last_used'] = last_used
+        self.store.touch_many(updates)
+
+    def validation_stats(self):
+        """Validation counters plus cache configuration"""
+        return {
+            'validation': self.stats.snapshot(),
+            'cached_keys': len(self._validated),
+            'pending_last_used': len(self._pending_last_used),
+            'cache_ttl': self.cache_ttl,
+            'flush_interval': self.flush_interval,
+        }
+
+    def invalidate_cache(self):
+        """Forget cached validations, e.g. after keys were revoked"""
+        with self._lock:
+            self._validated.clear()
     
     def has_permission(self, key_info, required_permission):
         """Check if API key has required permission"""
@@ -207,19 +285,31 @@ class APIKeyManager:
     
     def generate_new_key(self, name, permissions, rate_limit=100):
         """Generate a new API key"""
+        self._ensure_loaded()
         new_key = secrets.token_urlsafe(32)
         key_hash = hashlib.sha256(new_key.encode()).hexdigest()
         
-        self.api_keys[key_hash] = {
+        key_info = {
             'name': name,
             'permissions': permissions,
             'rate_limit': rate_limit,
             'created_at': datetime.now().isoformat(),
             'last_used': None
         }
+        # Other workers pick the key up from the store on their next lookup
+        self.store.add(key_hash, key_info)
+        self.api_keys[key_hash] = key_info
         
         return new_key
 
+    def revoke_api_key(self, key_hash):
+        """Remove a key from the store; other workers drop it on their next refresh"""
+        self._ensure_loaded()
+        removed = self.store.delete(key_hash)
+        self.api_keys.pop(key_hash, None)
+        self.invalidate_cache()
+        return removed
+
 # Initialize API key manager
 api_key_manager = APIKeyManager()
 
@@ -239,7 +329,7 @@ def require_api_key(required_permission=None):
                 }), 401
             
             # Validate API key
-            key_info = api_key_manager.validate_api_key(api_key)
+            key_hash, key_info = api_key_manager.resolve_api_key(api_key)
             if not key_info:
                 return jsonify({
                     'error': 'Invalid API key',
@@ -255,49 +345,28 @@ def require_api_key(required_permission=None):
             
             # Add key info to request context for logging
             request.api_key_info = key_info
+            request.api_key_hash = key_hash
             
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
-# Simple in-memory rate limiting (use Redis in production)
-rate_limit_storage = {}
+# Token-bucket rate limiting; set RATE_LIMIT_DB to share limits across workers
+rate_limiter = limiter_from_env()
 
-def check_rate_limit(api_key, key_info):
-    """Check if API key has exceeded rate limit"""
-    current_time = datetime.now()
-    hour_key = current_time.strftime('%Y-%m-%d-%H')
-    rate_key = f"{api_key}_{hour_key}"
-    
-    # Get current request count
-    current_count = rate_limit_storage.get(rate_key, 0)
-    rate_limit = key_info.get('rate_limit', 100)
-    
-    if current_count >= rate_limit:
-        return False, rate_limit
-    
-    # Increment counter
-    rate_limit_storage[rate_key] = current_count + 1
-    
-    # Clean up old entries (keep only last 24 hours)
-    cutoff_time = current_time - timedelta(hours=24)
-    cutoff_key = cutoff_time.strftime('%Y-%m-%d-%H')
-    
-    keys_to_remove = [k for k in rate_limit_storage.keys() if k.split('_')[-1] < cutoff_key]
-    for k in keys_to_remove:
-        del rate_limit_storage[k]
-    
-    return True, rate_limit - current_count - 1
+def check_rate_limit(key_hash, key_info):
+    """Check if API key (identified by its hash) has exceeded rate limit"""
+    return rate_limiter.check(key_hash, key_info.get('rate_limit', 100))
 
 def require_rate_limit(f):
     """Decorator to enforce rate limiting"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        api_key = request.headers.get('X-API-Key')
+        key_hash = getattr(request, 'api_key_hash', None)
         key_info = getattr(request, 'api_key_info', None)
         
-        if api_key and key_info:
-            allowed, remaining = check_rate_limit(api_key, key_info)
+        if key_hash and key_info:
+            allowed, remaining = check_rate_limit(key_hash, key_info)
             if not allowed:
                 return jsonify({
                     'error': 'Rate limit exceeded',
@@ -324,6 +393,11 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def upload_path(filename):
+    """Path of a file in the upload folder, which is created on first use"""
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
 def save_image_from_base64(base64_string, filename):
     """Save base64 image string to file"""
     try:
@@ -332,7 +406,7 @@ def save_image_from_base64(base64_string, filename):
             base64_string = base64_string.split(',')[1]
         
         image_data = base64.b64decode(base64_string)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = upload_path(filename)
         
         with open(filepath, 'wb') as f:
             f.write(image_data)
@@ -352,6 +426,86 @@ def image_to_base64(image_path):
         print(f"Error converting image to base64: {e}")
         return None
 
+TRUE_VALUES = (True, 1, 'true', '1', 'yes', 'on')
+FALSE_VALUES = (False, 0, 'false', '0', 'no', 'off', '')
+
+def parse_flag(data, name):
+    """Optional boolean request field: True, False or None if absent; ValueError otherwise"""
+    value = data.get(name)
+    if value is None:
+        return None
+    if isinstance(value, (bool, int, str)):
+        normalized = value.strip().lower() if isinstance(value, str) else value
+        if normalized in TRUE_VALUES:
+            return True
+        if normalized in FALSE_VALUES:
+            return False
+    raise ValueError(f"{name} must be a boolean")
+
+def should_queue(requested, image):
+    """Decide whether a request runs as a background job ('async' flag overrides size)"""
+    if requested is not None:
+        return requested
+    return 0 < ASYNC_PIXEL_THRESHOLD < image.shape[0] * image.shape[1]
+
+def public_job(record):
+    """Job record as returned to clients"""
+    job = {k: v for k, v in record.items() if k != 'owner'}
+    route = 'metrics' if record.get('operation') == 'metrics' else 'jobs'
+    job['status_url'] = f"/api/{route}/{record['id']}"
+    if record.get('result_filename'):
+        job['download_url'] = f"/api/download/{record['result_filename']}"
+    return job
+
+def queue_job(operation, algorithm, key, input_path):
+    """Submit a job for the calling API key and build the 202 response"""
+    owner = request.api_key_hash
+    try:
+        record = job_queue.submit(operation, algorithm, key, input_path, owner=owner)
+    except QueueFull as e:
+        os.remove(input_path)
+        return server_busy(e, 'retry the job later')
+    return jsonify(public_job(record)), 202
+
+def metrics_seed(key):
+    """Pixel-sampling seed derived from the encryption key (same key, same pixels)"""
+    return int.from_bytes(hashlib.sha256(b'metrics-sample:' + key.encode()).digest()[:8], 'big')
+
+def encrypt_metrics(mode, original_img, encrypted_img, key):
+    """Metrics fields of an encrypt response for the requested mode"""
+    if mode == 'full':
+        return {'metrics': compute_metrics(original_img, encrypted_img)}
+    if mode == 'sampled':
+        return {'metrics': sample_metrics(original_img, encrypted_img,
+                                          sample_size=METRICS_SAMPLE_SIZE, seed=metrics_seed(key))}
+    if mode == 'deferred':
+        try:
+            record = deferred_metrics.submit(original_img, encrypted_img, owner=request.api_key_hash)
+        except QueueFull as e:
+            # The encryption itself succeeded; only its metrics are dropped
+            return {'metrics': None, 'metrics_error': f'{e}; metrics were not computed'}
+        return {'metrics': None, 'metrics_id': record['id'],
+                'metrics_url': f"/api/metrics/{record['id']}"}
+    return {'metrics': None}
+
+def server_busy(error, hint='retry shortly or submit a job via POST /api/jobs'):
+    """503 response for a saturated worker pool or job queue"""
+    response = jsonify({
+        'error': 'Server busy',
+        'message': f'{error}; {hint}'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def worker_timeout(error):
+    """504 response for an encryptor call that outlived ENCRYPT_TIMEOUT"""
+    response = jsonify({
+        'error': 'Worker timeout',
+        'message': f'{error}; retry later or submit a job via POST /api/jobs'
+    })
+    response.headers['Retry-After'] = str(max(1, int(encryption_executor.timeout or 1)))
+    return response, 504
+
 @app.route('/api/encrypt', methods=['POST'])
 @require_api_key('encrypt')
 @require_rate_limit
@@ -367,6 +521,13 @@ def encrypt_image():
         image_data = data['image']
         key = data.get('key', 'default_key_123')
         algorithm = str(data.get('algorithm', '2dlasm')).lower()
+        metrics_mode = str(data.get('metrics', 'full')).lower()
+        if metrics_mode not in METRICS_MODES:
+            return jsonify({'error': f"metrics must be one of: {', '.join(METRICS_MODES)}"}), 400
+        try:
+            run_async = parse_flag(data, 'async')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Generate unique filename
         original_filename = f"original_{uuid.uuid4()}.png"
@@ -381,39 +542,22 @@ def encrypt_image():
         original_img = cv2.imread(original_path)
         if original_img is None:
             return jsonify({'error': 'Failed to read image'}), 500
-        
-        # Initialize encryptor and encrypt
-        if algorithm == 'fodhnn':
-            encryptor = FODHNNEncryptor()
-        
-        elif algorithm == 'acm_2dscl':
-            encryptor = HybridEncryptorFB()
-        
-        elif algorithm == 'aes':
-            encryptor = AESEncryptor()
-
-        elif algorithm == 'bulban':
-            # Convert to grayscale if image is colored
-            if original_img.ndim == 3:
-                original_img = cv2.cvtColor(original_img, cv2.COLOR_BGR2GRAY)
-            encryptor = BulbanEncryptor()
-
-        else:
-            encryptor = LASMEncryptorFB()
 
-        encrypted_img = encryptor.encrypt_image(original_img, key)
+        if should_queue(run_async, original_img):
+            return queue_job('encrypt', algorithm, key, original_path)
+        
+        original_img = prepare_image(original_img, algorithm)
+        encrypted_img = encryption_executor.encrypt(algorithm, original_img, key)
         
         # Save encrypted image with optimized compression for high-entropy data
-        encrypted_path = os.path.join(app.config['UPLOAD_FOLDER'], encrypted_filename)
+        encrypted_path = upload_path(encrypted_filename)
         success = save_encrypted_image(encrypted_img, encrypted_path)
         if not success:
             return jsonify({'error': 'Failed to save encrypted image'}), 500
         
-        # Calculate metrics
-        entropy_original = calculate_entropy(original_img)
-        entropy_encrypted = calculate_entropy(encrypted_img)
-        npcr_value = calculate_npcr(original_img, encrypted_img)
-        uaci_value = calculate_uaci(original_img, encrypted_img)
+        # Calculate (or schedule) metrics on the cipher pixels (no container header rows)
+        payload = get_api_encryptor(algorithm).cipher_payload(encrypted_img)
+        metrics = encrypt_metrics(metrics_mode, original_img, payload, key)
         
         # Convert images to base64 for response
         original_b64 = image_to_base64(original_path)
@@ -428,14 +572,16 @@ def encrypt_image():
             'encrypted_image': encrypted_b64,
             'encrypted_filename': encrypted_filename,
             'algorithm': algorithm,
-            'metrics': {
-                'entropy_original': float(entropy_original),
-                'entropy_encrypted': float(entropy_encrypted),
-                'npcr': float(npcr_value),
-                'uaci': float(uaci_value)
-            }
+            'metrics_mode': metrics_mode,
+            **metrics
         })
         
+    except ExecutorSaturated as e:
+        os.remove(original_path)
+        return server_busy(e)
+    except TimeoutError as e:
+        os.remove(original_path)
+        return worker_timeout(e)
     except Exception as e:
         return jsonify({'error': f'Encryption failed: {str(e)}'}), 500
 
@@ -454,6 +600,10 @@ def decrypt_image():
         image_data = data['image']
         key = data.get('key', 'default_key_123')
         algorithm = str(data.get('algorithm', '2dlasm')).lower()
+        try:
+            run_async = parse_flag(data, 'async')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Generate unique filename
         encrypted_filename = f"encrypted_{uuid.uuid4()}.png"
@@ -468,30 +618,16 @@ def decrypt_image():
         encrypted_img = load_encrypted_image(encrypted_path)
         if encrypted_img is None:
             return jsonify({'error': 'Failed to read image'}), 500
-        
-        # Initialize encryptor and decrypt
-        if algorithm == 'fodhnn':
-            encryptor = FODHNNEncryptor()
-
-        elif algorithm == 'acm_2dscl':
-            encryptor = HybridEncryptorFB()
 
-        elif algorithm == 'aes':
-            encryptor = AESEncryptor()
-
-        elif algorithm == 'bulban':
-            if encrypted_img.ndim == 3:
-                encrypted_img = cv2.cvtColor(encrypted_img, cv2.COLOR_BGR2GRAY)
-            encryptor = BulbanEncryptor()
-
-        else:
-            encryptor = LASMEncryptorFB()
-
-        decrypted_img = encryptor.decrypt_image(encrypted_img, key)
+        if should_queue(run_async, encrypted_img):
+            return queue_job('decrypt', algorithm, key, encrypted_path)
+        
+        encrypted_img = prepare_image(encrypted_img, algorithm)
+        decrypted_img = encryption_executor.decrypt(algorithm, encrypted_img, key)
 
         
         # Save decrypted image with optimized compression
-        decrypted_path = os.path.join(app.config['UPLOAD_FOLDER'], decrypted_filename)
+        decrypted_path = upload_path(decrypted_filename)
         success = save_encrypted_image(decrypted_img, decrypted_path)
         if not success:
             return jsonify({'error': 'Failed to save decrypted image'}), 500
@@ -509,9 +645,66 @@ def decrypt_image():
             'algorithm': algorithm
         })
         
+    except ExecutorSaturated as e:
+        os.remove(encrypted_path)
+        return server_busy(e)
+    except TimeoutError as e:
+        os.remove(encrypted_path)
+        return worker_timeout(e)
     except Exception as e:
         return jsonify({'error': f'Decryption failed: {str(e)}'}), 500
 
+@app.route('/api/jobs', methods=['POST'])
+@require_api_key()
+@require_rate_limit
+def create_job():
+    """Queue an encryption or decryption job and return its id"""
+    try:
+        data = request.get_json()
+
+        if not data or 'image' not in data:
+            return jsonify({'error': 'No image data provided'}), 400
+
+        operation = str(data.get('operation', 'encrypt')).lower()
+        if operation not in OPERATIONS:
+            return jsonify({'error': f'Unknown operation: {operation}'}), 400
+
+        if not api_key_manager.has_permission(request.api_key_info, operation):
+            return jsonify({
+                'error': 'Insufficient permissions',
+                'message': f'API key does not have permission for: {operation}'
+            }), 403
+
+        key = data.get('key', 'default_key_123')
+        algorithm = str(data.get('algorithm', '2dlasm')).lower()
+
+        input_path = save_image_from_base64(data['image'], f"jobinput_{uuid.uuid4()}.png")
+        if not input_path:
+            return jsonify({'error': 'Failed to save image'}), 500
+
+        return queue_job(operation, algorithm, key, input_path)
+
+    except Exception as e:
+        return jsonify({'error': f'Job submission failed: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>')
+@require_api_key()
+def get_job(job_id):
+    """Poll the status and progress of a background job"""
+    record = job_queue.get(job_id)
+    if record is None or record.get('owner') != request.api_key_hash:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(public_job(record))
+
+@app.route('/api/metrics/<metrics_id>')
+@require_api_key()
+def get_metrics(metrics_id):
+    """Fetch metrics of an encryption made with metrics='deferred'"""
+    record = deferred_metrics.get(metrics_id)
+    if record is None or record.get('owner') != request.api_key_hash:
+        return jsonify({'error': 'Metrics not found'}), 404
+    return jsonify(public_job(record))
+
 @app.route('/api/download/<filename>')
 @require_api_key('download')
 @require_rate_limit
@@ -534,7 +727,7 @@ def cors_info():
         'cors_origins': cors_origins,
         'environment': os.getenv('FLASK_ENV', 'development (default)'),
         'request_origin': request.headers.get('Origin', 'No Origin header'),
-        'allowed_methods': ['GET', 'POST', 'OPTIONS'],
+        'allowed_methods': ['GET', 'POST', 'DELETE', 'OPTIONS'],
         'allowed_headers': ['Content-Type', 'Authorization', 'X-API-Key']
     })
 
@@ -549,9 +742,14 @@ def index():
             'POST /api/encrypt': 'Encrypt an image using chaotic encryption (requires encrypt permission)',
             'POST /api/decrypt': 'Decrypt an encrypted image (requires decrypt permission)',
             'GET /api/download/<filename>': 'Download a processed image (requires download permission)',
+            'POST /api/jobs': 'Queue an encrypt/decrypt job for a large image (requires encrypt or decrypt permission)',
+            'GET /api/jobs/<job_id>': 'Poll job status/progress; finished jobs link to the download route',
+            'GET /api/metrics/<metrics_id>': "Fetch metrics of an encryption requested with metrics='deferred'",
             'GET /api/health': 'Health check (no authentication required)',
             'GET /api/keys': 'Manage API keys (requires admin permission)',
-            'POST /api/keys': 'Create new API key (requires admin permission)'
+            'POST /api/keys': 'Create new API key (requires admin permission)',
+            'DELETE /api/keys/<key_hash>': 'Revoke an API key (requires admin permission)',
+            'GET /api/keys/stats': 'API key validation cache/latency counters (requires admin permission)'
         }
     })
 
@@ -560,9 +758,13 @@ def index():
 @require_api_key('admin')
 def list_api_keys():
     """List all API keys (admin only)"""
+    api_key_manager.refresh()
+    api_key_manager.flush_last_used()
     keys_info = []
     for key_hash, info in api_key_manager.api_keys.items():
         keys_info.append({
+            'key_hash': key_hash,
+            'source': info.get('source', 'development'),
             'name': info['name'],
             'permissions': info['permissions'],
             'rate_limit': info['rate_limit'],
@@ -572,6 +774,12 @@ def list_api_keys():
     
     return jsonify({'api_keys': keys_info})
 
+@app.route('/api/keys/stats', methods=['GET'])
+@require_api_key('admin')
+def api_key_stats():
+    """API key validation counters (admin only)"""
+    return jsonify(api_key_manager.validation_stats())
+
 @app.route('/api/keys', methods=['POST'])
 @require_api_key('admin')
 def create_api_key():
@@ -593,5 +801,14 @@ def create_api_key():
         'message': 'API key created successfully. Store it securely - it will not be shown again.'
     })
 
+@app.route('/api/keys/<key_hash>', methods=['DELETE'])
+@require_api_key('admin')
+def revoke_api_key(key_hash):
+    """Revoke an API key by its hash, as listed by GET /api/keys (admin only)"""
+    if not api_key_manager.revoke_api_key(key_hash):
+        return jsonify({'error': 'API key not found'}), 404
+    return jsonify({'success': True, 'message': 'API key revoked'})
+
 if __name__ == '__main__':
+    encryption_executor.start()
     app.run(debug=False, host='0.0.0.0', port=5001)
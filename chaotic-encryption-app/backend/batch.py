@@ -0,0 +1,448 @@
+"""
+Batch encryption of image directories.
+
+Encrypts every image under a directory with one registry algorithm on a
+process pool, checks that it decrypts back, computes quality metrics, and
+saves the ciphertexts. Results stream to ``results.jsonl`` and
+``results.csv`` in the output directory as images complete, so an
+interrupted run loses at most the images in flight: running the same
+command again skips every image that already has a result and a saved
+ciphertext, and retries the ones that failed.
+
+Output directory layout:
+    batch.json      run configuration (a resume must match it)
+    results.jsonl   one record per processed image
+    results.csv     the same records as a table
+    summary.json    throughput of the last run
+    cipher/         ciphertext PNGs, mirroring the input tree (a.jpg -> cipher/a.jpg.png)
+    histograms/     plain/cipher/decrypted gray histograms per image (.npz or .json,
+                    e.g. histograms/a.jpg.npz);
+                    ``python histograms.py OUT`` renders them to PNGs afterwards
+
+Usage:
+    python batch.py test_images --algorithm fodhnn --out batch_results/fodhnn --workers 4
+    python batch.py test_images --algorithm fodhnn --out batch_results/fodhnn   # resumes
+    python batch.py test_images --out batch_results/lasm --metrics full --max-pixels 65536 --restart
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from encryption.encryptor_interface import key_digest
+from encryption.registry import get_encryptor
+from histograms import HISTOGRAM_DIR, HISTOGRAM_FORMATS, gray_histogram, save_histograms
+from pipeline import prepare_image, save_encrypted_image
+from utils import analyze_encryption_quality, compute_metrics
+
+
+VALID_EXTS = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp'}
+METRICS_MODES = ('none', 'basic', 'full')
+HISTOGRAM_MODES = ('none',) + HISTOGRAM_FORMATS
+
+CONFIG_FILE = 'batch.json'
+RESULTS_JSONL = 'results.jsonl'
+RESULTS_CSV = 'results.csv'
+SUMMARY_FILE = 'summary.json'
+CIPHER_DIR = 'cipher'
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+CSV_FIELDS = [
+    'id', 'status', 'error', 'height', 'width', 'channels', 'bytes',
+    'encrypt_s', 'decrypt_s', 'roundtrip_ok', 'cipher', 'histograms',
+    'entropy_original', 'entropy_encrypted', 'npcr', 'uaci',
+    'histogram_similarity', 'psnr',
+    'adj_H_original', 'adj_V_original', 'adj_D_original',
+    'adj_H_encrypted', 'adj_V_encrypted', 'adj_D_encrypted',
+]
+
+
+# ---------------------------
+# Inputs
+# ---------------------------
+
+def iter_images(images_dir: str, recursive: bool = False) -> Iterator[str]:
+    """Image files in ``images_dir`` (sorted; subfolders too if ``recursive``)."""
+    images_dir = os.path.abspath(images_dir)
+    if recursive:
+        for root, dirs, files in os.walk(images_dir):
+            dirs.sort()
+            for fn in sorted(files):
+                if os.path.splitext(fn)[1].lower() in VALID_EXTS:
+                    yield os.path.join(root, fn)
+    else:
+        for fn in sorted(os.listdir(images_dir)):
+            p = os.path.join(images_dir, fn)
+            if os.path.isfile(p) and os.path.splitext(fn)[1].lower() in VALID_EXTS:
+                yield p
+
+
+def image_id(path: str, images_dir: str) -> str:
+    """Stable id of an input image: its path relative to the input directory."""
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(images_dir)).replace(os.sep, '/')
+
+
+def cipher_name(item_id: str) -> str:
+    """Ciphertext path (relative to the output directory) for an image id."""
+    # Keep the extension, so a.png and a.jpg do not share a ciphertext
+    return f"{CIPHER_DIR}/{item_id}.png"
+
+
+def maybe_downscale(img: np.ndarray, max_pixels: Optional[int]) -> np.ndarray:
+    H, W = img.shape[:2]
+    if not max_pixels or H * W <= max_pixels:
+        return img
+    scale = (max_pixels / (H * W)) ** 0.5
+    size = (max(1, int(W * scale)), max(1, int(H * scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(algorithm: str, config: Dict[str, Any], key: str, out_dir: str,
+                 options: Dict[str, Any]) -> None:
+    _worker_state.update(algorithm=algorithm, encryptor=get_encryptor(algorithm, **config),
+                         key=key, out_dir=out_dir, options=options)
+
+
+def _run_image(path: str, item_id: str) -> Dict[str, Any]:
+    s = _worker_state
+    return process_image(s['encryptor'], s['algorithm'], s['key'], s['out_dir'], path, item_id,
+                         **s['options'])
+
+
+def _plain(value: Any) -> Any:
+    # JSON-safe scalar: numpy scalars unwrapped, inf/nan (e.g. PSNR of a perfect round trip) as None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _flat_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    row = {k: _plain(v) for k, v in metrics.items() if not isinstance(v, dict)}
+    for which in ('original', 'encrypted'):
+        for direction, value in (metrics.get(f'adj_corr_{which}') or {}).items():
+            row[f'adj_{direction}_{which}'] = _plain(value)
+    return row
+
+
+def process_image(encryptor, algorithm: str, key: str, out_dir: str, path: str, item_id: str,
+                  max_pixels: Optional[int] = None, metrics: str = 'basic',
+                  verify: bool = True, histograms: str = 'npz') -> Dict[str, Any]:
+    """
+    Encrypt one image, save the ciphertext, and return its result record.
+
+    Failures are returned as records with status 'error' rather than raised.
+    """
+    record: Dict[str, Any] = {'id': item_id}
+    try:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Failed to read image: {path}")
+        image = maybe_downscale(prepare_image(image, algorithm), max_pixels)
+        record.update(height=image.shape[0], width=image.shape[1],
+                      channels=1 if image.ndim == 2 else image.shape[2], bytes=int(image.nbytes))
+
+        t0 = time.perf_counter()
+        cipher = encryptor.encrypt_image(image, key)
+        record['encrypt_s'] = time.perf_counter() - t0
+        payload = encryptor.cipher_payload(cipher)  # pixels comparable with the image
+
+        decrypted = None
+        if verify:
+            t0 = time.perf_counter()
+            decrypted = encryptor.decrypt_image(cipher, key)
+            record['decrypt_s'] = time.perf_counter() - t0
+            record['roundtrip_ok'] = bool(np.array_equal(decrypted, image))
+
+        if metrics == 'basic':
+            record.update(_flat_metrics(compute_metrics(image, payload)))
+        elif metrics == 'full':
+            record.update(_flat_metrics(analyze_encryption_quality(image, payload, decrypted)))
+
+        if histograms != 'none':
+            # Counts only; charts are drawn later by histograms.render_histograms
+            arrays = {'plain': gray_histogram(image), 'cipher': gray_histogram(payload)}
+            if decrypted is not None:
+                arrays['decrypted'] = gray_histogram(decrypted)
+            save_histograms(os.path.join(out_dir, HISTOGRAM_DIR, item_id), histograms, **arrays)
+            record['histograms'] = f"{HISTOGRAM_DIR}/{item_id}.{histograms}"
+
+        name = cipher_name(item_id)
+        target = os.path.join(out_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write then rename, so an interrupted run never leaves a truncated ciphertext
+        tmp = f"{target[:-4]}.{os.getpid()}.tmp.png"
+        if not save_encrypted_image(cipher, tmp):
+            raise IOError(f"Failed to save ciphertext: {name}")
+        os.replace(tmp, target)
+        record.update(cipher=name, status=STATUS_OK)
+    except Exception as e:
+        record.update(status=STATUS_ERROR, error=f"{type(e).__name__}: {e}")
+    return record
+
+
+# ---------------------------
+# Results files
+# ---------------------------
+
+def load_results(out_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Latest record per image id from results.jsonl (a torn last line is ignored)."""
+    results: Dict[str, Dict[str, Any]] = {}
+    path = os.path.join(out_dir, RESULTS_JSONL)
+    if not os.path.exists(path):
+        return results
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and 'id' in record:
+                results[record['id']] = record
+    return results
+
+
+def is_done(out_dir: str, record: Optional[Dict[str, Any]]) -> bool:
+    return (record is not None and record.get('status') == STATUS_OK
+            and os.path.exists(os.path.join(out_dir, record['cipher'])))
+
+
+class ResultWriter:
+    """
+    Appends records to results.jsonl and results.csv, flushing after each one.
+
+    The files are first rewritten from ``existing`` (the finished images of an
+    earlier run), so a resumed run starts from complete lines with one record
+    per image.
+    """
+
+    def __init__(self, out_dir: str, existing: Dict[str, Dict[str, Any]]):
+        self._jsonl = open(os.path.join(out_dir, RESULTS_JSONL), 'w', encoding='utf-8')
+        self._csv_file = open(os.path.join(out_dir, RESULTS_CSV), 'w', newline='', encoding='utf-8')
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        self._csv.writeheader()
+        for record in existing.values():
+            self.write(record)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._jsonl.write(json.dumps(record) + '\n')
+        self._jsonl.flush()
+        self._csv.writerow(record)
+        self._csv_file.flush()
+
+    def close(self) -> None:
+        self._jsonl.close()
+        self._csv_file.close()
+
+
+def _check_config(out_dir: str, config: Dict[str, Any], restart: bool) -> None:
+    path = os.path.join(out_dir, CONFIG_FILE)
+    if os.path.exists(path) and not restart:
+        with open(path, encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored != config:
+            changed = sorted(k for k in set(stored) | set(config) if stored.get(k) != config.get(k))
+            raise ValueError(
+                f"{out_dir} holds results of another configuration (differs in {', '.join(changed)}); "
+                "use --restart or another --out"
+            )
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+
+def run_batch(images_dir: str, out_dir: str, algorithm: str = 'lasm_fb', key: str = 'super-secret-key',
+              config: Optional[Dict[str, Any]] = None, workers: Optional[int] = None,
+              recursive: bool = False, max_pixels: Optional[int] = None, metrics: str = 'basic',
+              verify: bool = True, histograms: str = 'npz', restart: bool = False,
+              progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Encrypt every image in ``images_dir`` into ``out_dir``; returns the run summary.
+
+    Args:
+        config: Encryptor config (e.g. {'memory_window': 64})
+        workers: Worker processes (default: cpu count; 0 runs inline)
+        max_pixels: Downscale larger images to about this many pixels
+        metrics: 'none', 'basic' (entropy/NPCR/UACI) or 'full' (+ correlation, PSNR)
+        verify: Decrypt every ciphertext and check it matches the input
+        histograms: 'npz' or 'json' to store per-image histogram counts, or 'none'
+        restart: Discard earlier results in ``out_dir`` instead of resuming
+        progress: Optional callable receiving each record as it is written
+    """
+    if metrics not in METRICS_MODES:
+        raise ValueError(f"metrics must be one of {METRICS_MODES}")
+    if histograms not in HISTOGRAM_MODES:
+        raise ValueError(f"histograms must be one of {HISTOGRAM_MODES}")
+    config = dict(config or {})
+    os.makedirs(out_dir, exist_ok=True)
+    _check_config(out_dir, {
+        'algorithm': algorithm,
+        'config': config,
+        'key_hash': key_digest(key).hex()[:16],
+        'max_pixels': max_pixels,
+        'metrics': metrics,
+        'verify': verify,
+        'histograms': histograms,
+    }, restart)
+
+    done = {} if restart else {
+        item_id: record for item_id, record in load_results(out_dir).items() if is_done(out_dir, record)
+    }
+    todo: List[Tuple[str, str]] = []
+    skipped = 0
+    for path in iter_images(images_dir, recursive):
+        item_id = image_id(path, images_dir)
+        if item_id in done:
+            skipped += 1
+        else:
+            todo.append((path, item_id))
+
+    options = {'max_pixels': max_pixels, 'metrics': metrics, 'verify': verify, 'histograms': histograms}
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    totals = {'processed': 0, 'errors': 0, 'bytes': 0, 'encrypt_s': 0.0, 'decrypt_s': 0.0}
+    writer = ResultWriter(out_dir, done)
+    start = time.perf_counter()
+
+    def record_done(record: Dict[str, Any]) -> None:
+        writer.write(record)
+        totals['processed'] += 1
+        if record['status'] != STATUS_OK:
+            totals['errors'] += 1
+        totals['bytes'] += record.get('bytes', 0)
+        totals['encrypt_s'] += record.get('encrypt_s', 0.0)
+        totals['decrypt_s'] += record.get('decrypt_s', 0.0)
+        if progress is not None:
+            progress(record)
+
+    try:
+        if workers <= 0 or len(todo) <= 1:
+            encryptor = get_encryptor(algorithm, **config)
+            for path, item_id in todo:
+                record_done(process_image(encryptor, algorithm, key, out_dir, path, item_id, **options))
+        else:
+            _run_pool(todo, min(workers, len(todo)), record_done,
+                      (algorithm, config, key, out_dir, options))
+    finally:
+        writer.close()
+        elapsed = time.perf_counter() - start
+        summary = {
+            'algorithm': algorithm,
+            'workers': workers,
+            'images': len(todo) + skipped,
+            'skipped': skipped,
+            **totals,
+            'elapsed_s': elapsed,
+            'images_per_s': totals['processed'] / elapsed if elapsed > 0 else 0.0,
+            'mb_per_s': totals['bytes'] / 1e6 / elapsed if elapsed > 0 else 0.0,
+            'complete': totals['processed'] == len(todo),
+        }
+        with open(os.path.join(out_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+
+def _run_pool(todo: List[Tuple[str, str]], workers: int, record_done, initargs: Tuple) -> None:
+    """Keep about two images per worker in flight and hand back records as they finish."""
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=initargs,
+    )
+    pending = set()
+    items = iter(todo)
+    try:
+        for path, item_id in items:
+            pending.add(pool.submit(_run_image, path, item_id))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record_done(future.result())
+        for future in wait(pending).done:
+            record_done(future.result())
+        pool.shutdown()
+    except BaseException:
+        # Interrupted (or a worker died): drop queued images; finished ones are already written
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Encrypt every image in a directory on a process pool.")
+    p.add_argument("images_dir", help="Directory containing the images.")
+    p.add_argument("--out", required=True, help="Output directory (results, ciphertexts).")
+    p.add_argument("--algorithm", default="lasm_fb", help="Registry algorithm name.")
+    keys = p.add_mutually_exclusive_group()
+    keys.add_argument("--key", default="super-secret-key")
+    keys.add_argument("--key-file", default=None, help="Read the key from this file instead.")
+    p.add_argument("--memory-window", type=int, default=None, help="Encryptor memory_window config.")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (0 = inline).")
+    p.add_argument("--recursive", action="store_true", help="Recurse into subfolders.")
+    p.add_argument("--max-pixels", type=int, default=None, help="Downscale larger images to about this many pixels.")
+    p.add_argument("--metrics", choices=METRICS_MODES, default="basic")
+    p.add_argument("--no-verify", action="store_true", help="Skip the decrypt-and-compare check.")
+    p.add_argument("--histograms", choices=HISTOGRAM_MODES, default="npz",
+                   help="Store per-image histogram counts in this format (render with histograms.py).")
+    p.add_argument("--restart", action="store_true", help="Discard earlier results instead of resuming.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    key = args.key
+    if args.key_file:
+        with open(args.key_file, encoding='utf-8') as f:
+            key = f.read().strip()
+    config = {} if args.memory_window is None else {'memory_window': args.memory_window}
+
+    def report(record):
+        if record['status'] == STATUS_OK:
+            line = f"  {record['id']}: enc {record['encrypt_s']:.3f}s"
+            if 'roundtrip_ok' in record:
+                line += f", dec {record['decrypt_s']:.3f}s" + ("" if record['roundtrip_ok'] else " ROUNDTRIP FAILED")
+        else:
+            line = f"  !! {record['id']}: {record['error']}"
+        print(line, flush=True)
+
+    try:
+        summary = run_batch(args.images_dir, args.out, args.algorithm, key, config, args.workers,
+                            args.recursive, args.max_pixels, args.metrics, not args.no_verify,
+                            args.histograms, args.restart, progress=report)
+    except KeyboardInterrupt:
+        print("\n[batch] interrupted; run the same command again to resume", file=sys.stderr)
+        return 130
+    except ValueError as e:
+        print(f"[batch] {e}", file=sys.stderr)
+        return 2
+    print(f"[batch] {summary['processed']} images ({summary['errors']} errors, {summary['skipped']} already done) "
+          f"in {summary['elapsed_s']:.1f}s: {summary['images_per_s']:.2f} images/s, "
+          f"{summary['mb_per_s']:.2f} MB/s with {summary['workers']} workers")
+    print(f"[batch] results in {os.path.join(args.out, RESULTS_CSV)}")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,21 @@
+# Performance benchmarks for the encryptors in the registry
+# (run as CLIs, e.g. `python -m benchmarks.suite --sizes 128,256 --output bench.json`)
+#
+# Names are re-exported lazily so `python -m benchmarks.<tool>` does not import
+# the tool module twice.
+
+import importlib
+
+_EXPORTS = {
+    'run_suite': '.suite',
+    'benchmark_case': '.suite',
+    'roundtrip': '.suite',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
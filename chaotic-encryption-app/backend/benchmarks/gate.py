@@ -0,0 +1,228 @@
+"""
+Benchmark regression gate against baselines stored in the repository.
+
+``benchmarks/baselines.json`` holds, per algorithm and case (``size x size x
+channels``), the median encrypt/decrypt time and peak memory of a reference
+run of benchmarks.suite. ``check`` re-runs the same cases and reports every
+case that got slower (or hungrier) than the baseline by more than the
+threshold.
+
+Timings are only comparable on similar hardware, so every report also times
+a fixed pure-Python/numpy calibration workload; baseline times are scaled by
+``current calibration / baseline calibration`` before comparing. Memory is
+compared unscaled.
+
+Usage:
+    python -m benchmarks.gate                       # check, exit 1 on regressions
+    python -m benchmarks.gate --algorithms fodhnn --threshold 0.5
+    python -m benchmarks.gate --update              # re-record baselines.json
+
+    pytest tests/test_benchmark_gate.py --benchmark=fail    # see tests/conftest.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .suite import format_record, run_suite
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# Cases recorded in baselines.json; small enough for a gate run of a few minutes
+GATE_CONFIG = {
+    'sizes': [64, 128],
+    'channels': [1, 3],
+    'warmup': 1,
+    'repeats': 7,
+    'cache': 'cold',
+}
+
+DEFAULT_THRESHOLD = 0.25         # allowed relative slowdown of a median time
+DEFAULT_MEMORY_THRESHOLD = 0.10  # allowed relative growth of peak memory
+MIN_SECONDS = 0.002              # ignore time differences below this (timer noise)
+MIN_BYTES = 64 * 1024            # ignore peak-memory differences below this
+
+METRICS = ('encrypt', 'decrypt', 'peak_encrypt', 'peak_decrypt')
+
+
+def calibrate(rounds: int = 7) -> float:
+    """Median seconds of a fixed workload mixing Python loops and numpy calls (first round discarded)."""
+    data = np.random.default_rng(0).integers(0, 256, size=65536, dtype=np.uint8)
+    samples = []
+    for _ in range(rounds + 1):
+        t0 = time.perf_counter()
+        acc = 0
+        for v in data.tolist():
+            acc = (acc * 31 + v) & 0xFFFFFFFF
+        for _ in range(100):
+            np.bitwise_xor(data, np.roll(data, 1), out=data)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples[1:])
+
+
+def case_id(record: Dict[str, Any]) -> str:
+    return f"{record['size']}x{record['size']}x{record['channels']}"
+
+
+def baselines_from_report(report: Dict[str, Any], calibration: float) -> Dict[str, Any]:
+    """Reduce a suite report to the per-case numbers kept in baselines.json."""
+    cases: Dict[str, Dict[str, Any]] = {}
+    for r in report['results']:
+        if r['status'] != 'ok':
+            continue
+        entry = {'encrypt': r['encrypt']['median'], 'decrypt': r['decrypt']['median']}
+        if 'peak_bytes' in r:
+            entry['peak_encrypt'] = r['peak_bytes']['encrypt']
+            entry['peak_decrypt'] = r['peak_bytes']['decrypt']
+        cases.setdefault(r['algorithm'], {})[case_id(r)] = entry
+    return {
+        'created': report['created'],
+        'environment': report['environment'],
+        'calibration': calibration,
+        'config': {k: report['config'][k] for k in GATE_CONFIG},
+        'cases': cases,
+    }
+
+
+def load_baselines(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baselines(baselines: Dict[str, Any], path: str = BASELINE_PATH) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+@dataclass
+class Regression:
+    algorithm: str
+    case: str
+    metric: str
+    baseline: float   # scaled to this machine for timings
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+    def __str__(self) -> str:
+        unit = 's' if self.metric in ('encrypt', 'decrypt') else 'B'
+        return (f"{self.algorithm} {self.case} {self.metric}: {self.current:.4g}{unit} vs "
+                f"baseline {self.baseline:.4g}{unit} ({self.ratio - 1:+.0%})")
+
+
+def compare(current: Dict[str, Any], baselines: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+            memory_threshold: float = DEFAULT_MEMORY_THRESHOLD) -> List[Regression]:
+    """
+    Regressions of ``current`` (output of baselines_from_report) against ``baselines``.
+
+    Cases missing from either side are ignored.
+    """
+    scale = current['calibration'] / baselines['calibration']
+    found = []
+    for algorithm, cases in current['cases'].items():
+        for case, values in cases.items():
+            base = baselines['cases'].get(algorithm, {}).get(case)
+            if base is None:
+                continue
+            for metric in METRICS:
+                if metric not in values or metric not in base:
+                    continue
+                is_time = metric in ('encrypt', 'decrypt')
+                expected = base[metric] * scale if is_time else base[metric]
+                limit = expected * (1 + (threshold if is_time else memory_threshold))
+                slack = MIN_SECONDS if is_time else MIN_BYTES
+                if values[metric] > limit and values[metric] - expected > slack:
+                    found.append(Regression(algorithm, case, metric, expected, values[metric]))
+    return found
+
+
+def measure(algorithms: Optional[Iterable[str]] = None, config: Optional[Dict[str, Any]] = None,
+            progress=None) -> Dict[str, Any]:
+    """Run the gate cases (default: the config stored with the baselines) and reduce them."""
+    config = dict(config or GATE_CONFIG)
+    before = calibrate()
+    report = run_suite(algorithms, progress=progress, **config)
+    # Machine speed drifts during a run; use the mean of both ends
+    return baselines_from_report(report, (before + calibrate()) / 2)
+
+
+def check(algorithms: Optional[Iterable[str]] = None, threshold: float = DEFAULT_THRESHOLD,
+          memory_threshold: float = DEFAULT_MEMORY_THRESHOLD, path: str = BASELINE_PATH,
+          confirm: int = 1, progress=None) -> List[Regression]:
+    """
+    Measure ``algorithms`` (default: all with baselines) and compare with the stored baselines.
+
+    Algorithms that regress are measured ``confirm`` more times; only cases
+    that regress in every run are reported, so one noisy run does not fail
+    the gate.
+    """
+    baselines = load_baselines(path)
+    if algorithms is None:
+        algorithms = sorted(baselines['cases'])
+    current = measure(algorithms, baselines['config'], progress)
+    regressions = compare(current, baselines, threshold, memory_threshold)
+    for _ in range(confirm):
+        if not regressions:
+            break
+        again = measure(sorted({r.algorithm for r in regressions}), baselines['config'], progress)
+        repeated = {(r.algorithm, r.case, r.metric) for r in compare(again, baselines, threshold, memory_threshold)}
+        regressions = [r for r in regressions if (r.algorithm, r.case, r.metric) in repeated]
+    return regressions
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Compare encryptor benchmarks with the stored baselines.")
+    p.add_argument("--algorithms", default=None, help="Comma-separated registry names (default: all).")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                   help="Allowed relative slowdown of median times (0.25 = 25%%).")
+    p.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                   help="Allowed relative growth of peak memory.")
+    p.add_argument("--confirm", type=int, default=1, help="Re-runs a regression must survive.")
+    p.add_argument("--baselines", default=BASELINE_PATH)
+    p.add_argument("--update", action="store_true", help="Re-measure and overwrite the baselines.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    algorithms = args.algorithms.split(',') if args.algorithms else None
+    progress = lambda r: print(format_record(r), flush=True)
+
+    if args.update:
+        current = measure(algorithms, progress=progress)
+        if algorithms is not None and os.path.exists(args.baselines):
+            # Re-record only the requested algorithms
+            stored = load_baselines(args.baselines)
+            if stored['config'] != current['config']:
+                raise ValueError("Stored baselines use another config; update all algorithms")
+            scale = stored['calibration'] / current['calibration']
+            for cases in current['cases'].values():
+                for values in cases.values():
+                    values['encrypt'] *= scale
+                    values['decrypt'] *= scale
+            stored['cases'].update(current['cases'])
+            current = stored
+        save_baselines(current, args.baselines)
+        print(f"[gate] baselines saved to {args.baselines}")
+        return 0
+
+    regressions = check(algorithms, args.threshold, args.memory_threshold, args.baselines,
+                        args.confirm, progress)
+    for r in regressions:
+        print(f"[gate] REGRESSION {r}")
+    print(f"[gate] {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+"""
+Import-time benchmark: how long a fresh interpreter takes to get going.
+
+Every sample runs one statement in a new ``python`` process (started in the
+backend directory) and times only that statement, so interpreter startup is
+excluded but every import it triggers is included. The default statements
+cover the ``encryption`` package, the registry, and the first
+``get_encryptor`` call of each algorithm, which is what a gunicorn worker or
+a CLI tool pays before its first image. Each result also lists which of the
+heavy optional dependencies the statement pulled in.
+
+Usage:
+    python -m benchmarks.imports --repeats 7
+    python -m benchmarks.imports --statements "import app" "import batch" --output imports.json
+
+    from benchmarks.imports import import_times
+    report = import_times(["import encryption"], repeats=3)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from encryption.registry import available_algorithms
+
+from .suite import _timing, environment
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('cv2', 'Crypto', 'matplotlib', 'PIL', 'flask')
+
+# Runs in the child: time the statement, then report the loaded modules
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+exec(compile(sys.argv[1], '<statement>', 'exec'), {})
+seconds = time.perf_counter() - t0
+print(json.dumps({'seconds': seconds, 'modules': len(sys.modules),
+                  'heavy': [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def default_statements() -> List[str]:
+    return [
+        'import encryption',
+        'from encryption.registry import get_encryptor',
+    ] + [
+        f"from encryption.registry import get_encryptor; get_encryptor({name!r})"
+        for name in available_algorithms()
+    ]
+
+
+def time_statement(statement: str, python: str = sys.executable) -> Dict[str, Any]:
+    """One sample: run ``statement`` in a fresh interpreter; returns seconds, module count, heavy modules."""
+    proc = subprocess.run([python, '-c', _PROBE, statement, *HEAVY_MODULES], cwd=BACKEND_DIR,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        raise ValueError(f"{statement!r} failed: {lines[-1] if lines else proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_times(statements: Optional[Iterable[str]] = None, repeats: int = 5,
+                 python: str = sys.executable, progress=None) -> Dict[str, Any]:
+    """
+    Time every statement (default: package, registry, each algorithm) ``repeats`` times.
+
+    Args:
+        progress: Optional callable receiving each result record as it completes
+    """
+    if repeats < 1:
+        raise ValueError("repeats must be positive")
+    statements = list(statements) if statements is not None else default_statements()
+    results: List[Dict[str, Any]] = []
+    for statement in statements:
+        record: Dict[str, Any] = {'statement': statement}
+        try:
+            samples = [time_statement(statement, python) for _ in range(repeats)]
+            record.update(seconds=_timing([s['seconds'] for s in samples]),
+                          modules=samples[-1]['modules'], heavy=samples[-1]['heavy'], status='ok')
+        except ValueError as e:
+            record.update(status='error', error=str(e))
+        results.append(record)
+        if progress is not None:
+            progress(record)
+    return {
+        'suite': 'imports',
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'config': {'statements': statements, 'repeats': repeats},
+        'results': results,
+    }
+
+
+def format_record(r: Dict[str, Any]) -> str:
+    if r['status'] != 'ok':
+        return f"{r['statement']}\n    {r['error']}"
+    heavy = ', '.join(r['heavy']) or '-'
+    return (f"{r['statement']}\n    {r['seconds']['median'] * 1000:8.1f} ms"
+            f"  {r['modules']:4d} modules  heavy: {heavy}")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Time imports and first encryptor use in fresh interpreters.")
+    p.add_argument("--statements", nargs="+", default=None,
+                   help="Python statements to time (default: package, registry, every algorithm).")
+    p.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per statement.")
+    p.add_argument("--output", default=None, help="Write the JSON report here.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = import_times(args.statements, args.repeats,
+                          progress=lambda r: print(format_record(r), flush=True))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[bench] report saved to {args.output}")
+    return 1 if any(r['status'] != 'ok' for r in report['results']) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,260 @@
+"""
+Encrypt/decrypt benchmark over every registered encryptor.
+
+For each algorithm x resolution x channel count the suite runs ``warmup``
+untimed round trips, then ``repeats`` timed ones, and records:
+
+- encrypt and decrypt wall time (median/mean/min/max over the repeats),
+- throughput in MB/s of image data (from the median),
+- peak Python/numpy heap use of one encrypt and one decrypt (tracemalloc,
+  measured in a separate untimed run because tracing slows the loops down),
+- whether decrypt(encrypt(x)) == x.
+
+``cache='cold'`` clears the encryptor's warm cache before every timed
+encrypt and decrypt, so each timing includes building the key schedule (a
+first request with a new key); ``cache='warm'`` leaves it in place (repeated
+requests with the same key).
+
+Images are seeded random noise, so runs are reproducible. Unsupported
+combinations (e.g. color images for bulban) are recorded as errors rather
+than aborting the suite.
+
+Usage:
+    python -m benchmarks.suite --sizes 64,128,256 --channels 1,3 --repeats 5 --output bench.json
+
+    from benchmarks import run_suite
+    report = run_suite(['aes', 'fodhnn'], sizes=[128], repeats=3)
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from encryption.encryptor_interface import EncryptorInterface
+from encryption.registry import available_algorithms, get_encryptor
+
+
+DEFAULT_SIZES = (64, 128, 256)
+DEFAULT_CHANNELS = (1, 3)
+DEFAULT_KEY = 'benchmark-key'
+CACHE_MODES = ('cold', 'warm')
+
+
+def synthetic_image(size: int, channels: int, seed: int = 0) -> np.ndarray:
+    """Seeded uint8 noise image of size x size (2-D when channels == 1)."""
+    shape = (size, size) if channels == 1 else (size, size, channels)
+    return np.random.default_rng(seed).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def roundtrip(enc: EncryptorInterface, image: np.ndarray, key: str) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    """Encrypt then decrypt; returns (cipher, plain, encrypt seconds, decrypt seconds)."""
+    t0 = time.perf_counter()
+    cipher = enc.encrypt_image(image, key)
+    t1 = time.perf_counter()
+    plain = enc.decrypt_image(cipher, key)
+    t2 = time.perf_counter()
+    return cipher, plain, t1 - t0, t2 - t1
+
+
+def _timing(samples: Sequence[float]) -> Dict[str, Any]:
+    return {
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'samples': list(samples),
+    }
+
+
+def _clear_cache(enc: EncryptorInterface) -> None:
+    if enc.warm_cache is not None:
+        enc.warm_cache.clear()
+
+
+def _peak_bytes(func) -> Tuple[Any, int]:
+    """Run func() under tracemalloc; returns (result, peak bytes above the starting level)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def benchmark_case(enc: EncryptorInterface, image: np.ndarray, key: str = DEFAULT_KEY,
+                   warmup: int = 1, repeats: int = 3, cache: str = 'cold',
+                   memory: bool = True) -> Dict[str, Any]:
+    """
+    Time ``repeats`` round trips of one image through one encryptor.
+
+    Raises whatever the encryptor raises (run_suite records it per case).
+    """
+    if cache not in CACHE_MODES:
+        raise ValueError(f"cache must be one of {CACHE_MODES}")
+    if repeats < 1:
+        raise ValueError("repeats must be positive")
+    cold = cache == 'cold'
+
+    for _ in range(warmup):
+        if cold:
+            _clear_cache(enc)
+        roundtrip(enc, image, key)
+
+    enc_times, dec_times = [], []
+    ok = True
+    for _ in range(repeats):
+        if cold:
+            _clear_cache(enc)
+        gc.collect()
+        t0 = time.perf_counter()
+        cipher = enc.encrypt_image(image, key)
+        enc_times.append(time.perf_counter() - t0)
+        if cold:
+            _clear_cache(enc)
+        t0 = time.perf_counter()
+        plain = enc.decrypt_image(cipher, key)
+        dec_times.append(time.perf_counter() - t0)
+        ok = ok and np.array_equal(plain, image)
+
+    megabytes = image.nbytes / 1e6
+    record = {
+        'encrypt': _timing(enc_times),
+        'decrypt': _timing(dec_times),
+        'encrypt_mb_s': megabytes / statistics.median(enc_times),
+        'decrypt_mb_s': megabytes / statistics.median(dec_times),
+        'roundtrip_ok': ok,
+    }
+    if memory:
+        if cold:
+            _clear_cache(enc)
+        cipher, enc_peak = _peak_bytes(lambda: enc.encrypt_image(image, key))
+        if cold:
+            _clear_cache(enc)
+        _, dec_peak = _peak_bytes(lambda: enc.decrypt_image(cipher, key))
+        record['peak_bytes'] = {'encrypt': enc_peak, 'decrypt': dec_peak}
+    return record
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(algorithms: Optional[Iterable[str]] = None, sizes: Iterable[int] = DEFAULT_SIZES,
+              channels: Iterable[int] = DEFAULT_CHANNELS, warmup: int = 1, repeats: int = 3,
+              cache: str = 'cold', key: str = DEFAULT_KEY, memory: bool = True,
+              seed: int = 0, progress=None) -> Dict[str, Any]:
+    """
+    Benchmark every algorithm (default: all registered) on every size/channel combination.
+
+    Args:
+        progress: Optional callable receiving each result record as it completes
+    """
+    algorithms = list(algorithms) if algorithms is not None else available_algorithms()
+    sizes, channels = list(sizes), list(channels)
+    results: List[Dict[str, Any]] = []
+    for name in algorithms:
+        enc = get_encryptor(name)
+        for size in sizes:
+            for ch in channels:
+                image = synthetic_image(size, ch, seed)
+                record = {
+                    'algorithm': name,
+                    'size': size,
+                    'channels': ch,
+                    'bytes': int(image.nbytes),
+                }
+                try:
+                    record.update(benchmark_case(enc, image, key, warmup, repeats, cache, memory))
+                    record['status'] = 'ok'
+                except Exception as e:
+                    record.update(status='error', error=f"{type(e).__name__}: {e}")
+                results.append(record)
+                if progress is not None:
+                    progress(record)
+    return {
+        'suite': 'encryptors',
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'config': {
+            'algorithms': algorithms,
+            'sizes': sizes,
+            'channels': channels,
+            'warmup': warmup,
+            'repeats': repeats,
+            'cache': cache,
+            'memory': memory,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def format_record(r: Dict[str, Any]) -> str:
+    case = f"{r['algorithm']:<10} {r['size']:>5}x{r['size']:<5} c={r['channels']}"
+    if r['status'] != 'ok':
+        return f"{case}  {r['error']}"
+    line = (f"{case}  enc {r['encrypt']['median'] * 1000:9.2f} ms ({r['encrypt_mb_s']:7.2f} MB/s)"
+            f"  dec {r['decrypt']['median'] * 1000:9.2f} ms ({r['decrypt_mb_s']:7.2f} MB/s)")
+    if 'peak_bytes' in r:
+        peak = max(r['peak_bytes'].values()) / 1e6
+        line += f"  peak {peak:7.2f} MB"
+    if not r['roundtrip_ok']:
+        line += "  ROUNDTRIP FAILED"
+    return line
+
+
+def _int_list(spec: str) -> List[int]:
+    return [int(v) for v in spec.split(',') if v]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark encrypt/decrypt of every registered encryptor.")
+    p.add_argument("--algorithms", default=None, help="Comma-separated registry names (default: all).")
+    p.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Square image sizes, e.g. 64,128,256.")
+    p.add_argument("--channels", default=",".join(map(str, DEFAULT_CHANNELS)), help="Channel counts (1 = gray, 3 = color).")
+    p.add_argument("--warmup", type=int, default=1, help="Untimed round trips per case.")
+    p.add_argument("--repeats", type=int, default=3, help="Timed round trips per case.")
+    p.add_argument("--cache", choices=CACHE_MODES, default="cold",
+                   help="cold: rebuild the key schedule for every call; warm: keep it cached.")
+    p.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory runs.")
+    p.add_argument("--key", default=DEFAULT_KEY)
+    p.add_argument("--seed", type=int, default=0, help="Seed for the synthetic images.")
+    p.add_argument("--output", default=None, help="Write the JSON report here.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    algorithms = args.algorithms.split(',') if args.algorithms else None
+    report = run_suite(algorithms, _int_list(args.sizes), _int_list(args.channels),
+                       warmup=args.warmup, repeats=args.repeats, cache=args.cache, key=args.key,
+                       memory=not args.no_memory, seed=args.seed,
+                       progress=lambda r: print(format_record(r), flush=True))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[bench] report saved to {args.output}")
+    failed = [r for r in report['results'] if r['status'] == 'ok' and not r['roundtrip_ok']]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
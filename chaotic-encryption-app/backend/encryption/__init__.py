@@ -1,22 +1,36 @@
 # Chaotic Encryption Module
 # This package contains the chaotic encryption algorithms for image security
+#
+# Names are re-exported lazily: `import encryption` loads no submodule, and an
+# encryptor module (with its dependencies) is imported the first time its
+# class is looked up here or built through the registry, so workers and CLI
+# tools only pay for the algorithms they use (`python -m benchmarks.imports`).
 
-from .encryptor_interface import EncryptorInterface
-from .chaos_encryptor import ChaosEncryptor
-from .fodhnn_encryptor import FODHNNEncryptor
-from .twoD_LASM_encryptor import LASMEncryptor
-from .another_2d import LASMEncryptorFB
-from .acm_2dscl import HybridEncryptorFB
-from .bulban_encryptor import BulbanEncryptor
-from .aes_encryptor import AESEncryptor
+import importlib
 
-__all__ = [
-    'EncryptorInterface',
-    'ChaosEncryptor', 
-    'FODHNNEncryptor', 
-    'LASMEncryptor',
-    'LASMEncryptorFB', 
-    'HybridEncryptorFB',
-    'BulbanEncryptor',
-    'AESEncryptor'
-]
+_EXPORTS = {
+    'EncryptorInterface': '.encryptor_interface',
+    'EncryptionPlan': '.encryptor_interface',
+    'ChaosEncryptor': '.chaos_encryptor',
+    'FODHNNEncryptor': '.fodhnn_encryptor',
+    'LASMEncryptor': '.twoD_LASM_encryptor',
+    'LASMEncryptorFB': '.another_2d',
+    'HybridEncryptorFB': '.acm_2dscl',
+    'BulbanEncryptor': '.bulban_encryptor',
+    'AESEncryptor': '.aes_encryptor',
+    'AESGCMEncryptor': '.aes_gcm_encryptor',
+    'EncryptorRegistry': '.registry',
+    'registry': '.registry',
+    'get_encryptor': '.registry',
+    'available_algorithms': '.registry',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,11 +2,10 @@
 # Header-less, compatible hybrid chaotic encryptor (API parity)
 
 import hashlib
-from dataclasses import dataclass
-from typing import Tuple
+from dataclasses import dataclass, astuple
+from typing import Callable, Tuple
 from math import tanh as _tanh  # kept for parity; unused
 import numpy as np
-import cv2
 
 
 # ---------------------------
@@ -45,6 +44,28 @@ def _unflatten_per_channel(flat: np.ndarray, H: int, W: int, C: int) -> np.ndarr
     arr = np.moveaxis(arr, 0, -1)
     return arr.astype(np.uint8)
 
+def _take_flat(img: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """out.flat[i] = img.flat[index[i]] over the last two axes (any leading axes)."""
+    flat = img.reshape(img.shape[:-2] + (-1,))
+    return np.take(flat, index, axis=-1).reshape(img.shape)
+
+def _gather_rows(img: np.ndarray, source: Callable) -> np.ndarray:
+    """
+    out[..., i, :] = img[..., rows, cols] with (rows, cols) = source(i), one
+    output row at a time, so no full-size index array is ever built.
+    """
+    out = np.empty_like(img)
+    for i in range(img.shape[-2]):
+        rows, cols = source(i)
+        out[..., i, :] = img[..., rows, cols]
+    return out
+
+def _flat_index(M: int, N: int, source: Callable) -> np.ndarray:
+    """The flat gather index of ``source`` over all M rows, in the smallest fitting dtype."""
+    rows, cols = source(np.arange(M)[:, None])
+    index = np.broadcast_to(rows * N + cols, (M, N)).ravel()
+    return index.astype(np.int32 if M * N <= np.iinfo(np.int32).max else np.int64)
+
 
 # ---------------------------
 # Hybrid chaotic core (Arnold + 2DSCL + Chen)
@@ -73,7 +94,7 @@ class HybridKey:
     z0: float
 
 
-from .encryptor_interface import EncryptorInterface
+from .encryptor_interface import EncryptorInterface, key_digest
 
 class HybridEncryptorFB(EncryptorInterface):
     """
@@ -101,7 +122,7 @@ class HybridEncryptorFB(EncryptorInterface):
         Map SHA-256(key|shape) to chaotic parameters.
         """
         shape_str = f"{image_shape[0]}x{image_shape[1]}"
-        h = hashlib.sha256((key + "|" + shape_str).encode()).hexdigest()
+        h = key_digest(key, "|" + shape_str).hex()
         u = [_u32(int(h[i:i+8], 16)) for i in range(0, min(len(h), 64), 8)]
 
         while len(u) < 8:
@@ -138,37 +159,49 @@ class HybridEncryptorFB(EncryptorInterface):
         )
 
     # --- Arnold Cat Map (squares only) ---
+    # The channel helpers below work on the last two axes, so a stack of
+    # same-shaped channels (see _encrypt_stack) goes through in one call.
 
     def _arnold_cat_map(self, image: np.ndarray, key: HybridKey, reverse: bool = False) -> np.ndarray:
         """Apply or reverse Arnold Cat Map scrambling (requires square)."""
-        M, N = image.shape
-        result = image.copy()
-        iterations = key.arnold_iterations
-        p, q = key.p, key.q
+        M, N = image.shape[-2:]
+        return _gather_rows(image, self._arnold_source(N, key, reverse))
 
-        for _ in range(iterations):
-            temp = np.zeros_like(result)
-            if not reverse:
-                # Forward
-                for x in range(M):
-                    for y in range(N):
-                        new_x = (x + p * y) % M
-                        new_y = (q * x + (p * q + 1) * y) % N
-                        temp[new_x, new_y] = result[x, y]
-            else:
-                # Inverse
-                for x in range(M):
-                    for y in range(N):
-                        new_x = ((p * q + 1) * x - p * y) % M
-                        new_y = (-q * x + y) % N
-                        temp[new_x, new_y] = result[x, y]
-            result = temp
-        return result
+    @staticmethod
+    def _arnold_source(N: int, key: HybridKey, reverse: bool = False) -> Callable:
+        """
+        Source pixel of every output pixel after all iterations, as source(i) -> (rows, cols).
+
+        One iteration moves (x, y) to A(x, y) mod N with A = [[1, p], [q, pq + 1]],
+        so the whole scramble reads output pixel v from A^-k v (and the reverse
+        from A^k v). det A = 1, so A^-1 = [[pq + 1, -p], [-q, 1]].
+        """
+        p, q = key.p, key.q
+        step = ((1, p), (q, p * q + 1)) if reverse else ((p * q + 1, -p), (-q, 1))
+        (a, b), (c, d) = (1, 0), (0, 1)
+        for _ in range(key.arnold_iterations):
+            (a, b), (c, d) = (
+                ((step[0][0] * a + step[0][1] * c) % N, (step[0][0] * b + step[0][1] * d) % N),
+                ((step[1][0] * a + step[1][1] * c) % N, (step[1][0] * b + step[1][1] * d) % N),
+            )
+        j = np.arange(N)
+        bj, dj = b * j % N, d * j % N
+        return lambda i: ((a * i + bj) % N, (c * i + dj) % N)
 
     # --- Rectangle-safe keyed permutation (deterministic & channel-stable) ---
 
     def _permute_rect(self, img: np.ndarray, key: "HybridKey", reverse: bool = False, ch: int = 0) -> np.ndarray:
-        H, W = img.shape
+        H, W = img.shape[-2:]
+        rperm, cperm = self._rect_permutations(H, W, key, ch)
+
+        if reverse:
+            inv_r = np.argsort(rperm); inv_c = np.argsort(cperm)
+            return img[..., inv_r, :][..., inv_c]
+        else:
+            return img[..., rperm, :][..., cperm]
+
+    @staticmethod
+    def _rect_permutations(H: int, W: int, key: "HybridKey", ch: int) -> Tuple[np.ndarray, np.ndarray]:
         # Build a stable 64-bit seed from HybridKey parameters + shape + channel
         seed_src = f"{key.p}|{key.q}|{key.arnold_iterations}|{H}|{W}|{ch}|rect-permute-v1".encode()
         seed = np.frombuffer(hashlib.sha256(seed_src).digest()[:8], dtype=np.uint64)[0]
@@ -176,16 +209,15 @@ class HybridEncryptorFB(EncryptorInterface):
         rng = np.random.default_rng(seed)
         rperm = np.arange(H); rng.shuffle(rperm)
         cperm = np.arange(W); rng.shuffle(cperm)
-
-        if reverse:
-            inv_r = np.argsort(rperm); inv_c = np.argsort(cperm)
-            return img[inv_r][:, inv_c]
-        else:
-            return img[rperm][:, cperm]
+        return rperm, cperm
 
     # --- 2D Sine-Cosine-Logistic XOR mask (self-invertible) ---
 
     def _2dscl_mask(self, H: int, W: int, key: HybridKey) -> np.ndarray:
+        return self._cached('2dscl_mask', (astuple(key), H, W, self.burn_in),
+                            lambda: self._build_2dscl_mask(H, W, key))
+
+    def _build_2dscl_mask(self, H: int, W: int, key: HybridKey) -> np.ndarray:
         x_current = key.lambda_param
         y_current = key.lambda_param
 
@@ -206,7 +238,7 @@ class HybridEncryptorFB(EncryptorInterface):
         return mask
 
     def _apply_2dscl_enhancement(self, image: np.ndarray, key: HybridKey) -> np.ndarray:
-        H, W = image.shape
+        H, W = image.shape[-2:]
         mask = self._2dscl_mask(H, W, key)
         # XOR is its own inverse; same function used in decrypt
         return np.bitwise_xor(image, mask, dtype=np.uint8)
@@ -214,6 +246,10 @@ class HybridEncryptorFB(EncryptorInterface):
     # --- Chen's Chaotic System Diffusion (exactly one round) ---
 
     def _generate_chen_keystream(self, length: int, key: HybridKey) -> Tuple[np.ndarray, np.ndarray]:
+        return self._cached('chen_keystream', (astuple(key), length, self.burn_in),
+                            lambda: self._build_chen_keystream(length, key))
+
+    def _build_chen_keystream(self, length: int, key: HybridKey) -> Tuple[np.ndarray, np.ndarray]:
         x, y, z = key.x0, key.y0, key.z0
 
         # Warm-up
@@ -241,32 +277,56 @@ class HybridEncryptorFB(EncryptorInterface):
         return np.array(keys, dtype=np.uint8), np.array(shifts, dtype=np.int32)
 
     def _chen_diffusion(self, image: np.ndarray, key: HybridKey, reverse: bool = False) -> np.ndarray:
-        M, N = image.shape
-        result = image.copy().astype(np.uint8)
-
+        M, N = image.shape[-2:]
         row_keys, row_shifts = self._generate_chen_keystream(M, key)
         col_keys, col_shifts = self._generate_chen_keystream(N, key)
+        source = self._chen_source(M, N, row_shifts, col_shifts, reverse)
+        if not reverse:
+            result = _gather_rows(np.bitwise_xor(_as_uint8(image), row_keys[:, None]), source)
+            return np.bitwise_xor(result, col_keys, out=result)
+        # Reverse: columns then rows (inverse order)
+        result = _gather_rows(np.bitwise_xor(_as_uint8(image), col_keys), source)
+        return np.bitwise_xor(result, row_keys[:, None], out=result)
 
+    @staticmethod
+    def _chen_source(M: int, N: int, row_shifts: np.ndarray, col_shifts: np.ndarray,
+                     reverse: bool = False) -> Callable:
+        """
+        Source pixel of the composed row then column rolls, as source(i) -> (rows, cols).
+
+        Forward, every row is XORed with its key and rolled left by its shift,
+        then every column likewise. A key is constant along the roll it goes
+        with, so all the rolls compose into one gather between the two XORs:
+        output (i, j) reads row r = (i + col_shift[j]) % M, column
+        (j + row_shift[r]) % N. The reverse solves that for (i, j).
+        """
+        j = np.arange(N)
+        row_shifts, col_shifts = row_shifts.astype(np.intp), col_shifts.astype(np.intp)
         if not reverse:
-            # Forward: rows then columns
-            for row in range(M):
-                result[row] = np.bitwise_xor(result[row], row_keys[row], dtype=np.uint8)
-                result[row] = np.roll(result[row], -row_shifts[row])
-
-            for col in range(N):
-                result[:, col] = np.bitwise_xor(result[:, col], col_keys[col], dtype=np.uint8)
-                result[:, col] = np.roll(result[:, col], -col_shifts[col])
+            def source(i):
+                rows = (i + col_shifts) % M
+                return rows, (j + row_shifts[rows]) % N
         else:
-            # Reverse: columns then rows (inverse order)
-            for col in reversed(range(N)):
-                result[:, col] = np.roll(result[:, col], col_shifts[col])
-                result[:, col] = np.bitwise_xor(result[:, col], col_keys[col], dtype=np.uint8)
+            def source(r):
+                cols = (j - row_shifts[r]) % N
+                return (r - col_shifts[cols]) % M, cols
+        return source
 
-            for row in reversed(range(M)):
-                result[row] = np.roll(result[row], row_shifts[row])
-                result[row] = np.bitwise_xor(result[row], row_keys[row], dtype=np.uint8)
+    def _chen_schedule(self, M: int, N: int, key: HybridKey) -> Tuple[np.ndarray, ...]:
+        """Row keys, column keys and the flat gather indices of the forward and reverse rolls."""
+        row_keys, row_shifts = self._generate_chen_keystream(M, key)
+        col_keys, col_shifts = self._generate_chen_keystream(N, key)
+        index = _flat_index(M, N, self._chen_source(M, N, row_shifts, col_shifts))
+        inverse = _flat_index(M, N, self._chen_source(M, N, row_shifts, col_shifts, reverse=True))
+        return row_keys, col_keys, index, inverse
 
-        return result
+    @staticmethod
+    def _chen_apply(image: np.ndarray, row_keys: np.ndarray, col_keys: np.ndarray,
+                    index: np.ndarray, inverse: np.ndarray, reverse: bool = False) -> np.ndarray:
+        if not reverse:
+            return np.bitwise_xor(_take_flat(np.bitwise_xor(image, row_keys[:, None]), index), col_keys)
+        # Reverse: columns then rows (inverse order)
+        return np.bitwise_xor(_take_flat(np.bitwise_xor(image, col_keys), inverse), row_keys[:, None])
 
     # --- validation ---
 
@@ -317,11 +377,59 @@ class HybridEncryptorFB(EncryptorInterface):
                 chans.append(self._decrypt_channel(channel, hybrid_key, ch=c))
             return np.stack(chans, axis=2)
 
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple:
+        """
+        Confusion gather index per channel (with its inverse), 2DSCL mask and
+        Chen keys/index for one image shape.
+        """
+        H, W = shape[:2]
+        hybrid_key = self._derive_key(key, (H, W))
+        channels = shape[2] if len(shape) == 3 else 1
+        if H == W:
+            confusion = ((_flat_index(H, W, self._arnold_source(W, hybrid_key)),
+                          _flat_index(H, W, self._arnold_source(W, hybrid_key, reverse=True))),) * channels
+        else:
+            confusion = []
+            for c in range(channels):
+                rperm, cperm = self._rect_permutations(H, W, hybrid_key, c)
+                inv_r, inv_c = np.argsort(rperm), np.argsort(cperm)
+                confusion.append((_flat_index(H, W, lambda i: (rperm[i], cperm)),
+                                  _flat_index(H, W, lambda i: (inv_r[i], inv_c))))
+            confusion = tuple(confusion)
+        chen = self._chen_schedule(H, W, hybrid_key)
+        return confusion, self._2dscl_mask(H, W, hybrid_key), chen
+
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Encrypt N same-shaped images at once: each channel of all N in one pipeline pass."""
+        confusion, mask, chen = schedule
+        imgs = _as_uint8(stack)
+
+        def channel(planes, c):
+            enhanced = np.bitwise_xor(_take_flat(planes, confusion[c][0]), mask)
+            return self._chen_apply(enhanced, *chen, reverse=False)
+
+        if imgs.ndim == 3:
+            return channel(imgs, 0)
+        return np.stack([channel(imgs[..., c], c) for c in range(imgs.shape[3])], axis=-1)
+
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Decrypt N same-shaped images at once (inverse of _encrypt_planned)."""
+        confusion, mask, chen = schedule
+        cipher = _as_uint8(stack)
+
+        def channel(planes, c):
+            enhanced = self._chen_apply(planes, *chen, reverse=True)
+            return _take_flat(np.bitwise_xor(enhanced, mask), confusion[c][1])
+
+        if cipher.ndim == 3:
+            return channel(cipher, 0)
+        return np.stack([channel(cipher[..., c], c) for c in range(cipher.shape[3])], axis=-1)
+
     # --- per-channel pipeline (symmetric; no adaptive rounds) ---
 
     def _encrypt_channel(self, channel: np.ndarray, original_channel: np.ndarray, key: HybridKey, ch: int = 0) -> np.ndarray:
         # 1) Confusion
-        if channel.shape[0] == channel.shape[1]:
+        if channel.shape[-2] == channel.shape[-1]:
             confused = self._arnold_cat_map(channel, key, reverse=False)
         else:
             confused = self._permute_rect(channel, key, reverse=False, ch=ch)
@@ -342,7 +450,7 @@ class HybridEncryptorFB(EncryptorInterface):
         current = self._apply_2dscl_enhancement(current, key)
 
         # 1) Reverse confusion
-        if current.shape[0] == current.shape[1]:
+        if current.shape[-2] == current.shape[-1]:
             return self._arnold_cat_map(current, key, reverse=True)
         else:
             return self._permute_rect(current, key, reverse=True, ch=ch)
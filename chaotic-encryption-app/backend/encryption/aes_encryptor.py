@@ -1,6 +1,7 @@
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 import numpy as np
-from .encryptor_interface import EncryptorInterface
+from .encryptor_interface import EncryptorInterface, key_digest
 
 
 class AESEncryptor(EncryptorInterface):
@@ -12,46 +13,147 @@ class AESEncryptor(EncryptorInterface):
     - Uses a deterministic counter (no nonce) derived from the key for
       reproducible encryption/decryption with just the key string.
     - Operates on raw image bytes and preserves the original shape and dtype.
+    - The cipher reads the image buffer directly and writes into a new (or a
+      caller-supplied ``out``) writable array; no intermediate bytes copies.
+    - CTR is seekable, so large buffers are split into chunks encrypted on
+      ``threads`` threads (pycryptodome releases the GIL); the ciphertext is
+      the same for any thread count.
     """
 
+    def __init__(self, threads: int = 1, chunk_bytes: int = 1 << 20):
+        if threads < 1:
+            raise ValueError("threads must be at least 1")
+        if chunk_bytes < 16:
+            raise ValueError("chunk_bytes must be at least one AES block (16)")
+        self.threads = int(threads)
+        self.chunk_bytes = int(chunk_bytes) // 16 * 16
+
     def get_algorithm_name(self) -> str:
         return 'aes'
 
     def _derive_key_and_counter(self, key: str) -> Tuple[bytes, int]:
-        import hashlib
-        key_bytes = hashlib.sha256(key.encode()).digest()  # 32 bytes
+        key_bytes = key_digest(key)  # 32 bytes
         # Deterministic 16-byte initial counter from the key (first 16 bytes)
         iv_bytes = key_bytes[:16]
         initial_value = int.from_bytes(iv_bytes, byteorder='big')
         return key_bytes, initial_value
 
-    def _crypt(self, image: np.ndarray, key: str) -> np.ndarray:
+    def _ctr(self, key_bytes: bytes, initial_value: int, data: np.ndarray, out: np.ndarray,
+             offset: int = 0) -> None:
+        """
+        out = data XOR the CTR keystream from byte ``offset`` on (flat uint8 arrays).
+
+        A chunk starting at stream byte n uses the counter initial_value + n // 16
+        (wrapping at 2**128 like the cipher itself) and skips n % 16 keystream
+        bytes, so chunks are independent and are written straight into ``out``.
+        """
+        from Crypto.Cipher import AES
+
+        def run(start: int) -> None:
+            stop = min(start + self.chunk_bytes, len(data))
+            block, skip = divmod(offset + start, 16)
+            # No nonce; use empty nonce and deterministic counter
+            cipher = AES.new(key_bytes, AES.MODE_CTR, nonce=b'',
+                             initial_value=(initial_value + block) % (1 << 128))
+            if skip:
+                cipher.encrypt(bytes(skip))
+            cipher.encrypt(memoryview(data[start:stop]), output=memoryview(out[start:stop]))
+
+        starts = range(0, len(data), self.chunk_bytes)
+        if self.threads == 1 or len(starts) == 1:
+            for start in starts:
+                run(start)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.threads, len(starts))) as pool:
+            list(pool.map(run, starts))
+
+    def _crypt(self, image: np.ndarray, key: str, out: Optional[np.ndarray] = None) -> np.ndarray:
         # Validate inputs
         self.validate_image(image)
         self.validate_encryption_params(key)
 
         key_bytes, initial_value = self._derive_key_and_counter(key)
 
-        # Convert image to contiguous bytes
-        original_shape = image.shape
-        original_dtype = image.dtype
-        data = image.tobytes()
+        # Raw bytes of the image (C order, no copy when already contiguous)
+        data = np.ascontiguousarray(image)
+        if out is None:
+            out = np.empty_like(data)
+        else:
+            self._check_out(data, out)
+        self._ctr(key_bytes, initial_value, data.view(np.uint8).reshape(-1), out.view(np.uint8).reshape(-1))
+        return out
 
-        # AES-CTR
-        from Crypto.Cipher import AES
-        # No nonce; use empty nonce and deterministic counter
-        cipher = AES.new(key_bytes, AES.MODE_CTR, nonce=b'', initial_value=initial_value)
-        out = cipher.encrypt(data)
+    @staticmethod
+    def _check_out(data: np.ndarray, out: np.ndarray) -> None:
+        if not isinstance(out, np.ndarray):
+            raise ValueError("out must be a numpy array")
+        if out.shape != data.shape or out.dtype != data.dtype:
+            raise ValueError(f"out must have shape {data.shape} and dtype {data.dtype}, "
+                             f"got {out.shape} {out.dtype}")
+        if not (out.flags.c_contiguous and out.flags.writeable):
+            raise ValueError("out must be C-contiguous and writable")
+        # In place is fine (each chunk is read before it is written); partial overlap is not
+        same = out.__array_interface__['data'][0] == data.__array_interface__['data'][0]
+        if not same and np.may_share_memory(out, data):
+            raise ValueError("out partially overlaps the input")
+
+    def _keystream(self, key_bytes: bytes, initial_value: int, nbytes: int) -> np.ndarray:
+        keystream = np.empty(nbytes, dtype=np.uint8)
+        self._ctr(key_bytes, initial_value, np.zeros(nbytes, dtype=np.uint8), keystream)
+        return keystream
+
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple:
+        # Keystream for uint8 images; other dtypes need a longer one, derived per call
+        key_bytes, initial_value = self._derive_key_and_counter(key)
+        return key_bytes, initial_value, self._keystream(key_bytes, initial_value, int(np.prod(shape)))
+
+    def _crypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        # Every image starts at the same counter, so one keystream serves the whole stack
+        key_bytes, initial_value, keystream = schedule
+        flat = np.ascontiguousarray(stack).view(np.uint8).reshape(len(stack), -1)
+        if flat.shape[1] != len(keystream):
+            keystream = self._keystream(key_bytes, initial_value, flat.shape[1])
+        return np.bitwise_xor(flat, keystream).view(stack.dtype).reshape(stack.shape)
+
+    def supports_streaming(self) -> bool:
+        return True
+
+    def _crypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        key_bytes, initial_value = self._derive_key_and_counter(key)
+        row_bytes = src[0].nbytes
+
+        for r0 in range(0, len(src), band_rows):
+            band = np.ascontiguousarray(src[r0:r0 + band_rows])
+            target = dst[r0:r0 + len(band)]
+            # Write straight into a contiguous destination (e.g. a memmap) when possible
+            direct = isinstance(target, np.ndarray) and target.flags.c_contiguous \
+                and target.flags.writeable and target.dtype == band.dtype
+            out = target if direct else np.empty_like(band)
+            self._ctr(key_bytes, initial_value, band.view(np.uint8).reshape(-1),
+                      out.view(np.uint8).reshape(-1), offset=r0 * row_bytes)
+            if not direct:
+                dst[r0:r0 + len(band)] = out
+
+    def _encrypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        self._crypt_bands(src, dst, key, band_rows)
 
-        # Convert back to ndarray with same shape and dtype
-        result = np.frombuffer(out, dtype=original_dtype).reshape(original_shape)
-        return result
+    def _decrypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        self._crypt_bands(src, dst, key, band_rows)
 
-    def encrypt_image(self, image: np.ndarray, key: str) -> np.ndarray:
-        return self._crypt(image, key)
+    def encrypt_image(self, image: np.ndarray, key: str, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encrypt ``image``; the ciphertext is written into ``out`` when given
+        (same shape and dtype, C-contiguous, writable; may be ``image`` itself)
+        and ``out`` is returned.
+        """
+        return self._crypt(image, key, out)
 
-    def decrypt_image(self, image: np.ndarray, key: str) -> np.ndarray:
+    def decrypt_image(self, image: np.ndarray, key: str, out: Optional[np.ndarray] = None) -> np.ndarray:
         # CTR encryption is symmetric; applying the same operation decrypts
-        return self._crypt(image, key)
+        return self._crypt(image, key, out)
 
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        return self._crypt_planned(stack, schedule)
 
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        return self._crypt_planned(stack, schedule)
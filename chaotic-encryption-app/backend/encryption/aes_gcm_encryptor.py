@@ -0,0 +1,145 @@
+from typing import Any, Dict, Sequence, Tuple
+import numpy as np
+from .encryptor_interface import EncryptionPlan, EncryptorInterface, key_digest
+
+
+# Container header: magic, nonce and tag, stored in extra rows after the ciphertext
+CONTAINER_MAGIC = b'AGCM'
+NONCE_BYTES = 12
+TAG_BYTES = 16
+HEADER_BYTES = len(CONTAINER_MAGIC) + NONCE_BYTES + TAG_BYTES
+
+
+class AESGCMEncryptor(EncryptorInterface):
+    """
+    AES-256 GCM-mode (authenticated) encryptor for images.
+
+    Notes:
+    - Derives a 32-byte key from the provided string using SHA-256 (with its
+      own context, so it never shares a key with 'aes').
+    - Draws a random 96-bit nonce per image: encrypting the same image twice
+      gives different ciphertexts. Keep well below 2**32 images per key.
+    - Authenticates the image shape and dtype as associated data; decryption
+      fails with ValueError on a wrong key or any modified byte.
+    - The ciphertext is a container with the image's dtype and trailing
+      dimensions: the encrypted rows followed by ``header_rows`` rows holding
+      magic + nonce + tag (zero padded), so it saves and loads like an image.
+    - The cipher reads the image buffer and writes into the container directly.
+      GHASH chains over the whole message, so unlike 'aes' one image cannot be
+      split across threads.
+    """
+
+    deterministic = False
+
+    def get_algorithm_name(self) -> str:
+        return 'aes_gcm'
+
+    def _derive_key(self, key: str) -> bytes:
+        return key_digest(key, ':aes-gcm')  # 32 bytes
+
+    @staticmethod
+    def header_rows(row_bytes: int) -> int:
+        """Rows appended to hold the container header, for rows of ``row_bytes`` bytes."""
+        return -(-HEADER_BYTES // row_bytes)
+
+    @classmethod
+    def container_shape(cls, shape: Sequence[int], dtype: Any) -> Tuple[int, ...]:
+        """Shape of the ciphertext container for an image of ``shape`` and ``dtype``."""
+        shape = tuple(int(n) for n in shape)
+        row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * np.dtype(dtype).itemsize
+        return (shape[0] + cls.header_rows(row_bytes),) + shape[1:]
+
+    @classmethod
+    def plain_shape(cls, shape: Sequence[int], dtype: Any) -> Tuple[int, ...]:
+        """Shape of the image inside a container of ``shape`` and ``dtype``."""
+        shape = tuple(int(n) for n in shape)
+        row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * np.dtype(dtype).itemsize
+        rows = shape[0] - cls.header_rows(row_bytes)
+        if rows < 1:
+            raise ValueError(f"Image of shape {shape} is too small to be an aes_gcm container")
+        return (rows,) + shape[1:]
+
+    @staticmethod
+    def _associated_data(shape: Tuple[int, ...], dtype: np.dtype) -> bytes:
+        return f"aes_gcm:v1:{dtype.str}:{'x'.join(map(str, shape))}".encode()
+
+    def _cipher(self, key: str, nonce: bytes, shape: Tuple[int, ...], dtype: np.dtype):
+        from Crypto.Cipher import AES
+
+        cipher = AES.new(self._derive_key(key), AES.MODE_GCM, nonce=nonce, mac_len=TAG_BYTES)
+        cipher.update(self._associated_data(shape, dtype))
+        return cipher
+
+    def encrypt_image(self, image: np.ndarray, key: str) -> np.ndarray:
+        """
+        Encrypt ``image`` under a fresh random nonce.
+
+        Returns:
+            Container of shape ``container_shape(image.shape, image.dtype)``
+        """
+        from Crypto.Random import get_random_bytes
+
+        self.validate_image(image)
+        self.validate_encryption_params(key)
+
+        data = np.ascontiguousarray(image)
+        container = np.empty(self.container_shape(data.shape, data.dtype), dtype=data.dtype)
+        flat = container.view(np.uint8).reshape(-1)
+        body, header = flat[:data.nbytes], flat[data.nbytes:]
+
+        nonce = get_random_bytes(NONCE_BYTES)
+        cipher = self._cipher(key, nonce, data.shape, data.dtype)
+        cipher.encrypt(memoryview(data.view(np.uint8).reshape(-1)), output=memoryview(body))
+        header[:] = 0
+        header[:HEADER_BYTES] = np.frombuffer(CONTAINER_MAGIC + nonce + cipher.digest(), dtype=np.uint8)
+        return container
+
+    def decrypt_image(self, image: np.ndarray, key: str) -> np.ndarray:
+        """
+        Verify and decrypt a container produced by encrypt_image.
+
+        Returns:
+            The original image (shape ``plain_shape(image.shape, image.dtype)``)
+
+        Raises:
+            ValueError: If the input is not an aes_gcm container, or the key is
+                wrong or the container was modified (authentication failure)
+        """
+        self.validate_image(image)
+        self.validate_encryption_params(key)
+
+        data = np.ascontiguousarray(image)
+        shape = self.plain_shape(data.shape, data.dtype)
+        flat = data.view(np.uint8).reshape(-1)
+        result = np.empty(shape, dtype=data.dtype)
+        body, header = flat[:result.nbytes], flat[result.nbytes:].tobytes()
+        if header[:len(CONTAINER_MAGIC)] != CONTAINER_MAGIC or any(header[HEADER_BYTES:]):
+            raise ValueError("Image is not an aes_gcm container")
+        nonce = header[len(CONTAINER_MAGIC):len(CONTAINER_MAGIC) + NONCE_BYTES]
+        tag = header[len(CONTAINER_MAGIC) + NONCE_BYTES:HEADER_BYTES]
+
+        cipher = self._cipher(key, nonce, shape, data.dtype)
+        cipher.decrypt(memoryview(body), output=memoryview(result.view(np.uint8).reshape(-1)))
+        try:
+            cipher.verify(tag)
+        except ValueError:
+            raise ValueError("aes_gcm authentication failed: wrong key or modified ciphertext") from None
+        return result
+
+    def cipher_payload(self, cipher: np.ndarray) -> np.ndarray:
+        # The encrypted rows, without the header rows
+        return cipher[:self.plain_shape(cipher.shape, cipher.dtype)[0]]
+
+    def prepare(self, key: str, shape: Sequence[int]) -> EncryptionPlan:
+        # Every image gets its own nonce, so there is no per-(key, shape) schedule to reuse
+        raise NotImplementedError("aes_gcm draws a nonce per image and has no reusable plan")
+
+    def get_encryption_info(self, key: str) -> Dict[str, Any]:
+        info = super().get_encryption_info(key)
+        info.update({
+            'mode': 'GCM',
+            'nonce': f'random, {NONCE_BYTES} bytes per image',
+            'tag_bytes': TAG_BYTES,
+            'header_bytes': HEADER_BYTES,
+        })
+        return info
@@ -7,7 +7,6 @@ This file is a self-contained library module with no executable demo.
 import numpy as np
 import math
 import secrets
-import hashlib
 from typing import Tuple
 
 
@@ -35,7 +34,7 @@ def _chaos_sequence(x0: float, length: int) -> np.ndarray:
 # -------------------------------------------------
 # 2. Main cipher class
 # -------------------------------------------------
-from .encryptor_interface import EncryptorInterface
+from .encryptor_interface import EncryptorInterface, key_digest
 
 class BulbanEncryptor(EncryptorInterface):
     """
@@ -60,9 +59,9 @@ class BulbanEncryptor(EncryptorInterface):
         """Encrypt a grayscale image."""
         self.validate_image(image)
         self.validate_encryption_params(key)
+        self._require_gray(image.shape)
         padded, h0, w0 = self._pad_image(image)
-        X, DMr, DNr = self._derive_params(key, *padded.shape)
-        cipher = self._encrypt_round(padded, X, DMr, DNr)
+        cipher = self._encrypt_round(padded, self._round_schedule(key, *padded.shape))
         return cipher[:h0, :w0]
 
     def decrypt_image(self,
@@ -71,28 +70,48 @@ class BulbanEncryptor(EncryptorInterface):
         """Decrypt a grayscale image."""
         self.validate_image(cipher)
         self.validate_encryption_params(key)
+        self._require_gray(cipher.shape)
         padded, h0, w0 = self._pad_image(cipher)
-        X, DMr, DNr = self._derive_params(key, *padded.shape)
-        plain = self._decrypt_round(padded, X, DMr, DNr)
+        plain = self._decrypt_round(padded, self._round_schedule(key, *padded.shape))
         return plain[:h0, :w0]
 
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple:
+        """Round schedule for the padded size of one grayscale image shape."""
+        self._require_gray(shape)
+        return self._round_schedule(key, math.ceil(shape[0] / 4) * 4, math.ceil(shape[1] / 4) * 4)
+
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Encrypt N same-shaped grayscale images at once."""
+        padded, h0, w0 = self._pad_image(stack)
+        return self._encrypt_round(padded, schedule)[:, :h0, :w0]
+
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Decrypt N same-shaped grayscale images at once."""
+        padded, h0, w0 = self._pad_image(stack)
+        return self._decrypt_round(padded, schedule)[:, :h0, :w0]
+
     # -------------------------------------------------
     # Internal helpers
     # -------------------------------------------------
+    @staticmethod
+    def _require_gray(shape: Tuple[int, ...]) -> None:
+        if len(shape) != 2:
+            raise ValueError(f"Bulban cipher supports grayscale (2D) images only, got shape {shape}")
+
     @staticmethod
     def _pad_image(img: np.ndarray) -> Tuple[np.ndarray, int, int]:
-        """Zero-pad dimensions to multiples of 4."""
-        h, w = img.shape
+        """Zero-pad the last two dimensions to multiples of 4."""
+        h, w = img.shape[-2:]
         new_h = math.ceil(h / 4) * 4
         new_w = math.ceil(w / 4) * 4
-        padded = np.zeros((new_h, new_w), dtype=img.dtype)
-        padded[:h, :w] = img
+        padded = np.zeros(img.shape[:-2] + (new_h, new_w), dtype=img.dtype)
+        padded[..., :h, :w] = img
         return padded, h, w
 
     def _derive_params(self, key: str, M: int, N: int):
         """Derive deterministic key material from key."""
         # 改为稳定的哈希种子，避免跨平台差异
-        seed_bytes = hashlib.sha256(key.encode()).digest()[:8]
+        seed_bytes = key_digest(key)[:8]
         seed_int = int.from_bytes(seed_bytes, 'big')
         rng = np.random.default_rng(seed_int)
 
@@ -103,83 +122,77 @@ class BulbanEncryptor(EncryptorInterface):
         DNr = int((X[3:6].mean() * 1e5) % max(N // 4, 1))
         return X, DMr, DNr
 
+    def _round_schedule(self, key: str, M: int, N: int) -> Tuple:
+        """Shift amounts, diffusion masks and bounds for an M x N (padded) image."""
+        X, DMr, DNr = self._derive_params(key, M, N)
+        PR = (_chaos_sequence(X[0], M) * 1e5).astype(np.int64) % N
+        PC = (_chaos_sequence(X[1], N) * 1e5).astype(np.int64) % M
+        DRp = (_chaos_sequence(X[2], N) * 255).astype(np.uint8)
+        DRn = (_chaos_sequence(X[3], N) * 255).astype(np.uint8)
+        DCp = (_chaos_sequence(X[4], M) * 255).astype(np.uint8)
+        DCn = (_chaos_sequence(X[5], M) * 255).astype(np.uint8)
+        return DMr, DNr, PR, PC, DRp, DRn, DCp, DCn
+
     # -------------------------------------------------
     # Core encryption / decryption
+    # (on the last two axes, so a stack of images goes through in one pass)
     # -------------------------------------------------
-    def _encrypt_round(self, img: np.ndarray, X: np.ndarray, DMr: int, DNr: int) -> np.ndarray:
+    def _encrypt_round(self, img: np.ndarray, schedule: Tuple) -> np.ndarray:
         """Single encryption round: shuffle + diffuse."""
-        M, N = img.shape
+        M, N = img.shape[-2:]
+        DMr, DNr, PR, PC, DRp, DRn, DCp, DCn = schedule
         img = img.astype(np.int16)
 
         # Row shifts
-        PR = _chaos_sequence(X[0], M)
-        PR = (PR * 1e5).astype(np.int64) % N
         for i in range(M):
-            img[i] = np.roll(img[i], PR[i])
+            img[..., i, :] = np.roll(img[..., i, :], PR[i], axis=-1)
 
         # Column shifts
-        PC = _chaos_sequence(X[1], N)
-        PC = (PC * 1e5).astype(np.int64) % M
         for j in range(N):
-            img[:, j] = np.roll(img[:, j], PC[j])
-
-        # Diffusion masks
-        DRp = (_chaos_sequence(X[2], N) * 255).astype(np.uint8)
-        DRn = (_chaos_sequence(X[3], N) * 255).astype(np.uint8)
-        DCp = (_chaos_sequence(X[4], M) * 255).astype(np.uint8)
-        DCn = (_chaos_sequence(X[5], M) * 255).astype(np.uint8)
+            img[..., :, j] = np.roll(img[..., :, j], PC[j], axis=-1)
 
         # Forward diffusion
         up = min(M // 2 + DMr + 1, M)
         for i in range(1, up):
-            img[i] = (img[i] + (img[i - 1] ^ DRp)) % 256
+            img[..., i, :] = (img[..., i, :] + (img[..., i - 1, :] ^ DRp)) % 256
         low = max(M // 2 - DMr, 0)
         for i in range(M - 2, low - 1, -1):
-            img[i] = (img[i] + (img[i + 1] ^ DRn)) % 256
+            img[..., i, :] = (img[..., i, :] + (img[..., i + 1, :] ^ DRn)) % 256
 
         left = min(N // 2 + DNr + 1, N)
         for j in range(1, left):
-            img[:, j] = (img[:, j] + (img[:, j - 1] ^ DCp)) % 256
+            img[..., :, j] = (img[..., :, j] + (img[..., :, j - 1] ^ DCp)) % 256
         right = max(N // 2 - DNr, 0)
         for j in range(N - 2, right - 1, -1):
-            img[:, j] = (img[:, j] + (img[:, j + 1] ^ DCn)) % 256
+            img[..., :, j] = (img[..., :, j] + (img[..., :, j + 1] ^ DCn)) % 256
 
         return img.astype(np.uint8)
 
-    def _decrypt_round(self, cipher: np.ndarray, X: np.ndarray, DMr: int, DNr: int) -> np.ndarray:
+    def _decrypt_round(self, cipher: np.ndarray, schedule: Tuple) -> np.ndarray:
         """Inverse of _encrypt_round."""
-        M, N = cipher.shape
+        M, N = cipher.shape[-2:]
+        DMr, DNr, PR, PC, DRp, DRn, DCp, DCn = schedule
         img = cipher.astype(np.int16)
 
-        DCp = (_chaos_sequence(X[4], M) * 255).astype(np.uint8)
-        DCn = (_chaos_sequence(X[5], M) * 255).astype(np.uint8)
-
         right = max(N // 2 - DNr, 0)
         for j in range(right, N - 1):
-            img[:, j] = (img[:, j] - (img[:, j + 1] ^ DCn)) % 256
+            img[..., :, j] = (img[..., :, j] - (img[..., :, j + 1] ^ DCn)) % 256
         left = min(N // 2 + DNr + 1, N)
         for j in range(left - 1, 0, -1):
-            img[:, j] = (img[:, j] - (img[:, j - 1] ^ DCp)) % 256
-
-        DRp = (_chaos_sequence(X[2], N) * 255).astype(np.uint8)
-        DRn = (_chaos_sequence(X[3], N) * 255).astype(np.uint8)
+            img[..., :, j] = (img[..., :, j] - (img[..., :, j - 1] ^ DCp)) % 256
 
         low = max(M // 2 - DMr, 0)
         for i in range(low, M - 1):
-            img[i] = (img[i] - (img[i + 1] ^ DRn)) % 256
+            img[..., i, :] = (img[..., i, :] - (img[..., i + 1, :] ^ DRn)) % 256
         up = min(M // 2 + DMr + 1, M)
         for i in range(up - 1, 0, -1):
-            img[i] = (img[i] - (img[i - 1] ^ DRp)) % 256
+            img[..., i, :] = (img[..., i, :] - (img[..., i - 1, :] ^ DRp)) % 256
 
         # Reverse shifts
-        PC = _chaos_sequence(X[1], N)
-        PC = (PC * 1e5).astype(np.int64) % M
         for j in range(N):
-            img[:, j] = np.roll(img[:, j], -PC[j])
+            img[..., :, j] = np.roll(img[..., :, j], -PC[j], axis=-1)
 
-        PR = _chaos_sequence(X[0], M)
-        PR = (PR * 1e5).astype(np.int64) % N
         for i in range(M):
-            img[i] = np.roll(img[i], -PR[i])
+            img[..., i, :] = np.roll(img[..., i, :], -PR[i], axis=-1)
 
         return img.astype(np.uint8)
@@ -0,0 +1,123 @@
+"""
+Small thread-safe caches shared by long-lived encryptor instances.
+
+The registry (see ``registry.py``) attaches one ``LRUCache`` to every
+encryptor it hands out; encryptors use it to keep key/shape dependent
+material (keystreams, masks, permutations) warm between requests.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+
+def _nbytes(value: Any) -> int:
+    """Approximate memory footprint of a cached value (ndarrays and containers of them)."""
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return 0
+
+
+def _freeze(value: Any) -> Any:
+    """Mark cached arrays read-only so a shared entry cannot be mutated in place."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            _freeze(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    return value
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with an optional byte budget.
+
+    Args:
+        maxsize: Maximum number of entries kept
+        max_bytes: Optional cap on the total size of cached ndarrays
+    """
+
+    def __init__(self, maxsize: int = 8, max_bytes: Optional[int] = None):
+        self.maxsize = int(maxsize)
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        size = _nbytes(value)
+        if self.maxsize <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return value
+        _freeze(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key)
+                del self._data[key]
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+        return value
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for ``key``, building it with ``factory`` on a miss.
+
+        The factory runs outside the lock so slow builds for different keys
+        do not serialise; two threads missing on the same key may both build it.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        return self.put(key, factory())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > self.maxsize
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, _ = self._data.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
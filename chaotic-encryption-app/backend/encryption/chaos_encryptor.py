@@ -1,9 +1,7 @@
 import numpy as np
-import cv2
-import hashlib
 from typing import Tuple
 
-from .encryptor_interface import EncryptorInterface
+from .encryptor_interface import EncryptorInterface, key_digest
 
 class ChaosEncryptor(EncryptorInterface):
     """
@@ -36,8 +34,7 @@ class ChaosEncryptor(EncryptorInterface):
             Tuple of (r, x0) parameters for chaotic map
         """
         # Use SHA-256 hash of the key string
-        hash_obj = hashlib.sha256(key_string.encode())
-        hash_hex = hash_obj.hexdigest()
+        hash_hex = key_digest(key_string).hex()
         
         # Convert hash to numerical values
         r = 3.5 + (int(hash_hex[:8], 16) % 1000) / 10000.0  # r in [3.5, 4.0]
@@ -143,22 +140,33 @@ class ChaosEncryptor(EncryptorInterface):
         Returns:
             XORed image
         """
-        r, x0 = self._generate_key_from_string(key)
+        chaotic_seq = self._cached('xor_sequence', (self._key_token(key), image.shape),
+                                   lambda: self._xor_sequence(image.shape, key))
         
-        # Generate chaotic sequence for XOR
-        total_pixels = image.shape[0] * image.shape[1] * image.shape[2]
-        chaotic_seq = self._logistic_map(r, x0 + 0.2, total_pixels)
+        # XOR operation
+        result = np.bitwise_xor(image, chaotic_seq)
         
-        # Scale chaotic sequence to [0, 255]
-        chaotic_seq = (chaotic_seq * 255).astype(np.uint8)
+        return result
+    
+    def _xor_sequence(self, shape: Tuple[int, ...], key: str) -> np.ndarray:
+        """
+        Build the chaotic XOR mask for an image of the given shape
         
-        # Reshape sequence to match image dimensions
-        chaotic_seq = chaotic_seq.reshape(image.shape)
+        Args:
+            shape: Image shape
+            key: Encryption key
+            
+        Returns:
+            uint8 mask with the same shape as the image
+        """
+        r, x0 = self._generate_key_from_string(key)
         
-        # XOR operation
-        result = cv2.bitwise_xor(image, chaotic_seq)
+        # Generate chaotic sequence for XOR
+        total_pixels = int(np.prod(shape))
+        chaotic_seq = self._logistic_map(r, x0 + 0.2, total_pixels)
         
-        return result
+        # Scale chaotic sequence to [0, 255] and reshape to match image dimensions
+        return (chaotic_seq * 255).astype(np.uint8).reshape(shape)
     
     def encrypt_image(self, image: np.ndarray, key: str) -> np.ndarray:
         """
@@ -218,6 +226,25 @@ class ChaosEncryptor(EncryptorInterface):
         
         return decrypted_image
     
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple:
+        """Permutations (and their inverses) plus the XOR mask for one image shape."""
+        row_perm, col_perm = self._generate_permutation_matrix(shape[0], shape[1], key)
+        mask = self._cached('xor_sequence', (self._key_token(key), shape),
+                            lambda: self._xor_sequence(shape, key))
+        return row_perm, col_perm, np.argsort(row_perm), np.argsort(col_perm), mask
+    
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Encrypt N same-shaped images at once: one permutation and XOR mask for all."""
+        row_perm, col_perm, _, _, mask = schedule
+        permuted = np.take(np.take(stack, row_perm, axis=1), col_perm, axis=2)
+        return np.bitwise_xor(permuted, mask)
+    
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Decrypt N same-shaped images at once (inverse of _encrypt_planned)."""
+        _, _, row_inv, col_inv, mask = schedule
+        xored = np.bitwise_xor(stack, mask)
+        return np.take(np.take(xored, row_inv, axis=1), col_inv, axis=2)
+    
     def get_encryption_info(self, key: str) -> dict:
         """
         Get information about the encryption parameters
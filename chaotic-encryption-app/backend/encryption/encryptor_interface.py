@@ -1,7 +1,111 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable, Hashable, List, Sequence, Tuple, Union
 import numpy as np
 
+from .cache import _freeze
+
+
+# Default band size of encrypt_stream/decrypt_stream, in bytes of source rows
+STREAM_BAND_BYTES = 1 << 22
+
+
+class PerturbedKey(str):
+    """
+    A key whose derived SHA-256 material has one bit flipped.
+
+    Compares and prints like the original key string; only ``key_digest``
+    (and so every encryptor's key schedule) sees the flipped bit. Used by the
+    key-sensitivity analysis to probe the key schedule bit by bit.
+    """
+
+    def __new__(cls, key: str, bit: int):
+        if not 0 <= bit < 256:
+            raise ValueError("bit must be in [0, 256)")
+        obj = super().__new__(cls, key)
+        obj.bit = bit
+        return obj
+
+    def __reduce__(self):
+        return (PerturbedKey, (str(self), self.bit))
+
+    def __repr__(self) -> str:
+        return f"PerturbedKey(<key>, bit={self.bit})"
+
+
+def key_digest(key: str, context: str = '') -> bytes:
+    """
+    SHA-256 of ``key + context``: the material every encryptor derives its
+    parameters from. For a PerturbedKey, bit ``key.bit`` (0 = most significant
+    bit of the first byte) of the digest is flipped.
+    """
+    digest = hashlib.sha256((key + context).encode()).digest()
+    if isinstance(key, PerturbedKey):
+        flipped = bytearray(digest)
+        flipped[key.bit // 8] ^= 0x80 >> (key.bit % 8)
+        digest = bytes(flipped)
+    return digest
+
+
+@dataclass(frozen=True, eq=False)
+class EncryptionPlan:
+    """
+    An encryptor's key schedule for one (key, image shape), derived once.
+
+    Built by ``EncryptorInterface.prepare``. ``encrypt``/``decrypt`` run only
+    the data-dependent stages, so a caller with a stable key and frame size
+    pays for the chaotic sequences, permutations and keystreams once. Plans
+    are immutable (schedule arrays are read-only) and picklable; note that a
+    plan is key material and must be protected like the key itself.
+    """
+
+    encryptor: "EncryptorInterface"
+    shape: Tuple[int, ...]
+    schedule: Tuple[Any, ...]
+
+    def __post_init__(self):
+        _freeze(self.schedule)
+
+    def __reduce__(self):
+        # Rebuild through __init__ so the unpickled schedule is read-only again
+        return (EncryptionPlan, (self.encryptor, self.shape, self.schedule))
+
+    @property
+    def algorithm(self) -> str:
+        return self.encryptor.get_algorithm_name()
+
+    def encrypt(self, image: np.ndarray) -> np.ndarray:
+        """
+        Encrypt one image of the plan's shape, or a stack of them along axis 0.
+
+        Returns:
+            Same result as encrypt_image / encrypt_batch with the plan's key
+
+        Raises:
+            ValueError: If the image does not have the plan's shape
+        """
+        return self._run(image, self.encryptor._encrypt_planned)
+
+    def decrypt(self, image: np.ndarray) -> np.ndarray:
+        """Decrypt one image of the plan's shape, or a stack of them (see encrypt)."""
+        return self._run(image, self.encryptor._decrypt_planned)
+
+    def _run(self, image: np.ndarray, process: Callable[[np.ndarray, Tuple[Any, ...]], np.ndarray]) -> np.ndarray:
+        if image is None:
+            raise ValueError("Input image cannot be None")
+        if image.shape == self.shape:
+            return process(image[np.newaxis], self.schedule)[0]
+        if image.shape[1:] == self.shape:
+            return process(image, self.schedule) if len(image) else image.copy()
+        if self.shape[2:] == (1,) and image.shape[-2:] == self.shape[:2]:
+            # Some encryptors return (H, W, 1) images as (H, W); accept those back
+            return self._run(image[..., np.newaxis], process)
+        raise ValueError(f"Image shape {image.shape} does not match the plan's shape {self.shape}")
+
+    def __repr__(self) -> str:
+        return f"EncryptionPlan(algorithm={self.algorithm!r}, shape={self.shape})"
+
 
 class EncryptorInterface(ABC):
     """
@@ -13,6 +117,12 @@ class EncryptorInterface(ABC):
     - Consistent error handling and validation
     - Metadata extraction capabilities
     """
+
+    # Optional warm cache (see encryption.cache.LRUCache), attached by the registry
+    warm_cache = None
+    # False if every encryption draws fresh randomness (e.g. a nonce), so equal
+    # inputs and keys give unrelated ciphertexts
+    deterministic = True
     
     @abstractmethod
     def encrypt_image(self, image: np.ndarray, key: str) -> np.ndarray:
@@ -50,6 +160,168 @@ class EncryptorInterface(ABC):
         """
         pass
     
+    def encrypt_batch(self, images: Union[Sequence[np.ndarray], np.ndarray],
+                      key: str) -> Union[List[np.ndarray], np.ndarray]:
+        """
+        Encrypt several images (e.g. video frames or a dataset) with one key.
+
+        Images are grouped by shape and dtype; each group is encrypted as one
+        stacked array, so the key schedule is derived once per group.
+
+        Args:
+            images: Sequence of images (shapes may differ), or one stacked array
+                of same-shaped images, (N, H, W) or (N, H, W, C)
+            key: Encryption key string (required)
+
+        Returns:
+            Ciphertexts in input order, each equal to encrypt_image(image, key);
+            a stacked array for stacked input, else a list
+
+        Raises:
+            ValueError: If any image is invalid or key is empty
+        """
+        return self._run_batch(images, key, self._encrypt_stack)
+
+    def decrypt_batch(self, images: Union[Sequence[np.ndarray], np.ndarray],
+                      key: str) -> Union[List[np.ndarray], np.ndarray]:
+        """
+        Decrypt several images with one key; the inverse of encrypt_batch.
+
+        Args:
+            images: Sequence of encrypted images, or one stacked array
+            key: Decryption key string (must match encryption key)
+
+        Returns:
+            Plain images in input order, each equal to decrypt_image(image, key)
+
+        Raises:
+            ValueError: If any image is invalid or key is empty
+        """
+        return self._run_batch(images, key, self._decrypt_stack)
+
+    def prepare(self, key: str, shape: Sequence[int]) -> EncryptionPlan:
+        """
+        Derive the key schedule for images of one shape, for repeated use.
+
+        Args:
+            key: Encryption key string (required)
+            shape: Image shape, (H, W) or (H, W, C)
+
+        Returns:
+            EncryptionPlan whose encrypt/decrypt match encrypt_image/decrypt_image
+            with this key for images of this shape
+
+        Raises:
+            ValueError: If key is empty or shape is not a valid image shape
+        """
+        self.validate_encryption_params(key)
+        shape = tuple(int(n) for n in shape)
+        self.validate_image(np.broadcast_to(np.uint8(0), shape))
+        return EncryptionPlan(self, shape, self._key_schedule(key, shape))
+
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple[Any, ...]:
+        """
+        Everything encryption derives from (key, image shape), as a tuple.
+
+        Encryptors override this together with _encrypt_planned/_decrypt_planned.
+        The default schedule is just the key, so planned calls fall back to
+        encrypt_image/decrypt_image.
+        """
+        return (key,)
+
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple[Any, ...]) -> np.ndarray:
+        """Encrypt N same-shaped images stacked along axis 0 with a precomputed schedule."""
+        key, = schedule
+        return np.stack([self.encrypt_image(image, key) for image in stack])
+
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple[Any, ...]) -> np.ndarray:
+        """Decrypt N same-shaped images stacked along axis 0 (see _encrypt_planned)."""
+        key, = schedule
+        return np.stack([self.decrypt_image(image, key) for image in stack])
+
+    def _encrypt_stack(self, stack: np.ndarray, key: str) -> np.ndarray:
+        """Encrypt N same-shaped images stacked along axis 0: one key schedule for all."""
+        return self._encrypt_planned(stack, self._key_schedule(key, stack.shape[1:]))
+
+    def _decrypt_stack(self, stack: np.ndarray, key: str) -> np.ndarray:
+        """Decrypt N same-shaped images stacked along axis 0 (see _encrypt_stack)."""
+        return self._decrypt_planned(stack, self._key_schedule(key, stack.shape[1:]))
+
+    def _run_batch(self, images, key: str, process_stack: Callable[[np.ndarray, str], np.ndarray]):
+        self.validate_encryption_params(key)
+        if isinstance(images, np.ndarray):
+            if images.ndim not in (3, 4):
+                raise ValueError(f"Stacked images must be 3D (N, H, W) or 4D (N, H, W, C), got {images.ndim}D")
+            if len(images) == 0:
+                return images.copy()
+            self.validate_image(images[0])
+            return process_stack(images, key)
+
+        images = list(images)
+        groups: Dict[Tuple[Hashable, ...], List[int]] = {}
+        for i, image in enumerate(images):
+            self.validate_image(image)
+            groups.setdefault((image.shape, image.dtype.str), []).append(i)
+        results: List[Optional[np.ndarray]] = [None] * len(images)
+        for indices in groups.values():
+            out = process_stack(np.stack([images[i] for i in indices]), key)
+            for i, result in zip(indices, out):
+                results[i] = result
+        return results
+    
+    def supports_streaming(self) -> bool:
+        """
+        Whether encrypt_stream/decrypt_stream are available: the cipher can run
+        over row bands carrying only a small state between them.
+        """
+        return False
+
+    def encrypt_stream(self, src: np.ndarray, dst: np.ndarray, key: str,
+                       band_rows: Optional[int] = None) -> None:
+        """
+        Encrypt an image band of rows at a time, for images too large for memory.
+
+        Args:
+            src: Source image, (H, W) or (H, W, C); typically a read-only np.memmap
+            dst: Destination of the same shape (a writable np.memmap); must not overlap src
+            key: Encryption key string (required)
+            band_rows: Rows per band (default: about STREAM_BAND_BYTES of src)
+
+        The result equals encrypt_image(src, key); peak memory depends on the
+        band size and the image width, not on its height.
+
+        Raises:
+            ValueError: If the image, destination or key is invalid
+            NotImplementedError: If the algorithm cannot stream (see supports_streaming)
+        """
+        self._encrypt_bands(src, dst, key, self._check_stream(src, dst, key, band_rows))
+
+    def decrypt_stream(self, src: np.ndarray, dst: np.ndarray, key: str,
+                       band_rows: Optional[int] = None) -> None:
+        """Decrypt an image band of rows at a time; the inverse of encrypt_stream."""
+        self._decrypt_bands(src, dst, key, self._check_stream(src, dst, key, band_rows))
+
+    def _encrypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        raise NotImplementedError(f"{self.get_algorithm_name()} does not support streaming")
+
+    def _decrypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        raise NotImplementedError(f"{self.get_algorithm_name()} does not support streaming")
+
+    def _check_stream(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: Optional[int]) -> int:
+        if not self.supports_streaming():
+            raise NotImplementedError(f"{self.get_algorithm_name()} does not support streaming")
+        self.validate_image(src)
+        self.validate_encryption_params(key)
+        if dst.shape != src.shape:
+            raise ValueError(f"Destination shape {dst.shape} does not match source shape {src.shape}")
+        if np.may_share_memory(src, dst):
+            raise ValueError("Destination must not overlap the source")
+        if band_rows is None:
+            return max(1, STREAM_BAND_BYTES // src[0].nbytes)
+        if band_rows < 1:
+            raise ValueError("band_rows must be positive")
+        return int(band_rows)
+
     @abstractmethod
     def get_algorithm_name(self) -> str:
         """
@@ -77,6 +349,14 @@ class EncryptorInterface(ABC):
         
         return info
     
+    def cipher_payload(self, cipher: np.ndarray) -> np.ndarray:
+        """
+        The part of a ciphertext that corresponds pixel for pixel to the plain
+        image, for metrics and histograms. Ciphers that return a container with
+        extra header rows (aes_gcm) strip them; the default is the cipher itself.
+        """
+        return cipher
+
     def validate_encryption_params(self, key: str) -> None:
         """
         Validate encryption parameters before processing.
@@ -122,8 +402,35 @@ class EncryptorInterface(ABC):
         Returns:
             Hexadecimal hash string (first 16 characters)
         """
-        import hashlib
-        return hashlib.sha256(key.encode()).hexdigest()[:16]
+        return key_digest(key).hex()[:16]
+
+    def _cached(self, name: str, token: Tuple[Hashable, ...], builder: Callable[[], Any]) -> Any:
+        """
+        Return key/shape dependent material from the warm cache, building it on a miss.
+
+        Args:
+            name: Name of the cached stage (e.g. 'keystreams')
+            token: Hashable description of everything the stage depends on
+            builder: Zero-argument callable producing the value
+
+        Returns:
+            The cached (read-only) value, or a freshly built one when no cache is attached
+        """
+        cache = self.warm_cache
+        if cache is None:
+            return builder()
+        return cache.get_or_create((self.get_algorithm_name(), name) + tuple(token), builder)
+
+    def __getstate__(self):
+        # The warm cache belongs to this process (and holds a lock); copies start without one
+        state = self.__dict__.copy()
+        state.pop('warm_cache', None)
+        return state
+
+    @staticmethod
+    def _key_token(key: str) -> bytes:
+        """Digest used to identify a key inside cache tokens without storing it."""
+        return key_digest(key)
     
     def __str__(self) -> str:
         """String representation of the encryptor."""
@@ -1,10 +1,9 @@
-import hashlib
 from dataclasses import dataclass
+from functools import lru_cache
 from math import tanh as _tanh, gamma
 from typing import Tuple, Dict, Any, Optional
 
 import numpy as np
-import cv2
 
 
 # ---------------------------
@@ -43,6 +42,27 @@ def _unflatten_per_channel(flat: np.ndarray, H: int, W: int, C: int) -> np.ndarr
     arr = np.moveaxis(arr, 0, -1)
     return arr.astype(np.uint8)
 
+def _flatten_stack(stack: np.ndarray) -> Tuple[np.ndarray, int, int, int]:
+    """Return (flat, H, W, C) for N stacked images, where flat shape = (N*C, H*W)."""
+    N, H, W = stack.shape[:3]
+    C = 1 if stack.ndim == 3 else stack.shape[3]
+    flat = np.moveaxis(stack.reshape(N, H, W, C), -1, 1).reshape(N * C, H * W)
+    return flat, H, W, C
+
+def _unflatten_stack(flat: np.ndarray, N: int, H: int, W: int, C: int) -> np.ndarray:
+    arr = np.moveaxis(flat.reshape(N, C, H, W), 1, -1)
+    if C == 1:
+        return arr.reshape(N, H, W).astype(np.uint8)
+    return arr.astype(np.uint8)
+
+# Stacks are transformed a few images at a time, about this many values per
+# chunk, so the diffusion temporaries stay cache-sized
+STACK_CHUNK_VALUES = 1 << 18
+
+def _stack_chunks(stack: np.ndarray):
+    step = max(1, STACK_CHUNK_VALUES // stack[0].size)
+    return [stack[i:i + step] for i in range(0, len(stack), step)]
+
 
 # ---------------------------
 # FODHNN core (fractional-order discrete Hopfield)
@@ -57,6 +77,29 @@ class FODHNNKey:
     y0: float
     z0: float
 
+# Kernel tables kept per (nu, memory_window); nu is derived from the key
+KERNEL_CACHE_SIZE = 32
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def fractional_kernel(nu: float, memory_window: int) -> np.ndarray:
+    """
+    Overflow-free fractional-sum kernel: w[0]=1; w[m] = w[m-1] * (nu + m - 1) / m.
+
+    Memoized in a small LRU; the returned array is shared and read-only.
+    The recurrence is evaluated in exactly this operation order on plain
+    floats: np.cumprod over the ratios rounds differently (~1 ulp), which the
+    chaotic iteration and keystream scaling turn into different ciphertexts.
+    """
+    W = int(memory_window)
+    w = [1.0] * W
+    prev = 1.0
+    for m in range(1, W):
+        prev = prev * (nu + m - 1.0) / m
+        w[m] = prev
+    table = np.array(w, dtype=np.float64)
+    table.flags.writeable = False
+    return table
+
 class FODHNN:
     """
     3-D fractional-order discrete Hopfield NN numerical solution (Caputo-like delta).
@@ -68,11 +111,7 @@ class FODHNN:
         self.W = int(memory_window)
 
         # Overflow-free kernel: w[0]=1; w[m] = w[m-1] * (nu + m - 1) / m
-        w = np.empty(self.W, dtype=np.float64)
-        w[0] = 1.0
-        for m in range(1, self.W):
-            w[m] = w[m - 1] * (key.nu + m - 1.0) / m
-        self.w = w
+        self.w = fractional_kernel(key.nu, self.W)
 
     def iterate(self, n_steps: int, burn_in: int = 1024) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         steps = burn_in + n_steps
@@ -114,7 +153,7 @@ class FODHNN:
 # Keystream + image cipher (per-image nonce, invertible)
 # ---------------------------
 
-from .encryptor_interface import EncryptorInterface
+from .encryptor_interface import EncryptorInterface, key_digest
 
 class FODHNNEncryptor(EncryptorInterface):
     """
@@ -141,7 +180,7 @@ class FODHNNEncryptor(EncryptorInterface):
         Derive (nu, p, x0, y0, z0) from SHA-256(key).
         Keep x0,y0,z0 strictly inside (0,1) and nu in (0.6, 0.95].
         """
-        h = hashlib.sha256(key.encode()).hexdigest()
+        h = key_digest(key).hex()
         u = [_u32(int(h[i:i+8], 16)) for i in range(0, 64, 8)]
 
         nu = _map_to_interval(u[0], 0.70, 0.95)  # fractional order
@@ -153,6 +192,11 @@ class FODHNNEncryptor(EncryptorInterface):
 
     def _keystreams_xyz(self, H: int, W: int, key: str,
                          burn_in: int = 1024) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._cached('keystreams', (self._key_token(key), H, W, burn_in),
+                            lambda: self._build_keystreams_xyz(H, W, key, burn_in))
+
+    def _build_keystreams_xyz(self, H: int, W: int, key: str,
+                              burn_in: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         L = H * W
         k = self._derive_key(key)
         fod = FODHNN(k, memory_window=self.memory_window)
@@ -204,19 +248,19 @@ class FODHNNEncryptor(EncryptorInterface):
         C, L = flat.shape
         ks = z.astype(np.uint16, copy=False)
         arr = flat.astype(np.uint16) + ks[None, :]
-        out = np.add.accumulate(arr, axis=1) & 0xFF
+        # cumsum with an explicit dtype runs several times faster than add.accumulate on uint16
+        out = np.cumsum(arr, axis=1, dtype=np.uint16) & 0xFF
         return out.astype(np.uint8)
 
     @staticmethod
     def _diffuse_backward(flat_c: np.ndarray, z: np.ndarray) -> np.ndarray:
-        C, L = flat_c.shape
-        out = np.empty_like(flat_c, dtype=np.uint8)
-        ks = z.astype(np.uint8, copy=False)
-        for c in range(C):
-            out[c, L-1] = (int(flat_c[c, L-1]) - int(ks[L-1])) & 0xFF
-            for i in range(L-2, -1, -1):
-                out[c, i] = (int(flat_c[c, i]) - int(flat_c[c, i+1]) - int(ks[i])) & 0xFF
-        return out
+        # out[i] = (c[i] - c[i+1] - ks[i]) mod 256, out[L-1] = (c[L-1] - ks[L-1]) mod 256
+        ks = z.astype(np.int16, copy=False)
+        c16 = flat_c.astype(np.int16)
+        out = np.empty_like(c16)
+        out[:, -1] = c16[:, -1] - ks[-1]
+        out[:, :-1] = c16[:, :-1] - c16[:, 1:] - ks[:-1]
+        return (out & 0xFF).astype(np.uint8)
 
     # --- public API ---
 
@@ -254,16 +298,12 @@ class FODHNNEncryptor(EncryptorInterface):
 
     @staticmethod
     def _undiffuse_backward(d: np.ndarray, z: np.ndarray) -> np.ndarray:
-        C, L = d.shape
-        out = np.empty_like(d, dtype=np.uint8)
-        ks = z.astype(np.uint8, copy=False)
-        for c in range(C):
-            # Recover the last element first
-            out[c, L-1] = (int(d[c, L-1]) + int(ks[L-1])) & 0xFF
-            # Then walk backward, using the ALREADY recovered out[c, i+1]
-            for i in range(L-2, -1, -1):
-                out[c, i] = (int(d[c, i]) + int(out[c, i+1]) + int(ks[i])) & 0xFF
-        return out
+        # inverse of _diffuse_backward: out[i] = sum_{j>=i} (d[j] + ks[j]) mod 256,
+        # i.e. a running sum from the end (uint16 wrap-around keeps it exact mod 256)
+        ks = z.astype(np.uint16, copy=False)
+        arr = d[:, ::-1].astype(np.uint16) + ks[::-1][None, :]
+        out = np.cumsum(arr, axis=1, dtype=np.uint16) & 0xFF
+        return out[:, ::-1].astype(np.uint8)
 
 
     @staticmethod
@@ -296,3 +336,40 @@ class FODHNNEncryptor(EncryptorInterface):
         P0 = self._invert_permutation(P, row_perm, col_perm)
         return P0
 
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple:
+        """Diffusion keystream and row/col permutations (with inverses) for one image shape."""
+        H, W = shape[:2]
+        X, Y, Z = self._keystreams_xyz(H, W, key, burn_in=self.burn_in)
+        row_perm, col_perm = self._row_col_permutation(H, W, X, Y)
+        return Z, row_perm, col_perm, np.argsort(row_perm), np.argsort(col_perm)
+
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """
+        Encrypt N same-shaped images at once: one keystream and permutation for
+        all, diffusion over the N*C channel rows of several images per call.
+        """
+        Z, row_perm, col_perm, _, _ = schedule
+        imgs = _as_uint8(stack)
+
+        parts = []
+        for chunk in _stack_chunks(imgs):
+            P = np.take(np.take(chunk, row_perm, axis=1), col_perm, axis=2)
+            flat, H, W, C = _flatten_stack(P)
+            flat_c = self._diffuse_forward(flat, Z)
+            flat_c = self._diffuse_backward(flat_c, Z[::-1])
+            parts.append(_unflatten_stack(flat_c, len(chunk), H, W, C))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Decrypt N same-shaped images at once (inverse of _encrypt_planned)."""
+        Z, _, _, row_inv, col_inv = schedule
+        Cimgs = _as_uint8(stack)
+
+        parts = []
+        for chunk in _stack_chunks(Cimgs):
+            flat_c, H, W, C = _flatten_stack(chunk)
+            c = self._undiffuse_backward(flat_c, Z[::-1])
+            p = self._undiffuse_forward(c, Z)
+            P = _unflatten_stack(p, len(chunk), H, W, C)
+            parts.append(np.take(np.take(P, row_inv, axis=1), col_inv, axis=2))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
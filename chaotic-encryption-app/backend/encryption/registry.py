@@ -0,0 +1,182 @@
+"""
+Process-wide encryptor registry.
+
+Encryptors are keyed by ``get_algorithm_name()`` and constructed once per
+(algorithm, config) pair, so per-instance precomputation and the warm cache
+attached to each instance survive across requests. Instances are shared
+between threads; the built-in encryptors keep no per-call state on ``self``.
+
+Usage:
+    from encryption.registry import get_encryptor
+
+    enc = get_encryptor('fodhnn')                        # default config
+    enc = get_encryptor('fodhnn', memory_window=128)     # separate long-lived instance
+"""
+
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import LRUCache
+from .encryptor_interface import EncryptorInterface
+
+
+# algorithm name -> (module, class); imported on first use
+_BUILTIN_ENCRYPTORS = {
+    'chaos': ('.chaos_encryptor', 'ChaosEncryptor'),
+    'fodhnn': ('.fodhnn_encryptor', 'FODHNNEncryptor'),
+    '2dlasm': ('.twoD_LASM_encryptor', 'LASMEncryptor'),
+    'lasm_fb': ('.another_2d', 'LASMEncryptorFB'),
+    'acm_2dscl': ('.acm_2dscl', 'HybridEncryptorFB'),
+    'bulban': ('.bulban_encryptor', 'BulbanEncryptor'),
+    'aes': ('.aes_encryptor', 'AESEncryptor'),
+    'aes_gcm': ('.aes_gcm_encryptor', 'AESGCMEncryptor'),
+}
+
+# Default warm cache: a handful of (key, shape) schedules, capped at 256 MB
+DEFAULT_CACHE_ENTRIES = 8
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_factory() -> LRUCache:
+    return LRUCache(maxsize=DEFAULT_CACHE_ENTRIES, max_bytes=DEFAULT_CACHE_BYTES)
+
+
+def _lazy_factory(module: str, class_name: str) -> Callable[..., EncryptorInterface]:
+    def factory(**config: Any) -> EncryptorInterface:
+        cls = getattr(importlib.import_module(module, __package__), class_name)
+        return cls(**config)
+    return factory
+
+
+class EncryptorRegistry:
+    """
+    Thread-safe registry of long-lived encryptor instances.
+
+    Each registered algorithm has a factory (usually the encryptor class) and a
+    cache factory. The cache factory is "pluggable": pass ``None`` to run an
+    algorithm without a warm cache, or any object exposing ``get_or_create``,
+    ``clear`` and ``stats`` (see ``LRUCache``).
+    """
+
+    def __init__(self, cache_factory: Optional[Callable[[], Any]] = default_cache_factory):
+        self._default_cache_factory = cache_factory
+        self._factories: Dict[str, Callable[..., EncryptorInterface]] = {}
+        self._cache_factories: Dict[str, Optional[Callable[[], Any]]] = {}
+        self._instances: Dict[Tuple[str, Tuple], EncryptorInterface] = {}
+        self._lock = threading.RLock()
+
+    # --- registration ---
+
+    def register(self, name: str, factory: Callable[..., EncryptorInterface],
+                 cache_factory: Any = ...) -> None:
+        """
+        Register an encryptor factory under its algorithm name.
+
+        Args:
+            name: Algorithm name; must equal the instance's get_algorithm_name()
+            factory: Callable accepting the encryptor's keyword config
+            cache_factory: Warm cache factory, None to disable, omitted for the registry default
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._cache_factories[name] = (
+                self._default_cache_factory if cache_factory is ... else cache_factory
+            )
+            # Drop stale instances built by a previous factory
+            for inst_key in [k for k in self._instances if k[0] == name]:
+                del self._instances[inst_key]
+
+    def register_class(self, cls: type, cache_factory: Any = ...) -> str:
+        """Register an EncryptorInterface subclass keyed by its algorithm name."""
+        name = cls().get_algorithm_name()
+        self.register(name, cls, cache_factory=cache_factory)
+        return name
+
+    def set_cache_factory(self, name: str, cache_factory: Optional[Callable[[], Any]]) -> None:
+        """Swap the warm cache of an algorithm, including already-built instances."""
+        with self._lock:
+            self._require(name)
+            self._cache_factories[name] = cache_factory
+            for (inst_name, _), inst in self._instances.items():
+                if inst_name == name:
+                    inst.warm_cache = cache_factory() if cache_factory else None
+
+    # --- lookup ---
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._factories)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def get(self, name: str, **config: Any) -> EncryptorInterface:
+        """
+        Return the shared encryptor for ``name`` and ``config``, building it on first use.
+
+        Raises:
+            ValueError: If the algorithm is unknown or its factory reports another name
+        """
+        inst_key = (name, tuple(sorted(config.items())))
+        inst = self._instances.get(inst_key)
+        if inst is not None:
+            return inst
+        with self._lock:
+            inst = self._instances.get(inst_key)
+            if inst is None:
+                inst = self._require(name)(**config)
+                if inst.get_algorithm_name() != name:
+                    raise ValueError(
+                        f"Encryptor registered as '{name}' reports algorithm "
+                        f"'{inst.get_algorithm_name()}'"
+                    )
+                cache_factory = self._cache_factories.get(name)
+                inst.warm_cache = cache_factory() if cache_factory else None
+                self._instances[inst_key] = inst
+            return inst
+
+    def _require(self, name: str) -> Callable[..., EncryptorInterface]:
+        try:
+            return self._factories[name]
+        except KeyError:
+            raise ValueError(f"Unknown encryption algorithm: {name}") from None
+
+    # --- cache management ---
+
+    def warm(self, names: Optional[Iterable[str]] = None) -> List[EncryptorInterface]:
+        """Build (default-config) instances ahead of the first request."""
+        return [self.get(n) for n in (names if names is not None else self.names())]
+
+    def clear_caches(self) -> None:
+        with self._lock:
+            for inst in self._instances.values():
+                if inst.warm_cache is not None:
+                    inst.warm_cache.clear()
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                f"{name}{dict(cfg) if cfg else ''}": inst.warm_cache.stats()
+                for (name, cfg), inst in self._instances.items()
+                if inst.warm_cache is not None
+            }
+
+    def reset(self) -> None:
+        """Forget all built instances (their caches go with them)."""
+        with self._lock:
+            self._instances.clear()
+
+
+registry = EncryptorRegistry()
+for _name, (_module, _class_name) in _BUILTIN_ENCRYPTORS.items():
+    registry.register(_name, _lazy_factory(_module, _class_name))
+
+
+def get_encryptor(name: str, **config: Any) -> EncryptorInterface:
+    """Shortcut for ``registry.get(name, **config)``."""
+    return registry.get(name, **config)
+
+
+def available_algorithms() -> List[str]:
+    return registry.names()
@@ -1,9 +1,7 @@
-import hashlib
 from dataclasses import dataclass
 from typing import Tuple
 
 import numpy as np
-import cv2
 
 
 # =========================
@@ -33,35 +31,49 @@ def _unflatten_per_channel(flat: np.ndarray, H: int, W: int, C: int) -> np.ndarr
 # =========================
 # LASM chaotic sequence
 # =========================
-def generate_2d_lasm_sequence(x0: float, y0: float, a: float, shape: Tuple[int, int]):
-    M, N = shape
-    total = M * N
+def _lasm_iterate(x: float, y: float, a: float, total: int):
+    """Run the map ``total`` steps from (x, y); returns both sequences and the final state."""
     x_seq = np.zeros(total)
     y_seq = np.zeros(total)
-    x, y = x0, y0
     for i in range(total):
         x_new = np.sin(np.pi * (a * y + (1 - a) * x))
         y_new = np.sin(np.pi * (a * x_new + (1 - a) * y))
         x, y = x_new, y_new
         x_seq[i] = x
         y_seq[i] = y
+    return x_seq, y_seq, x, y
+
+def generate_2d_lasm_sequence(x0: float, y0: float, a: float, shape: Tuple[int, int]):
+    x_seq, y_seq, _, _ = _lasm_iterate(x0, y0, a, shape[0] * shape[1])
     return x_seq.reshape(shape), y_seq.reshape(shape)
 
+def lasm_sequence_bands(x0: float, y0: float, a: float, shape: Tuple[int, int], band_rows: int):
+    """
+    Yield (row0, x_band, y_band): generate_2d_lasm_sequence in bands of rows,
+    carrying the map state, so the full (M, N) sequences never exist at once.
+    """
+    M, N = shape
+    x, y = x0, y0
+    for row0 in range(0, M, band_rows):
+        rows = min(band_rows, M - row0)
+        x_seq, y_seq, x, y = _lasm_iterate(x, y, a, rows * N)
+        yield row0, x_seq.reshape(rows, N), y_seq.reshape(rows, N)
+
 
 # =========================
 # Mask generator (strong)
 # =========================
-def byte_mask_from_S(S: np.ndarray, salt: int = 0x9E3779B9) -> np.uint8:
+def byte_mask_from_S(S: np.ndarray, salt: int = 0x9E3779B9, row0: int = 0) -> np.uint8:
     """
     Turn float chaos S in [0,1) into a well-mixed uint8 mask.
     - 32-bit quantization
-    - mix with coordinates
+    - mix with coordinates (S holds rows row0.. of the full mask)
     - avalanche-style integer hashing
     """
     H, W = S.shape
     u = (np.floor(S * (1 << 32)).astype(np.uint32) ^ np.uint32(salt))
 
-    I = np.fromfunction(lambda i, j: (i.astype(np.uint32) << 16) ^ j.astype(np.uint32),
+    I = np.fromfunction(lambda i, j: ((i + row0).astype(np.uint32) << 16) ^ j.astype(np.uint32),
                         (H, W), dtype=int)
     u ^= I
 
@@ -84,7 +96,7 @@ class LASMKeyParams:
     x02: float; y02: float   # seeds for round 2 (diff)
 
 
-from .encryptor_interface import EncryptorInterface
+from .encryptor_interface import EncryptorInterface, key_digest
 
 class LASMEncryptor(EncryptorInterface):
     """
@@ -115,7 +127,7 @@ class LASMEncryptor(EncryptorInterface):
         Derive stable LASM parameters from SHA-256(key).
         The mapping keeps 'a' in a nice chaotic band and seeds in (0,1).
         """
-        h = hashlib.sha256(key.encode()).digest()
+        h = key_digest(key)
         def u32(i):  # 4-byte to uint32
             return int.from_bytes(h[4*i:4*(i+1)], "big", signed=False)
 
@@ -133,6 +145,10 @@ class LASMEncryptor(EncryptorInterface):
         x02 = map01(u32(4)); y02 = map01(u32(5))
         return LASMKeyParams(a1, a2, x01, y01, x02, y02)
 
+    def _cached_maps(self, H: int, W: int, key: str):
+        return self._cached('maps', (self._key_token(key), H, W),
+                            lambda: self._lasm_maps(H, W, self._derive_params(key)))
+
     def _lasm_maps(self, H: int, W: int, params: LASMKeyParams):
         # round 1 maps (permutation keys)
         S1x, S1y = generate_2d_lasm_sequence(params.x01, params.y01, params.a1, (H, W))
@@ -143,10 +159,15 @@ class LASMEncryptor(EncryptorInterface):
 
     # ---------- permutation ----------
     @staticmethod
-    def _row_col_permutation_from_maps(H: int, W: int, S1x: np.ndarray, S1y: np.ndarray):
+    def _permutation_keys(S1x: np.ndarray, S1y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         # Build integer keys (avoid Python tuples)
         X = (np.floor(S1x * (1 << 32)).astype(np.uint64))
         Y = (np.floor(S1y * (1 << 32)).astype(np.uint64))
+        return X, Y
+
+    @staticmethod
+    def _row_col_permutation_from_maps(H: int, W: int, S1x: np.ndarray, S1y: np.ndarray):
+        X, Y = LASMEncryptor._permutation_keys(S1x, S1y)
 
         row_primary   = X.sum(axis=1)
         row_tiebreak  = Y[:, 0]
@@ -173,35 +194,36 @@ class LASMEncryptor(EncryptorInterface):
         return img[:, col_inv, :][row_inv, :, :]
 
     # ---------- diffusion (vectorized 2D, XOR-chained) ----------
+    # Planes are the last two axes, so a stack of (H, W) planes is diffused in one call
     @staticmethod
-    def _diffuse_2d_uint8(img2d: np.ndarray, S: np.ndarray) -> np.ndarray:
+    def _diffusion_masks(S: np.ndarray, row0: int = 0) -> Tuple[np.ndarray, np.ndarray]:
         # Two independent masks from S
-        mask_h = byte_mask_from_S(S, salt=0xA5A5A5A5).astype(np.uint8)
-        mask_v = byte_mask_from_S(S, salt=0x5A5A5A5A).astype(np.uint8)
+        mask_h = byte_mask_from_S(S, salt=0xA5A5A5A5, row0=row0).astype(np.uint8)
+        mask_v = byte_mask_from_S(S, salt=0x5A5A5A5A, row0=row0).astype(np.uint8)
+        return mask_h, mask_v
 
-        # horizontal: prefixxor(img ^ mask_h) along axis=1
+    @staticmethod
+    def _diffuse_2d_uint8(img2d: np.ndarray, mask_h: np.ndarray, mask_v: np.ndarray) -> np.ndarray:
+        # horizontal: prefixxor(img ^ mask_h) along the columns
         A = np.bitwise_xor(img2d, mask_h)
-        O_h = np.bitwise_xor.accumulate(A, axis=1)
+        O_h = np.bitwise_xor.accumulate(A, axis=-1)
 
-        # vertical: prefixxor(O_h ^ mask_v) along axis=0
+        # vertical: prefixxor(O_h ^ mask_v) along the rows
         B = np.bitwise_xor(O_h, mask_v)
-        O = np.bitwise_xor.accumulate(B, axis=0)
+        O = np.bitwise_xor.accumulate(B, axis=-2)
         return O
 
     @staticmethod
-    def _inv_diffuse_2d_uint8(O2d: np.ndarray, S: np.ndarray) -> np.ndarray:
-        mask_h = byte_mask_from_S(S, salt=0xA5A5A5A5).astype(np.uint8)
-        mask_v = byte_mask_from_S(S, salt=0x5A5A5A5A).astype(np.uint8)
-
+    def _inv_diffuse_2d_uint8(O2d: np.ndarray, mask_h: np.ndarray, mask_v: np.ndarray) -> np.ndarray:
         # undo vertical
         B = np.empty_like(O2d, dtype=np.uint8)
-        B[0, :]  = np.bitwise_xor(O2d[0, :],  mask_v[0, :])
-        B[1:, :] = np.bitwise_xor(np.bitwise_xor(O2d[1:, :], O2d[:-1, :]), mask_v[1:, :])
+        B[..., 0, :]  = np.bitwise_xor(O2d[..., 0, :],  mask_v[0, :])
+        B[..., 1:, :] = np.bitwise_xor(np.bitwise_xor(O2d[..., 1:, :], O2d[..., :-1, :]), mask_v[1:, :])
 
         # undo horizontal
         img = np.empty_like(O2d, dtype=np.uint8)
-        img[:, 0]  = np.bitwise_xor(B[:, 0],  mask_h[:, 0])
-        img[:, 1:] = np.bitwise_xor(np.bitwise_xor(B[:, 1:], B[:, :-1]), mask_h[:, 1:])
+        img[..., 0]  = np.bitwise_xor(B[..., 0],  mask_h[:, 0])
+        img[..., 1:] = np.bitwise_xor(np.bitwise_xor(B[..., 1:], B[..., :-1]), mask_h[:, 1:])
         return img
 
     # ---------- public API ----------
@@ -215,20 +237,20 @@ class LASMEncryptor(EncryptorInterface):
         img = _as_uint8(image_bgr_or_gray)
         H, W = img.shape[:2]
 
-        params = self._derive_params(key)
-        (S1x, S1y), S2 = self._lasm_maps(H, W, params)
+        (S1x, S1y), S2 = self._cached_maps(H, W, key)
 
         # 1) permutation (same row/col for all channels)
         row_perm, col_perm = self._row_col_permutation_from_maps(H, W, S1x, S1y)
         P = self._apply_permutation(img, row_perm, col_perm)
 
         # 2) diffusion (per-channel)
+        masks = self._diffusion_masks(S2)
         if P.ndim == 2:
-            Cimg = self._diffuse_2d_uint8(P, S2)
+            Cimg = self._diffuse_2d_uint8(P, *masks)
         else:
             Cimg = np.empty_like(P)
             for c in range(P.shape[2]):
-                Cimg[:, :, c] = self._diffuse_2d_uint8(P[:, :, c], S2)
+                Cimg[:, :, c] = self._diffuse_2d_uint8(P[:, :, c], *masks)
         return Cimg
 
     def decrypt_image(self, cipher_bgr_or_gray: np.ndarray, key: str) -> np.ndarray:
@@ -240,18 +262,117 @@ class LASMEncryptor(EncryptorInterface):
         Cimg = _as_uint8(cipher_bgr_or_gray)
         H, W = Cimg.shape[:2]
 
-        params = self._derive_params(key)
-        (S1x, S1y), S2 = self._lasm_maps(H, W, params)
+        (S1x, S1y), S2 = self._cached_maps(H, W, key)
 
         # invert diffusion
+        masks = self._diffusion_masks(S2)
         if Cimg.ndim == 2:
-            P = self._inv_diffuse_2d_uint8(Cimg, S2)
+            P = self._inv_diffuse_2d_uint8(Cimg, *masks)
         else:
             P = np.empty_like(Cimg)
             for c in range(Cimg.shape[2]):
-                P[:, :, c] = self._inv_diffuse_2d_uint8(Cimg[:, :, c], S2)
+                P[:, :, c] = self._inv_diffuse_2d_uint8(Cimg[:, :, c], *masks)
 
         # invert permutation
         row_perm, col_perm = self._row_col_permutation_from_maps(H, W, S1x, S1y)
         P0 = self._invert_permutation(P, row_perm, col_perm)
-        return P0
\ No newline at end of file
+        return P0
+
+    def _key_schedule(self, key: str, shape: Tuple[int, ...]) -> Tuple:
+        """Row/col permutations (with inverses) and both diffusion masks for one image shape."""
+        H, W = shape[:2]
+        (S1x, S1y), S2 = self._cached_maps(H, W, key)
+        row_perm, col_perm = self._row_col_permutation_from_maps(H, W, S1x, S1y)
+        return (row_perm, col_perm, np.argsort(row_perm), np.argsort(col_perm)) + self._diffusion_masks(S2)
+
+    def _encrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """
+        Encrypt N same-shaped images at once: every channel plane is diffused
+        in one vectorized call.
+        """
+        row_perm, col_perm, _, _, mask_h, mask_v = schedule
+        imgs = _as_uint8(stack)
+
+        P = np.take(np.take(imgs, row_perm, axis=1), col_perm, axis=2)
+        if P.ndim == 3:
+            return self._diffuse_2d_uint8(P, mask_h, mask_v)
+        # channels next to N, so the (H, W) planes are the last two axes
+        planes = self._diffuse_2d_uint8(np.moveaxis(P, -1, 1), mask_h, mask_v)
+        return np.ascontiguousarray(np.moveaxis(planes, 1, -1))
+
+    def _decrypt_planned(self, stack: np.ndarray, schedule: Tuple) -> np.ndarray:
+        """Decrypt N same-shaped images at once (inverse of _encrypt_planned)."""
+        _, _, row_inv, col_inv, mask_h, mask_v = schedule
+        Cimgs = _as_uint8(stack)
+
+        if Cimgs.ndim == 3:
+            P = self._inv_diffuse_2d_uint8(Cimgs, mask_h, mask_v)
+        else:
+            P = np.moveaxis(self._inv_diffuse_2d_uint8(np.moveaxis(Cimgs, -1, 1), mask_h, mask_v), 1, -1)
+        return np.take(np.take(P, row_inv, axis=1), col_inv, axis=2)
+
+    # ---------- streaming (row bands) ----------
+    # Every stage streams over output rows: the permutation reads whole source
+    # rows, horizontal diffusion is row-local, and vertical diffusion is a prefix
+    # XOR down the rows, so one row of state carries across a band boundary.
+    def supports_streaming(self) -> bool:
+        return True
+
+    def _stream_permutation(self, params: LASMKeyParams, H: int, W: int, band_rows: int):
+        """Row/col permutations from the round-1 map, generated band by band (O(H + W) memory)."""
+        row_primary = np.empty(H, dtype=np.uint64)
+        row_tiebreak = np.empty(H, dtype=np.uint64)
+        col_primary = np.zeros(W, dtype=np.uint64)
+        col_tiebreak = None
+        for row0, S1x, S1y in lasm_sequence_bands(params.x01, params.y01, params.a1, (H, W), band_rows):
+            X, Y = self._permutation_keys(S1x % 1.0, S1y % 1.0)
+            row_primary[row0:row0 + len(X)] = X.sum(axis=1)
+            row_tiebreak[row0:row0 + len(X)] = Y[:, 0]
+            col_primary += Y.sum(axis=0)
+            if col_tiebreak is None:
+                col_tiebreak = X[0, :]
+        return np.lexsort((row_tiebreak, row_primary)), np.lexsort((col_tiebreak, col_primary))
+
+    def _stream_masks(self, params: LASMKeyParams, H: int, W: int, band_rows: int):
+        """Yield (row0, mask_h, mask_v) for each band of the round-2 diffusion masks."""
+        for row0, S2x, S2y in lasm_sequence_bands(params.x02, params.y02, params.a2, (H, W), band_rows):
+            S2 = (S2x + S2y) % 1.0
+            yield (row0,) + self._diffusion_masks(S2 % 1.0, row0=row0)
+
+    @staticmethod
+    def _planes(band: np.ndarray) -> np.ndarray:
+        # (rows, W) or (rows, W, C) -> (H, W) planes on the last two axes
+        return band if band.ndim == 2 else np.moveaxis(band, -1, 0)
+
+    @staticmethod
+    def _unplanes(planes: np.ndarray, ndim: int) -> np.ndarray:
+        return planes if ndim == 2 else np.moveaxis(planes, 0, -1)
+
+    def _encrypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        H, W = src.shape[:2]
+        params = self._derive_params(key)
+        row_perm, col_perm = self._stream_permutation(params, H, W, band_rows)
+
+        carry = None  # last cipher row of the previous band
+        for row0, mask_h, mask_v in self._stream_masks(params, H, W, band_rows):
+            rows = row_perm[row0:row0 + len(mask_h)]
+            P = np.take(_as_uint8(src[rows]), col_perm, axis=1)
+            O = self._unplanes(self._diffuse_2d_uint8(self._planes(P), mask_h, mask_v), P.ndim)
+            if carry is not None:
+                O = np.bitwise_xor(O, carry)  # continue the prefix XOR from the band above
+            dst[row0:row0 + len(O)] = O
+            carry = O[-1]
+
+    def _decrypt_bands(self, src: np.ndarray, dst: np.ndarray, key: str, band_rows: int) -> None:
+        H, W = src.shape[:2]
+        params = self._derive_params(key)
+        row_perm, col_perm = self._stream_permutation(params, H, W, band_rows)
+        col_inv = np.argsort(col_perm)
+
+        carry = None
+        for row0, mask_h, mask_v in self._stream_masks(params, H, W, band_rows):
+            O = _as_uint8(np.asarray(src[row0:row0 + len(mask_h)]))
+            chained = O if carry is None else np.bitwise_xor(O, carry)
+            carry = O[-1]
+            P = self._unplanes(self._inv_diffuse_2d_uint8(self._planes(chained), mask_h, mask_v), O.ndim)
+            dst[row_perm[row0:row0 + len(P)]] = np.take(P, col_inv, axis=1)
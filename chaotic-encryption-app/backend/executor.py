@@ -0,0 +1,207 @@
+"""
+Process-pool execution of encryptor calls for the web tier.
+
+The encryptors are CPU-bound Python loops that hold the GIL, so request
+threads get no parallelism from them. ``EncryptionExecutor`` runs
+``encrypt_image``/``decrypt_image`` in a bounded pool of pre-started worker
+processes. Images travel through shared memory (see shm_transport.py): the
+web process copies the input into one pooled segment and leases a second one
+the worker writes the result into, so no multi-megabyte array is pickled.
+
+Saturation is reported immediately (``ExecutorSaturated``) instead of queueing
+without bound; the Flask layer turns it into ``503 Service Unavailable``. If a
+worker dies (OOM kill, segfault), the call fails with ``BrokenProcessPool``
+and the pool is dropped, so the next call starts a fresh one.
+
+Each web process owns its own pool, with its own encryptor caches, so a host
+runs (web workers x ENCRYPT_POOL_SIZE) encryption processes. The default pool
+size therefore splits the CPUs between the web workers:
+``cpu_count // WEB_CONCURRENCY`` (at least 1). ``app.py`` only calls
+``start()`` when run directly; under gunicorn the hooks in ``gunicorn.conf.py``
+set WEB_CONCURRENCY to the worker count and start the pool in every worker.
+Without them the pool starts lazily on the worker's first call.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import numpy as np
+
+from pipeline import get_api_encryptor
+from shm_transport import ArrayDescriptor, SegmentPool, attach
+
+
+OPERATIONS = ('encrypt', 'decrypt')
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when all workers are busy and the wait queue is full."""
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+
+def _init_worker() -> None:
+    # Import the encryptors once per worker rather than on the first request
+    import encryption  # noqa: F401
+
+def _ping() -> int:
+    return os.getpid()
+
+def run_in_worker(operation: str, algorithm: str, key: str,
+                  src: ArrayDescriptor, dst: ArrayDescriptor) -> Optional[np.ndarray]:
+    """
+    Run one encryptor call on shared-memory arrays.
+
+    Writes the result into ``dst`` and returns None; only if the encryptor
+    changed shape/dtype (e.g. an aes_gcm container) is the result returned by value.
+    """
+    image = attach(src)
+    out = attach(dst)
+    encryptor = get_api_encryptor(algorithm)
+    if operation == 'encrypt':
+        result = encryptor.encrypt_image(image, key)
+    else:
+        result = encryptor.decrypt_image(image, key)
+    if result.shape != out.shape or result.dtype != out.dtype:
+        return np.array(result)
+    out[...] = result
+    return None
+
+
+# ---------------------------
+# Web side
+# ---------------------------
+
+class EncryptionExecutor:
+    """
+    Bounded process pool for encryptor calls.
+
+    Args:
+        pool_size: Worker processes; 0 runs calls inline in the calling thread
+        queue_depth: Calls allowed to wait for a free worker before rejecting
+        timeout: Seconds to wait for a worker result (None waits forever)
+        start_method: multiprocessing start method ('spawn' avoids forking a threaded server)
+    """
+
+    def __init__(self, pool_size: int, queue_depth: int = 0, timeout: Optional[float] = None,
+                 start_method: str = 'spawn'):
+        self.pool_size = max(0, int(pool_size))
+        self.queue_depth = max(0, int(queue_depth))
+        self.timeout = timeout
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max(1, self.pool_size + self.queue_depth))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.segments = SegmentPool()
+
+    @classmethod
+    def from_env(cls) -> 'EncryptionExecutor':
+        """
+        Configure from ENCRYPT_POOL_SIZE, ENCRYPT_QUEUE_DEPTH and ENCRYPT_TIMEOUT.
+
+        ENCRYPT_POOL_SIZE is per web process; it defaults to this process's share
+        of the CPUs, cpu_count // WEB_CONCURRENCY (web workers, default 1).
+        """
+        web_workers = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+        pool_size = int(os.getenv('ENCRYPT_POOL_SIZE', max(1, (os.cpu_count() or 1) // web_workers)))
+        queue_depth = int(os.getenv('ENCRYPT_QUEUE_DEPTH', 2 * pool_size))
+        timeout = os.getenv('ENCRYPT_TIMEOUT')
+        return cls(pool_size, queue_depth, float(timeout) if timeout else None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.pool_size > 0
+
+    def start(self) -> None:
+        """Start every worker process now instead of on the first call."""
+        if self.enabled:
+            self._running_pool()
+
+    def _running_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.pool_size,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                )
+                wait([self._pool.submit(_ping) for _ in range(self.pool_size)])
+            return self._pool
+
+    def _drop_pool(self, pool: ProcessPoolExecutor) -> None:
+        # A broken pool never recovers; the next call starts a new one
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+        self.segments.close()
+
+    def encrypt(self, algorithm: str, image: np.ndarray, key: str) -> np.ndarray:
+        return self.run('encrypt', algorithm, image, key)
+
+    def decrypt(self, algorithm: str, image: np.ndarray, key: str) -> np.ndarray:
+        return self.run('decrypt', algorithm, image, key)
+
+    def run(self, operation: str, algorithm: str, image: np.ndarray, key: str) -> np.ndarray:
+        """
+        Run an encryptor call on a worker and return the resulting array.
+
+        Raises:
+            ExecutorSaturated: If no worker or queue slot is free
+            TimeoutError: If the worker did not finish within ``timeout``; the call
+                keeps its slot until the worker is done with it
+            BrokenProcessPool: If a worker died; the pool is replaced on the next call
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        if not self.enabled:
+            encryptor = get_api_encryptor(algorithm)
+            if operation == 'encrypt':
+                return encryptor.encrypt_image(image, key)
+            return encryptor.decrypt_image(image, key)
+
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorSaturated('All encryption workers are busy')
+        release_slot = True
+        try:
+            pool = self._running_pool()
+            src = self.segments.put(image)
+            dst = self.segments.empty(image.shape, image.dtype)
+            recycle = self.segments.release
+            try:
+                try:
+                    future = pool.submit(run_in_worker, operation, algorithm, key,
+                                         src.descriptor, dst.descriptor)
+                    returned = future.result(timeout=self.timeout)
+                except TimeoutError:
+                    # The worker may still touch these blocks; never hand them out again
+                    recycle = self.segments.discard
+                    # Until it finishes, the worker stays busy: hold the slot that long
+                    future.cancel()
+                    release_slot = False
+                    future.add_done_callback(lambda f: self._slots.release())
+                    raise TimeoutError(f'Encryption did not finish within {self.timeout}s') from None
+                except BrokenProcessPool:
+                    recycle = self.segments.discard
+                    self._drop_pool(pool)
+                    raise
+                if returned is not None:
+                    return returned
+                return dst.array.copy()
+            finally:
+                recycle(src)
+                recycle(dst)
+        finally:
+            if release_slot:
+                self._slots.release()
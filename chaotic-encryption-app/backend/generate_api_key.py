@@ -4,6 +4,8 @@ API Key Generator for Chaotic Encryption App
 
 This script helps generate secure API keys for production use.
 Run this script to generate new API keys with specific permissions.
+Generated keys are added to the key store the server reads (API_KEY_DB,
+default api_keys.db), so they work without a restart.
 """
 
 import hashlib
@@ -11,6 +13,8 @@ import secrets
 import json
 from datetime import datetime
 
+from key_store import KeyStore
+
 def generate_api_key(name, permissions, rate_limit=100):
     """Generate a new API key with specified permissions"""
     
@@ -70,6 +74,10 @@ def main():
     print(f"Created: {key_info['created_at']}")
     print("\n🔑 API Key (store securely - this is the only time you'll see it):")
     print(f"{api_key}")
+    store = KeyStore()
+    store.add(key_hash, key_info)
+    print(f"\n🗄️  Added to key store: {store.path}")
+    
     print("\n📋 For environment variable (API_KEYS):")
     
     # Create the JSON structure for environment variable
@@ -78,7 +86,7 @@ def main():
     
     print("\n⚠️  IMPORTANT SECURITY NOTES:")
     print("1. Store the API key securely - it cannot be recovered")
-    print("2. Add the JSON to your API_KEYS environment variable")
+    print("2. The key is active in the key store; listing it in API_KEYS instead makes API_KEYS manage it")
     print("3. Never commit API keys to version control")
     print("4. Rotate keys regularly")
     print("5. Use HTTPS in production")
@@ -0,0 +1,31 @@
+"""
+Gunicorn settings, read automatically when gunicorn runs from this directory
+(``gunicorn app:app``).
+
+Each gunicorn worker owns a process pool for encrypt/decrypt calls (see
+executor.py), so a host runs workers x ENCRYPT_POOL_SIZE encryption processes.
+WEB_CONCURRENCY is set to the worker count before the workers load the app, so
+the default pool size is each worker's share of the CPUs. The pool is started
+once the worker has loaded the app, so the first request does not pay for
+spawning it, and shut down when the worker exits.
+"""
+
+import os
+
+bind = '0.0.0.0:5001'
+
+
+def when_ready(server):
+    # Runs in the master before it forks the workers (which import app afterwards,
+    # unless preload_app is set)
+    os.environ['WEB_CONCURRENCY'] = str(server.cfg.workers)
+
+
+def post_worker_init(worker):
+    from app import encryption_executor
+    encryption_executor.start()
+
+
+def worker_exit(server, worker):
+    from app import encryption_executor
+    encryption_executor.shutdown(wait=False)
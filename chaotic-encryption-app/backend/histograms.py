@@ -0,0 +1,135 @@
+"""
+Histogram data for the batch tools, rendered to charts on demand.
+
+Batch runs store the 256-bin gray histograms of each image (plain, cipher,
+decrypted) as one small file instead of drawing a chart per image: an .npz
+of int64 counts (default) or the same counts as JSON. Charts are drawn
+afterwards by ``render_histograms``, the only code here that imports
+matplotlib, so analysis runs never pay its import or plotting time.
+
+Usage:
+    python histograms.py batch_results/fodhnn            # render every stored histogram not yet drawn
+    python histograms.py batch_results/fodhnn --force    # redraw all
+
+    from histograms import gray_histogram, save_histograms, render_histograms
+    save_histograms('out/histograms/lena', 'npz', plain=gray_histogram(img), cipher=gray_histogram(enc))
+    render_histograms('out')
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils import _hist256, _to_gray
+
+
+HISTOGRAM_FORMATS = ('npz', 'json')
+HISTOGRAM_DIR = 'histograms'
+DPI = 120
+
+
+def gray_histogram(image: np.ndarray) -> np.ndarray:
+    """Exact 256-bin histogram (int64) of an image's gray version."""
+    return _hist256(_to_gray(image))
+
+
+def save_histograms(base_path: str, fmt: str = 'npz', **histograms: np.ndarray) -> str:
+    """
+    Store named histograms in ``base_path`` + '.npz' or '.json'; returns the file path.
+
+    The file is written under a temporary name and renamed into place.
+    """
+    if fmt not in HISTOGRAM_FORMATS:
+        raise ValueError(f"Histogram format must be one of {HISTOGRAM_FORMATS}")
+    os.makedirs(os.path.dirname(base_path) or '.', exist_ok=True)
+    path = f"{base_path}.{fmt}"
+    tmp = f"{base_path}.{os.getpid()}.tmp.{fmt}"
+    if fmt == 'npz':
+        np.savez_compressed(tmp, **{name: np.asarray(h, dtype=np.int64) for name, h in histograms.items()})
+    else:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({name: np.asarray(h).astype(int).tolist() for name, h in histograms.items()}, f)
+    os.replace(tmp, path)
+    return path
+
+
+def load_histograms(path: str) -> Dict[str, np.ndarray]:
+    """Named histograms from a file written by save_histograms."""
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    with open(path, encoding='utf-8') as f:
+        return {name: np.asarray(values, dtype=np.int64) for name, values in json.load(f).items()}
+
+
+def render_histogram(values: np.ndarray, out_path: str, title: str) -> None:
+    """Draw one 256-bin histogram as a PNG bar chart."""
+    # Imported here so only rendering pays for matplotlib; Figure avoids pyplot's global state
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6.4, 4.8))
+    ax = fig.subplots()
+    # One filled step artist instead of 256 bar patches; same picture as bar(width=1)
+    ax.stairs(np.asarray(values, dtype=np.float64), np.arange(257) - 0.5, fill=True)
+    ax.set_xlim(-0.5, 255.5)
+    ax.set_title(title)
+    ax.set_xlabel("Intensity (0–255)")
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=DPI)
+
+
+def _histogram_files(root: str) -> List[str]:
+    # Only inside histograms/ folders: a batch output dir also holds batch.json etc.
+    files = []
+    for dirpath, dirs, names in os.walk(root):
+        dirs.sort()
+        parts = os.path.relpath(dirpath, os.path.dirname(os.path.abspath(root))).split(os.sep)
+        if HISTOGRAM_DIR not in parts:
+            continue
+        files.extend(os.path.join(dirpath, name) for name in sorted(names)
+                     if name.endswith(('.npz', '.json')) and '.tmp.' not in name)
+    return files
+
+
+def render_histograms(root: str, force: bool = False, title_prefix: Optional[str] = None) -> int:
+    """
+    Render every histogram file under ``root``/**/histograms/ to PNGs next to it.
+
+    ``<stem>.npz`` with arrays plain/cipher gives ``<stem>_plain.png`` and
+    ``<stem>_cipher.png``. Charts newer than their data file are kept unless
+    ``force``. Returns the number of charts drawn.
+    """
+    drawn = 0
+    for path in _histogram_files(root):
+        stem = os.path.splitext(path)[0]
+        mtime = os.path.getmtime(path)
+        for name, values in load_histograms(path).items():
+            out = f"{stem}_{name}.png"
+            if not force and os.path.exists(out) and os.path.getmtime(out) >= mtime:
+                continue
+            label = os.path.relpath(stem, root).replace(os.sep, '/')
+            render_histogram(values, out, f"{title_prefix or ''}{label} — {name}")
+            drawn += 1
+    return drawn
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Render stored histogram data (e.g. of a batch.py run) to PNG charts.")
+    p.add_argument("root", help="Directory searched for histograms/ folders.")
+    p.add_argument("--force", action="store_true", help="Redraw charts that are already up to date.")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    drawn = render_histograms(args.root, force=args.force)
+    print(f"[histograms] rendered {drawn} charts under {args.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,417 @@
+"""
+Background job queue for large-image encryption/decryption.
+
+Jobs run in a local process pool so a slow cipher never blocks a web worker.
+Job state lives in small JSON files under ``job_dir`` (written atomically by
+both the web process and the worker process), so any gunicorn worker can
+answer a status poll, not only the one that accepted the job. Records not
+updated for ``JOB_TTL_HOURS`` (default 24) are deleted by the next submit,
+together with the result image they point to. A web process accepts at most
+``max_pending`` unfinished jobs and refuses more with ``QueueFull``.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from pipeline import (
+    get_api_encryptor, prepare_image, save_encrypted_image, load_encrypted_image,
+)
+from utils import compute_metrics
+
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+OPERATIONS = ('encrypt', 'decrypt')
+
+# Job and metrics records older than this are deleted; sweeps run at most once a minute
+JOB_TTL_HOURS = float(os.getenv('JOB_TTL_HOURS', 24))
+SWEEP_INTERVAL = 60.0
+
+
+class QueueFull(RuntimeError):
+    """Raised when a queue already holds its maximum number of pending tasks."""
+
+
+# ---------------------------
+# Job state files
+# ---------------------------
+
+def _job_path(job_dir: str, job_id: str) -> str:
+    return os.path.join(job_dir, f"{job_id}.json")
+
+def read_job(job_dir: str, job_id: str) -> Optional[Dict[str, Any]]:
+    """Load a job record, or None if the id is unknown."""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return None
+    try:
+        with open(_job_path(job_dir, job_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def write_job(job_dir: str, record: Dict[str, Any]) -> None:
+    """Atomically replace a job record."""
+    record['updated_at'] = datetime.now().isoformat()
+    path = _job_path(job_dir, record['id'])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+
+def update_job(job_dir: str, job_id: str, **fields: Any) -> Dict[str, Any]:
+    record = read_job(job_dir, job_id) or {'id': job_id}
+    record.update(fields)
+    write_job(job_dir, record)
+    return record
+
+def expire_jobs(job_dir: str, ttl_hours: float, now: Optional[float] = None,
+                output_dir: Optional[str] = None) -> int:
+    """
+    Delete job records (and leftover temp files) last written more than
+    ``ttl_hours`` ago, and with ``output_dir`` the result images they name.
+    Returns the number of records and temp files removed.
+    """
+    cutoff = (time.time() if now is None else now) - ttl_hours * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(job_dir))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(('.json', '.tmp')):
+            continue
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            if output_dir and entry.name.endswith('.json'):
+                _remove_result(entry.path, output_dir)
+            os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            pass  # another web worker swept it first
+    return removed
+
+def _remove_result(record_path: str, output_dir: str) -> None:
+    try:
+        with open(record_path, 'r', encoding='utf-8') as f:
+            result_filename = json.load(f).get('result_filename')
+    except (OSError, json.JSONDecodeError):
+        return
+    if result_filename:
+        try:
+            os.remove(os.path.join(output_dir, os.path.basename(result_filename)))
+        except FileNotFoundError:
+            pass
+
+
+class _RecordSweeper:
+    """Runs expire_jobs on a job directory at most once per SWEEP_INTERVAL."""
+
+    def __init__(self, job_dir: str, ttl_hours: Optional[float], output_dir: Optional[str] = None):
+        self.job_dir = job_dir
+        self.output_dir = output_dir
+        self.ttl_hours = JOB_TTL_HOURS if ttl_hours is None else ttl_hours
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def maybe_sweep(self) -> int:
+        if self.ttl_hours <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sweep:
+                return 0
+            self._next_sweep = now + SWEEP_INTERVAL
+        return expire_jobs(self.job_dir, self.ttl_hours, output_dir=self.output_dir)
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+
+def run_job(job_dir: str, job_id: str, operation: str, algorithm: str, key: str,
+            input_path: str, output_dir: str) -> Dict[str, Any]:
+    """
+    Execute one job inside a worker process, publishing progress as it goes.
+
+    Returns the final job record.
+    """
+    try:
+        update_job(job_dir, job_id, status=JOB_RUNNING, progress=0.05)
+
+        if operation == 'encrypt':
+            image = cv2.imread(input_path)
+        else:
+            image = load_encrypted_image(input_path)
+        if image is None:
+            raise ValueError('Failed to read image')
+        image = prepare_image(image, algorithm)
+        update_job(job_dir, job_id, progress=0.1)
+
+        encryptor = get_api_encryptor(algorithm)
+        if operation == 'encrypt':
+            result = encryptor.encrypt_image(image, key)
+        else:
+            result = encryptor.decrypt_image(image, key)
+        update_job(job_dir, job_id, progress=0.8)
+
+        prefix = 'encrypted' if operation == 'encrypt' else 'decrypted'
+        result_filename = f"{prefix}_{uuid.uuid4()}.png"
+        if not save_encrypted_image(result, os.path.join(output_dir, result_filename)):
+            raise IOError(f'Failed to save {prefix} image')
+
+        metrics = None
+        if operation == 'encrypt':
+            update_job(job_dir, job_id, progress=0.9)
+            metrics = compute_metrics(image, encryptor.cipher_payload(result))
+
+        return update_job(job_dir, job_id, status=JOB_DONE, progress=1.0,
+                          result_filename=result_filename, metrics=metrics)
+    except Exception as e:
+        return update_job(job_dir, job_id, status=JOB_FAILED, error=str(e))
+    finally:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+
+
+# ---------------------------
+# Web side
+# ---------------------------
+
+class JobQueue:
+    """
+    Submits jobs to a lazily started process pool.
+
+    Args:
+        job_dir: Directory holding job state files
+        output_dir: Directory results are written to (served by the download route)
+        max_workers: Worker processes (default: JOB_WORKERS env or min(2, cpu_count))
+        start_method: multiprocessing start method ('spawn' avoids forking a threaded server)
+        ttl_hours: Age after which records and their result images are deleted
+            (default: JOB_TTL_HOURS; <= 0 keeps them)
+        max_pending: Unfinished jobs accepted before submit raises QueueFull
+            (default: JOB_QUEUE_DEPTH env or 4 * max_workers)
+    """
+
+    def __init__(self, job_dir: str, output_dir: str, max_workers: Optional[int] = None,
+                 start_method: str = 'spawn', ttl_hours: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.job_dir = job_dir
+        self.output_dir = output_dir
+        self.max_workers = max_workers or int(
+            os.getenv('JOB_WORKERS', min(2, os.cpu_count() or 1))
+        )
+        self.start_method = start_method
+        self.max_pending = max_pending or int(os.getenv('JOB_QUEUE_DEPTH', 4 * self.max_workers))
+        self._pending = 0
+        self._sweeper = _RecordSweeper(job_dir, ttl_hours, output_dir)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._executor
+
+    def submit(self, operation: str, algorithm: str, key: str, input_path: str,
+               owner: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue an encrypt/decrypt job for an image already saved at ``input_path``.
+
+        Returns the initial job record.
+
+        Raises:
+            QueueFull: If ``max_pending`` jobs are already queued or running
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f'{self._pending} jobs are already pending')
+            self._pending += 1
+        try:
+            return self._submit(operation, algorithm, key, input_path, owner)
+        except BaseException:
+            self._finished()
+            raise
+
+    def _finished(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, operation: str, algorithm: str, key: str, input_path: str,
+                owner: Optional[str]) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        record = {
+            'id': job_id,
+            'operation': operation,
+            'algorithm': algorithm,
+            'status': JOB_QUEUED,
+            'progress': 0.0,
+            'created_at': datetime.now().isoformat(),
+            'result_filename': None,
+            'metrics': None,
+            'error': None,
+            'owner': owner,
+        }
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._sweeper.maybe_sweep()
+        write_job(self.job_dir, record)
+
+        args = (run_job, self.job_dir, job_id, operation, algorithm, key, input_path, self.output_dir)
+        pool = self._pool()
+        try:
+            future = pool.submit(*args)
+        except BrokenProcessPool:
+            self._drop_pool(pool)
+            pool = self._pool()
+            future = pool.submit(*args)
+        future.add_done_callback(lambda f: self._on_done(job_id, input_path, pool, f))
+        return record
+
+    def _on_done(self, job_id: str, input_path: str, pool: ProcessPoolExecutor, future) -> None:
+        self._finished()
+        # run_job records its own failures; this only catches crashed workers
+        exc = future.exception()
+        if exc is not None:
+            update_job(self.job_dir, job_id, status=JOB_FAILED, error=f'Worker failed: {exc}')
+            # run_job never reached its cleanup
+            if os.path.exists(input_path):
+                os.remove(input_path)
+        if isinstance(exc, BrokenProcessPool):
+            self._drop_pool(pool)
+
+    def _drop_pool(self, pool: ProcessPoolExecutor) -> None:
+        # A broken pool never recovers; the next submit starts a new one
+        with self._lock:
+            if self._executor is pool:
+                self._executor = None
+        pool.shutdown(wait=False)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return read_job(self.job_dir, job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+class DeferredMetrics:
+    """
+    Computes encrypt-response metrics after the response has been sent.
+
+    Images are already in this process, so metrics run on a small thread pool
+    (the OpenCV kernels release the GIL) rather than being shipped to a worker
+    process. Results are published as job records (operation 'metrics') in
+    ``job_dir``, readable from any web worker.
+
+    Every pending task holds both full-size images, so at most ``max_pending``
+    are accepted; submit raises QueueFull beyond that.
+
+    Args:
+        job_dir: Directory holding job state files
+        max_workers: Metric threads (default: METRICS_WORKERS env or 1)
+        ttl_hours: Age after which records are deleted (default: JOB_TTL_HOURS; <= 0 keeps them)
+        max_pending: Queued or running tasks accepted (default: METRICS_QUEUE_DEPTH env or 8)
+    """
+
+    def __init__(self, job_dir: str, max_workers: Optional[int] = None,
+                 ttl_hours: Optional[float] = None, max_pending: Optional[int] = None):
+        self.job_dir = job_dir
+        self.max_workers = max_workers or int(os.getenv('METRICS_WORKERS', 1))
+        self.max_pending = max_pending or int(os.getenv('METRICS_QUEUE_DEPTH', 8))
+        self._pending = 0
+        # Separate from _lock: shutdown() holds _lock while waiting for tasks that decrement _pending
+        self._pending_lock = threading.Lock()
+        self._sweeper = _RecordSweeper(job_dir, ttl_hours)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, original: np.ndarray, encrypted: np.ndarray,
+               owner: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Schedule compute_metrics(original, encrypted); returns the initial record.
+
+        Raises:
+            QueueFull: If ``max_pending`` tasks are already queued or running
+        """
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f'{self._pending} metric computations are already pending')
+            self._pending += 1
+        try:
+            return self._submit(original, encrypted, owner)
+        except BaseException:
+            self._finished()
+            raise
+
+    def _finished(self) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+
+    def _submit(self, original: np.ndarray, encrypted: np.ndarray,
+                owner: Optional[str]) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        record = {
+            'id': job_id,
+            'operation': 'metrics',
+            'status': JOB_QUEUED,
+            'progress': 0.0,
+            'created_at': datetime.now().isoformat(),
+            'metrics': None,
+            'error': None,
+            'owner': owner,
+        }
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._sweeper.maybe_sweep()
+        write_job(self.job_dir, record)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='metrics')
+            self._executor.submit(self._run, job_id, original, encrypted)
+        return record
+
+    def _run(self, job_id: str, original: np.ndarray, encrypted: np.ndarray) -> None:
+        try:
+            update_job(self.job_dir, job_id, status=JOB_RUNNING)
+            update_job(self.job_dir, job_id, status=JOB_DONE, progress=1.0,
+                       metrics=compute_metrics(original, encrypted))
+        except Exception as e:
+            update_job(self.job_dir, job_id, status=JOB_FAILED, error=str(e))
+        finally:
+            self._finished()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        record = read_job(self.job_dir, job_id)
+        if record is None or record.get('operation') != 'metrics':
+            return None
+        return record
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
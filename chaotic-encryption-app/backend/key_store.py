@@ -0,0 +1,213 @@
+"""
+Persistent API key store shared by all worker processes.
+
+Keys live in a SQLite file (``API_KEY_DB``, default ``api_keys.db``) with the
+SHA-256 key hash as primary key, so a lookup is one indexed read and a key
+created by any worker - or by generate_api_key.py - is visible to all of them.
+
+Every change to a key's identity (insert, delete, name/permissions/rate
+limit) bumps a revision counter via triggers; ``last_used`` writes do not.
+Readers keep an in-process copy and only reload when the revision moved.
+
+Each key records its ``source`` ('env' for keys from the API_KEYS variable,
+'generated' for keys created at runtime), so ``sync`` can make the store
+match API_KEYS without touching generated keys. The database file is only
+opened on first use.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+DEFAULT_KEY_DB = 'api_keys.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_keys (
+    key_hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    permissions TEXT NOT NULL,
+    rate_limit INTEGER NOT NULL,
+    created_at TEXT,
+    last_used TEXT,
+    source TEXT NOT NULL DEFAULT 'generated'
+);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revision (id, value) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS api_keys_insert AFTER INSERT ON api_keys
+    BEGIN UPDATE revision SET value = value + 1; END;
+CREATE TRIGGER IF NOT EXISTS api_keys_delete AFTER DELETE ON api_keys
+    BEGIN UPDATE revision SET value = value + 1; END;
+CREATE TRIGGER IF NOT EXISTS api_keys_update AFTER UPDATE OF name, permissions, rate_limit ON api_keys
+    BEGIN UPDATE revision SET value = value + 1; END;
+"""
+
+_COLUMNS = 'key_hash, name, permissions, rate_limit, created_at, last_used, source'
+
+SOURCE_ENV = 'env'
+SOURCE_GENERATED = 'generated'
+
+
+def _record(row: Tuple) -> Tuple[str, Dict[str, Any]]:
+    key_hash, name, permissions, rate_limit, created_at, last_used, source = row
+    return key_hash, {
+        'name': name,
+        'permissions': json.loads(permissions),
+        'rate_limit': rate_limit,
+        'created_at': created_at,
+        'last_used': last_used,
+        'source': source,
+    }
+
+
+def _row(key_hash: str, key_info: Dict[str, Any], source: str) -> Tuple:
+    return (key_hash, key_info.get('name', ''), json.dumps(list(key_info.get('permissions', []))),
+            int(key_info.get('rate_limit', 100)), key_info.get('created_at'),
+            key_info.get('last_used'), source)
+
+
+class KeyStore:
+    """
+    SQLite-backed API key store.
+
+    Records use the same dict layout as the API_KEYS environment variable:
+    ``{key_hash: {'name', 'permissions', 'rate_limit', 'created_at', 'last_used'}}``.
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 5.0):
+        self.path = path or os.getenv('API_KEY_DB', DEFAULT_KEY_DB)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+            if not self._ready:
+                self._create_schema(conn)
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._ready:
+                return
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(api_keys)')}
+            if 'source' not in columns:
+                # Stores created before keys recorded their source
+                conn.execute(f"ALTER TABLE api_keys ADD COLUMN source TEXT NOT NULL DEFAULT '{SOURCE_GENERATED}'")
+            self._ready = True
+
+    def revision(self) -> int:
+        """Counter that changes whenever a key is added, removed or edited."""
+        return self._conn().execute('SELECT value FROM revision').fetchone()[0]
+
+    def get(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            f'SELECT {_COLUMNS} FROM api_keys WHERE key_hash = ?', (key_hash,)
+        ).fetchone()
+        return _record(row)[1] if row else None
+
+    def load(self) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """Read every key, together with the revision the snapshot belongs to."""
+        conn = self._conn()
+        conn.execute('BEGIN')
+        try:
+            revision = conn.execute('SELECT value FROM revision').fetchone()[0]
+            keys = dict(_record(row) for row in conn.execute(f'SELECT {_COLUMNS} FROM api_keys'))
+        finally:
+            conn.execute('COMMIT')
+        return revision, keys
+
+    def add(self, key_hash: str, key_info: Dict[str, Any], replace: bool = True,
+            source: str = SOURCE_GENERATED) -> bool:
+        """Insert (or replace) a key. Returns False if it existed and replace is False."""
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        cur = self._conn().execute(
+            f'{verb} INTO api_keys ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            _row(key_hash, key_info, source),
+        )
+        return cur.rowcount > 0
+
+    def add_many(self, keys: Dict[str, Dict[str, Any]], replace: bool = True,
+                 source: str = SOURCE_GENERATED) -> int:
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            added = sum(self.add(h, info, replace=replace, source=source) for h, info in keys.items())
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return added
+
+    def sync(self, keys: Dict[str, Dict[str, Any]], source: str = SOURCE_ENV) -> Tuple[int, int]:
+        """
+        Make the keys of ``source`` exactly ``keys``, in one transaction.
+
+        Listed keys are inserted, or get the listed name, permissions and rate
+        limit (their last_used is kept); keys of ``source`` that are no longer
+        listed are deleted. Keys of other sources are left alone. Unchanged
+        keys do not bump the revision.
+
+        Returns:
+            (keys inserted or changed, keys deleted)
+        """
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            changed = 0
+            for key_hash, info in keys.items():
+                cur = conn.execute(
+                    f'INSERT INTO api_keys ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(key_hash) DO UPDATE SET name = excluded.name, '
+                    'permissions = excluded.permissions, rate_limit = excluded.rate_limit, '
+                    'source = excluded.source '
+                    'WHERE name IS NOT excluded.name OR permissions IS NOT excluded.permissions '
+                    'OR rate_limit IS NOT excluded.rate_limit OR source IS NOT excluded.source',
+                    _row(key_hash, info, source),
+                )
+                changed += cur.rowcount
+            listed = list(keys)
+            placeholders = ', '.join('?' * len(listed))
+            cur = conn.execute(
+                f'DELETE FROM api_keys WHERE source = ?'
+                + (f' AND key_hash NOT IN ({placeholders})' if listed else ''),
+                [source] + listed,
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return changed, cur.rowcount
+
+    def delete(self, key_hash: str) -> bool:
+        cur = self._conn().execute('DELETE FROM api_keys WHERE key_hash = ?', (key_hash,))
+        return cur.rowcount > 0
+
+    def touch_many(self, last_used: Iterable[Tuple[str, str]]) -> None:
+        """Record last_used timestamps ((key_hash, iso_time) pairs) in one transaction."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'UPDATE api_keys SET last_used = ? WHERE key_hash = ?',
+                [(used, key_hash) for key_hash, used in last_used],
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def __len__(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM api_keys').fetchone()[0]
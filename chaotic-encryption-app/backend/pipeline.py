@@ -0,0 +1,115 @@
+"""
+Image processing pipeline shared by the Flask handlers and background workers.
+
+Kept free of Flask so worker processes can import it cheaply.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from encryption.registry import get_encryptor
+
+
+# Algorithms selectable through the API; anything else falls back to LASM-FB
+API_ALGORITHMS = ('fodhnn', 'acm_2dscl', 'aes', 'aes_gcm', 'bulban')
+DEFAULT_API_ALGORITHM = 'lasm_fb'
+
+def get_api_encryptor(algorithm):
+    """Return the shared (registry-owned) encryptor for an API algorithm name"""
+    return get_encryptor(algorithm if algorithm in API_ALGORITHMS else DEFAULT_API_ALGORITHM)
+
+def prepare_image(image: np.ndarray, algorithm: str) -> np.ndarray:
+    """Apply per-algorithm input conversions (Bulban works on grayscale only)"""
+    if algorithm == 'bulban' and image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+def save_encrypted_image(image: np.ndarray, filepath: str) -> bool:
+    """
+    Save encrypted image with optimized compression for high-entropy data.
+    
+    For encrypted images with high entropy, we use multiple strategies:
+    1. Try maximum PNG compression first
+    2. If that fails, try JPEG with high quality
+    3. As a last resort, save as uncompressed binary with .enc extension
+    
+    Args:
+        image: Encrypted image as numpy array
+        filepath: Path where to save the image
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        # Strategy 1: Maximum PNG compression
+        success = cv2.imwrite(filepath, image, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+        
+        if success:
+            return True
+            
+        # Strategy 2: JPEG with high quality (better for some high-entropy data)
+        jpeg_path = filepath.replace('.png', '.jpg')
+        success = cv2.imwrite(jpeg_path, image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        if success:
+            # Rename the file back to original extension
+            os.rename(jpeg_path, filepath)
+            return True
+        
+        # Strategy 3: Save as binary format (most efficient for high-entropy data)
+        binary_path = filepath.replace('.png', '.enc')
+        with open(binary_path, 'wb') as f:
+            # Write image dimensions first
+            f.write(image.shape[0].to_bytes(4, 'big'))  # height
+            f.write(image.shape[1].to_bytes(4, 'big'))  # width
+            if len(image.shape) == 3:
+                f.write(image.shape[2].to_bytes(4, 'big'))  # channels
+            else:
+                f.write((1).to_bytes(4, 'big'))  # grayscale = 1 channel
+            # Write raw image data
+            f.write(image.tobytes())
+        
+        # Rename to original extension
+        os.rename(binary_path, filepath)
+        return True
+        
+    except Exception as e:
+        print(f"Error saving encrypted image: {e}")
+        return False
+
+def load_encrypted_image(filepath: str) -> np.ndarray:
+    """
+    Load encrypted image that may have been saved in different formats.
+    
+    Args:
+        filepath: Path to the encrypted image file
+        
+    Returns:
+        np.ndarray: Loaded image array, or None if failed
+    """
+    try:
+        # First try standard OpenCV loading
+        image = cv2.imread(filepath)
+        if image is not None:
+            return image
+            
+        # If that fails, try loading as binary format
+        with open(filepath, 'rb') as f:
+            height = int.from_bytes(f.read(4), 'big')
+            width = int.from_bytes(f.read(4), 'big')
+            channels = int.from_bytes(f.read(4), 'big')
+            
+            if channels == 1:
+                shape = (height, width)
+            else:
+                shape = (height, width, channels)
+                
+            # Read raw image data
+            data = f.read()
+            image = np.frombuffer(data, dtype=np.uint8).reshape(shape)
+            return image
+            
+    except Exception as e:
+        print(f"Error loading encrypted image: {e}")
+        return None
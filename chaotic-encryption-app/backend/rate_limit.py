@@ -0,0 +1,176 @@
+"""
+Per-API-key rate limiting with token buckets.
+
+Each key gets a bucket holding up to ``limit`` tokens that refills at
+``limit / window`` tokens per second; a request spends one token. This keeps
+the "N requests per hour" contract of the old hourly counters without their
+cliff at the top of every hour, and a bucket's state is two numbers.
+
+A bucket that has been idle for a whole window is full again, i.e. identical
+to a bucket that does not exist, so expiry never has to scan: stores keep
+buckets in last-touched order and drop the stale ones from the front.
+
+Stores:
+    MemoryStore  - per-process dict (default)
+    SQLiteStore  - one SQLite file shared by all gunicorn workers on a host
+
+Usage:
+    limiter = RateLimiter(SQLiteStore('rate_limits.db'))
+    allowed, remaining = limiter.check(bucket_id, limit=100)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+
+DEFAULT_WINDOW = 3600.0  # seconds for a bucket to refill completely
+
+
+def _refill(tokens: float, updated: float, now: float, limit: int, window: float) -> float:
+    return min(float(limit), tokens + (now - updated) * limit / window)
+
+
+class MemoryStore:
+    """
+    In-process bucket store. Limits are per worker process.
+
+    Buckets live in an OrderedDict ordered by last use, so check and expiry
+    are both amortized O(1).
+    """
+
+    def __init__(self):
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, bucket_id: str, limit: int, window: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            self._expire(now - window)
+            state = self._buckets.pop(bucket_id, None)
+            tokens = float(limit) if state is None else _refill(*state, now, limit, window)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[bucket_id] = (tokens, now)
+            return allowed, tokens
+
+    def _expire(self, cutoff: float) -> None:
+        while self._buckets:
+            bucket_id, (_, updated) = next(iter(self._buckets.items()))
+            if updated > cutoff:
+                break
+            del self._buckets[bucket_id]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteStore:
+    """
+    Bucket store in a local SQLite file, shared by every process that opens it.
+
+    Each check is one short write transaction on an indexed row; stale rows are
+    deleted through the ``updated`` index every ``expire_every`` checks.
+    """
+
+    def __init__(self, path: str, expire_every: int = 256, timeout: float = 5.0):
+        self.path = path
+        self.expire_every = max(1, int(expire_every))
+        self.timeout = timeout
+        self._local = threading.local()
+        self._calls = 0
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            ' id TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS buckets_updated ON buckets(updated)')
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, bucket_id: str, limit: int, window: float, now: float) -> Tuple[bool, float]:
+        conn = self._conn()
+        self._calls += 1
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._calls % self.expire_every == 0:
+                conn.execute('DELETE FROM buckets WHERE updated <= ?', (now - window,))
+            row = conn.execute(
+                'SELECT tokens, updated FROM buckets WHERE id = ?', (bucket_id,)
+            ).fetchone()
+            tokens = float(limit) if row is None else _refill(row[0], row[1], now, limit, window)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (id, tokens, updated) VALUES (?, ?, ?)',
+                (bucket_id, tokens, now),
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tokens
+
+    def __len__(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM buckets').fetchone()[0]
+
+    def clear(self) -> None:
+        self._conn().execute('DELETE FROM buckets')
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter over a pluggable store.
+
+    Args:
+        store: Bucket store (MemoryStore by default)
+        window: Seconds for an empty bucket to refill to ``limit``
+        clock: Time source, injectable for tests
+    """
+
+    def __init__(self, store=None, window: float = DEFAULT_WINDOW,
+                 clock: Callable[[], float] = time.time):
+        self.store = store if store is not None else MemoryStore()
+        self.window = float(window)
+        self.clock = clock
+
+    def check(self, bucket_id: str, limit: int) -> Tuple[bool, int]:
+        """
+        Spend one token from ``bucket_id``.
+
+        Returns:
+            (allowed, remaining) - remaining whole requests in the bucket
+        """
+        limit = int(limit)
+        if limit <= 0:
+            return False, 0
+        allowed, tokens = self.store.take(bucket_id, limit, self.window, self.clock())
+        return allowed, int(tokens)
+
+    def reset(self) -> None:
+        self.store.clear()
+
+
+def limiter_from_env(path: Optional[str] = None) -> RateLimiter:
+    """
+    Build the limiter configured by RATE_LIMIT_DB (a SQLite path shared by all
+    workers); without it, limits are kept in memory per process.
+    """
+    path = path or os.getenv('RATE_LIMIT_DB')
+    return RateLimiter(SQLiteStore(path) if path else MemoryStore())
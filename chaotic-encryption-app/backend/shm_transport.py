@@ -0,0 +1,199 @@
+"""
+Shared-memory array transport between the web process and worker processes.
+
+An image crosses the process boundary as an ``ArrayDescriptor`` - the name of
+a ``multiprocessing.shared_memory`` segment plus shape and dtype - instead of
+a pickled copy. The owning process keeps a ``SegmentPool`` of reusable
+segments (creating and unlinking a segment per request costs a syscall pair
+and page faults on every call); workers map segments with ``attach`` and keep
+recently used mappings open, so a reused segment is not re-mapped either.
+
+Typical flow (see executor.py):
+
+    pool = SegmentPool()
+    src = pool.put(image)                        # one copy into shared memory
+    dst = pool.empty(image.shape, image.dtype)   # preallocated result block
+    worker(src.descriptor, dst.descriptor)       # worker writes via attach()
+    result = dst.array.copy()
+    pool.release(src); pool.release(dst)
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class ArrayDescriptor(NamedTuple):
+    """Picklable handle to an array living in a shared memory segment."""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+# Segments are allocated in size classes so blocks can be reused for
+# images of similar (not only identical) size.
+MIN_SEGMENT_BYTES = 64 * 1024
+
+
+def _size_class(nbytes: int) -> int:
+    size = MIN_SEGMENT_BYTES
+    while size < nbytes:
+        size <<= 1
+    return size
+
+
+class Segment:
+    """A leased shared memory segment holding one array."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: np.dtype):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def descriptor(self) -> ArrayDescriptor:
+        return ArrayDescriptor(self.shm.name, self.shape, self.dtype.str)
+
+    @property
+    def array(self) -> np.ndarray:
+        """Writable view of the array stored in this segment."""
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+
+class SegmentPool:
+    """
+    Thread-safe pool of reusable shared memory segments owned by this process.
+
+    Args:
+        max_free_bytes: Upper bound on the size of idle segments kept for reuse;
+            segments released beyond it are unlinked immediately
+    """
+
+    def __init__(self, max_free_bytes: int = 512 * 1024 * 1024):
+        self.max_free_bytes = int(max_free_bytes)
+        self._free: Dict[int, List[shared_memory.SharedMemory]] = {}
+        self._free_bytes = 0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype) -> Segment:
+        """Lease a segment large enough for an array of ``shape``/``dtype``."""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        size = _size_class(nbytes)
+        with self._lock:
+            bucket = self._free.get(size)
+            if bucket:
+                shm = bucket.pop()
+                self._free_bytes -= size
+                self.reused += 1
+                return Segment(shm, shape, dtype)
+            self.created += 1
+        # Unique (not OS-random 32-bit) names: workers cache mappings by name
+        name = f"enc_{uuid.uuid4().hex[:24]}"
+        return Segment(shared_memory.SharedMemory(name=name, create=True, size=size), shape, dtype)
+
+    def put(self, array: np.ndarray) -> Segment:
+        """Copy ``array`` into a leased segment."""
+        seg = self.acquire(array.shape, array.dtype)
+        seg.array[...] = array
+        return seg
+
+    def empty(self, shape: Tuple[int, ...], dtype) -> Segment:
+        """Lease an uninitialised segment, e.g. for a worker to write its result into."""
+        return self.acquire(shape, dtype)
+
+    def release(self, seg: Segment) -> None:
+        """Return a segment to the pool (or unlink it when the pool is full)."""
+        size = seg.shm.size
+        with self._lock:
+            if self._free_bytes + size <= self.max_free_bytes:
+                self._free.setdefault(size, []).append(seg.shm)
+                self._free_bytes += size
+                return
+        _destroy(seg.shm)
+
+    def discard(self, seg: Segment) -> None:
+        """Unlink a segment that must not be reused (e.g. a worker may still write to it)."""
+        _destroy(seg.shm)
+
+    def close(self) -> None:
+        """Unlink every idle segment."""
+        with self._lock:
+            segments = [shm for bucket in self._free.values() for shm in bucket]
+            self._free.clear()
+            self._free_bytes = 0
+        for shm in segments:
+            _destroy(shm)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'free_segments': sum(len(b) for b in self._free.values()),
+                'free_bytes': self._free_bytes,
+            }
+
+
+def _destroy(shm: shared_memory.SharedMemory) -> None:
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+# ---------------------------
+# Worker side
+# ---------------------------
+
+# Recently attached segments, kept mapped because the owner reuses them
+MAX_ATTACHED = 16
+_attached: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+_attach_lock = threading.Lock()
+
+
+def attach(desc: ArrayDescriptor) -> np.ndarray:
+    """
+    Map the array described by ``desc`` in the current (worker) process.
+
+    The mapping is cached; the owning process remains responsible for
+    unlinking the segment.
+    """
+    name, shape, dtype = desc
+    with _attach_lock:
+        shm = _attached.get(name)
+        if shm is None:
+            # Pool workers share the owner's resource tracker (spawn and fork
+            # both hand it down), where registering an existing name again is
+            # a no-op; the owner's unlink is what unregisters the segment.
+            shm = shared_memory.SharedMemory(name=name)
+            _attached[name] = shm
+            while len(_attached) > MAX_ATTACHED:
+                _, old = _attached.popitem(last=False)
+                _close_quietly(old)
+        else:
+            _attached.move_to_end(name)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def detach_all() -> None:
+    """Close every cached mapping in this process."""
+    with _attach_lock:
+        while _attached:
+            _, shm = _attached.popitem()
+            _close_quietly(shm)
+
+
+def _close_quietly(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # An array view is still alive; the mapping goes away with it
+        pass
@@ -0,0 +1,104 @@
+"""
+Band-by-band encryption of images stored as .npy files, for images too large for memory.
+
+The source is memory-mapped read-only and the result is written through a
+memory-mapped destination, one band of rows at a time (see
+``EncryptorInterface.encrypt_stream``), so peak memory depends on the band
+size and image width, not on the image height. Only algorithms whose stages
+stream support this: ``aes`` and ``2dlasm``. The output equals what
+``encrypt_image`` would produce for the whole array.
+
+Usage:
+    python streaming.py scan.npy scan.enc.npy --algorithm 2dlasm --key-file key.txt
+    python streaming.py scan.enc.npy scan.dec.npy --algorithm 2dlasm --key-file key.txt --decrypt
+
+    from streaming import stream_file
+    stream_file('scan.npy', 'scan.enc.npy', 'aes', key)
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from encryption.registry import get_encryptor
+
+
+def stream_file(src_path: str, dst_path: str, algorithm: str, key: str, decrypt: bool = False,
+                band_rows: Optional[int] = None, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Encrypt (or decrypt) the array in ``src_path`` into a new .npy file at ``dst_path``.
+
+    The destination is written under a temporary name and renamed when
+    complete, so an interrupted run never leaves a partial file behind.
+
+    Returns:
+        Summary with algorithm, shape, dtype, seconds and MB/s
+
+    Raises:
+        ValueError: If the source is not a valid image array or the key is empty
+        NotImplementedError: If the algorithm cannot stream
+    """
+    encryptor = get_encryptor(algorithm, **(config or {}))
+    if not encryptor.supports_streaming():
+        raise NotImplementedError(f"{algorithm} does not support streaming")
+    src = np.load(src_path, mmap_mode='r')
+
+    tmp_path = dst_path + '.part'
+    dst = open_memmap(tmp_path, mode='w+', dtype=src.dtype, shape=src.shape)
+    start = time.perf_counter()
+    try:
+        run = encryptor.decrypt_stream if decrypt else encryptor.encrypt_stream
+        run(src, dst, key, band_rows)
+        dst.flush()
+    except BaseException:
+        del dst
+        os.remove(tmp_path)
+        raise
+    del dst
+    os.replace(tmp_path, dst_path)
+    elapsed = time.perf_counter() - start
+    return {
+        'algorithm': algorithm,
+        'shape': list(src.shape),
+        'dtype': str(src.dtype),
+        'seconds': elapsed,
+        'mb_per_s': src.nbytes / 1e6 / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Encrypt a large .npy image band by band through memory maps.")
+    p.add_argument("src", help="Source .npy file.")
+    p.add_argument("dst", help="Destination .npy file.")
+    p.add_argument("--algorithm", default="aes", help="Registry algorithm name (aes or 2dlasm).")
+    keys = p.add_mutually_exclusive_group()
+    keys.add_argument("--key", default="super-secret-key")
+    keys.add_argument("--key-file", default=None, help="Read the key from this file instead.")
+    p.add_argument("--decrypt", action="store_true", help="Decrypt instead of encrypt.")
+    p.add_argument("--band-rows", type=int, default=None, help="Rows per band (default: about 4 MB).")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    key = args.key
+    if args.key_file:
+        with open(args.key_file, encoding='utf-8') as f:
+            key = f.read().strip()
+    try:
+        summary = stream_file(args.src, args.dst, args.algorithm, key, args.decrypt, args.band_rows)
+    except (ValueError, NotImplementedError) as e:
+        print(f"[stream] {e}", file=sys.stderr)
+        return 2
+    print(f"[stream] {summary['algorithm']} {tuple(summary['shape'])} {summary['dtype']}: "
+          f"{summary['seconds']:.2f}s, {summary['mb_per_s']:.1f} MB/s -> {args.dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
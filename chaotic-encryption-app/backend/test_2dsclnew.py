@@ -6,15 +6,13 @@ import cv2
 import traceback
 
 
-# --- matplotlib headless for Windows without Tk ---
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
 # Import project modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from encryption.acm_2dscl import HybridEncryptorFB
-from utils import analyze_encryption_quality, generate_histogram_data
+from encryption.encryptor_interface import EncryptorInterface
+from encryption.registry import get_encryptor
+from benchmarks.suite import roundtrip
+from histograms import HISTOGRAM_DIR, HISTOGRAM_FORMATS, gray_histogram, render_histograms, save_histograms
+from utils import analyze_encryption_quality
 
 DEFAULT_OUT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_results")
 VALID_EXTS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"}
@@ -29,14 +27,6 @@ def maybe_downscale(img, max_pixels: int):
     print(f"[demo] Downscaling from {W}x{H} to {newW}x{newH} for speed.")
     return cv2.resize(img, (newW, newH), interpolation=cv2.INTER_AREA)
 
-def roundtrip(enc, img, key, nonce):
-    t0 = time.perf_counter()
-    C = enc.encrypt_image(img, key, nonce)
-    t1 = time.perf_counter()
-    P = enc.decrypt_image(C, key, nonce)
-    t2 = time.perf_counter()
-    return C, P, (t1 - t0), (t2 - t1)
-
 def fmt(v, d=3):
     if v is None: return ""
     if isinstance(v, (float, np.floating)):
@@ -44,19 +34,6 @@ def fmt(v, d=3):
         if math.isnan(v): return "nan"
     return f"{float(v):.{d}f}"
 
-def save_histogram(image: np.ndarray, out_path: str, title: str):
-    h = generate_histogram_data(image)
-    bins = np.array(h["bins"])
-    vals = np.array(h["values"], dtype=float)
-    plt.figure()
-    plt.bar(bins, vals, width=1.0)
-    plt.title(title)
-    plt.xlabel("Intensity (0–255)")
-    plt.ylabel("Frequency")
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=120)
-    plt.close()
-
 def sanitize_for_json(obj):
     if isinstance(obj, dict):
         return {k: sanitize_for_json(v) for k, v in obj.items()}
@@ -104,7 +81,8 @@ def save_image_set(run_dir_img: str, bgr_q, gray_q, C_bgr, P_bgr, C_g, P_g):
     cv2.imwrite(os.path.join(run_dir_img, "cipher_gray.png"), C_g)
     cv2.imwrite(os.path.join(run_dir_img, "plain_recovered_gray.png"), P_g)
 
-def process_one(enc: HybridEncryptorFB, image_path: str, run_dir: str, key: str, nonce: str, max_pixels: int):
+def process_one(enc: EncryptorInterface, image_path: str, run_dir: str, key: str, max_pixels: int,
+                hist_format: str = "npz"):
     stem = os.path.splitext(os.path.basename(image_path))[0]
     out_dir = os.path.join(run_dir, stem)
     os.makedirs(out_dir, exist_ok=True)
@@ -117,19 +95,18 @@ def process_one(enc: HybridEncryptorFB, image_path: str, run_dir: str, key: str,
     bgr_q = maybe_downscale(bgr, max_pixels=max_pixels)
     gray_q = maybe_downscale(gray, max_pixels=max_pixels)
 
-    C_bgr, P_bgr, te_bgr, td_bgr = roundtrip(enc, bgr_q, key, nonce)
-    C_g,   P_g,   te_g,   td_g   = roundtrip(enc, gray_q, key, nonce)
+    C_bgr, P_bgr, te_bgr, td_bgr = roundtrip(enc, bgr_q, key)
+    C_g,   P_g,   te_g,   td_g   = roundtrip(enc, gray_q, key)
 
     # roundtrip asserts
     assert np.array_equal(P_bgr, bgr_q), f"BGR roundtrip failed for {image_path}"
     assert np.array_equal(P_g,   gray_q), f"GRAY roundtrip failed for {image_path}"
 
     # Determinism/sensitivity quick checks on gray
-    C1 = enc.encrypt_image(gray_q, key, nonce)
-    C2 = enc.encrypt_image(gray_q, key, nonce)
+    C1 = enc.encrypt_image(gray_q, key)
+    C2 = enc.encrypt_image(gray_q, key)
     assert np.array_equal(C1, C2), "Cipher not deterministic"
-    assert not np.array_equal(C1, enc.encrypt_image(gray_q, key, nonce + "x")), "Nonce change ineffective"
-    assert not np.array_equal(C1, enc.encrypt_image(gray_q, key + "x", nonce)), "Key change ineffective"
+    assert not np.array_equal(C1, enc.encrypt_image(gray_q, key + "x")), "Key change ineffective"
 
     # Quality metrics
     m_bgr  = analyze_encryption_quality(bgr_q, C_bgr, P_bgr)
@@ -144,14 +121,12 @@ def process_one(enc: HybridEncryptorFB, image_path: str, run_dir: str, key: str,
     print("  [BGR]  " + _adj_line(m_bgr))
     print("  [GRAY] " + _adj_line(m_gray))
 
-    # Save images + histograms
+    # Save images + histogram counts (charts: --plots, or histograms.py afterwards)
     save_image_set(out_dir, bgr_q, gray_q, C_bgr, P_bgr, C_g, P_g)
-    save_histogram(bgr_q, os.path.join(out_dir, "hist_bgr_plain.png"),     f"{stem} — BGR (plain→gray)")
-    save_histogram(C_bgr, os.path.join(out_dir, "hist_bgr_cipher.png"),    f"{stem} — BGR cipher (gray)")
-    save_histogram(P_bgr, os.path.join(out_dir, "hist_bgr_decrypted.png"), f"{stem} — BGR decrypted (gray)")
-    save_histogram(gray_q, os.path.join(out_dir, "hist_gray_plain.png"),     f"{stem} — GRAY plain")
-    save_histogram(C_g,    os.path.join(out_dir, "hist_gray_cipher.png"),    f"{stem} — GRAY cipher")
-    save_histogram(P_g,    os.path.join(out_dir, "hist_gray_decrypted.png"), f"{stem} — GRAY decrypted")
+    save_histograms(os.path.join(out_dir, HISTOGRAM_DIR, "hist"), hist_format,
+                    bgr_plain=gray_histogram(bgr_q), bgr_cipher=gray_histogram(C_bgr),
+                    bgr_decrypted=gray_histogram(P_bgr), gray_plain=gray_histogram(gray_q),
+                    gray_cipher=gray_histogram(C_g), gray_decrypted=gray_histogram(P_g))
 
     # Save per-image metrics
     with open(os.path.join(out_dir, "metrics_bgr.json"), "w", encoding="utf-8") as f:
@@ -231,11 +206,12 @@ def parse_args():
     p.add_argument("--images-dir", default="test_images", help="Directory containing test images.")
     p.add_argument("--recursive", action="store_true", help="Recurse into subfolders.")
     p.add_argument("--key", default="super-secret-key")
-    p.add_argument("--nonce", default="img-001")
     p.add_argument("--mem-window", type=int, default=128, help="LASM memory window.")
     p.add_argument("--max-pixels", type=int, default=256*256, help="Auto-downscale target pixels.")
     p.add_argument("--out-root", default=DEFAULT_OUT_ROOT, help="Root folder for test_results.")
     p.add_argument("--label", default=None, help="Optional label for the run folder.")
+    p.add_argument("--histograms", choices=HISTOGRAM_FORMATS, default="npz", help="Histogram data format.")
+    p.add_argument("--plots", action="store_true", help="Render histogram PNGs after the run (imports matplotlib).")
     p.add_argument("--debug", action="store_true", help="Print full tracebacks on errors.")
     return p.parse_args()
 
@@ -245,7 +221,7 @@ def main():
     run_dir = make_run_dir(args.out_root, args.label, args.mem_window, args.max_pixels, args.images_dir)
     print(f"[demo] Run folder: {run_dir}")
 
-    enc = HybridEncryptorFB()
+    enc = get_encryptor("acm_2dscl")
 
     all_rows, all_timings, errors = [], {}, {}
     count = 0
@@ -253,7 +229,7 @@ def main():
         count += 1
         print(f"\n[{count}] Processing {img_path}")
         try:
-            row, timings = process_one(enc, img_path, run_dir, args.key, args.nonce, args.max_pixels)
+            row, timings = process_one(enc, img_path, run_dir, args.key, args.max_pixels, args.histograms)
             all_rows.append(row)
             all_timings[os.path.basename(img_path)] = timings
         except Exception as e:
@@ -280,13 +256,16 @@ def main():
             "recursive": args.recursive,
             "memory_window": args.mem_window,
             "max_pixels": args.max_pixels,
-            "key_len": len(args.key),
-            "nonce": args.nonce
+            "histograms": args.histograms,
+            "key_len": len(args.key)
         }, f, indent=2)
     if errors:
         with open(os.path.join(run_dir, "errors.json"), "w", encoding="utf-8") as f:
             json.dump(errors, f, indent=2)
 
+    if args.plots:
+        print(f"[demo] Rendered {render_histograms(run_dir)} histogram charts.")
+
     print(f"\nDone. Processed {len(all_rows)} images, {len(errors)} errors.")
     print(f"Artifacts saved under: {run_dir}")
 
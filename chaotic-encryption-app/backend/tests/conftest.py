@@ -0,0 +1,28 @@
+# tests/conftest.py
+#
+# Benchmark gate options (see benchmarks/gate.py). The gate tests are skipped
+# unless enabled:
+#   pytest tests/test_benchmark_gate.py --benchmark=warn
+#   BENCHMARK_GATE=fail BENCHMARK_THRESHOLD=0.5 pytest tests/
+
+import os
+
+# The API tests authenticate with the in-memory development keys (dev_key_1, dev_key_2)
+os.environ.setdefault('FLASK_ENV', 'development')
+
+BENCHMARK_MODES = ('off', 'warn', 'fail')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark')
+    group.addoption('--benchmark', choices=BENCHMARK_MODES, default=os.getenv('BENCHMARK_GATE', 'off'),
+                    help='Run the benchmark regression gate: warn or fail on regressions (env BENCHMARK_GATE).')
+    group.addoption('--benchmark-threshold', type=float, default=float(os.getenv('BENCHMARK_THRESHOLD', '0.25')),
+                    help='Allowed relative slowdown of median times (env BENCHMARK_THRESHOLD).')
+    group.addoption('--benchmark-memory-threshold', type=float,
+                    default=float(os.getenv('BENCHMARK_MEMORY_THRESHOLD', '0.10')),
+                    help='Allowed relative growth of peak memory (env BENCHMARK_MEMORY_THRESHOLD).')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: benchmark regression gate (enable with --benchmark)')
@@ -0,0 +1,67 @@
+# tests/test_aes_gcm.py
+
+import numpy as np
+import pytest
+from Crypto.Cipher import AES
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encryption.aes_gcm_encryptor import AESGCMEncryptor, HEADER_BYTES
+from encryption.registry import get_encryptor
+
+@pytest.mark.parametrize("shape,dtype", [((37, 23, 3), np.uint8), ((9, 11), np.uint16),
+                                         ((1, 1), np.uint8), ((5, 7, 1), np.uint8)])
+def test_roundtrip_and_container_shape(shape, dtype):
+    enc = get_encryptor("aes_gcm")
+    img = np.random.default_rng(0).integers(0, 256, size=shape).astype(dtype)
+    cipher = enc.encrypt_image(img, "k")
+    assert cipher.dtype == img.dtype and cipher.shape == AESGCMEncryptor.container_shape(shape, dtype)
+    assert cipher.shape[1:] == img.shape[1:] and cipher.flags.writeable
+    plain = enc.decrypt_image(cipher, "k")
+    assert plain.shape == img.shape and np.array_equal(plain, img)
+
+def test_random_nonce_per_image():
+    enc = get_encryptor("aes_gcm")
+    img = np.zeros((16, 16, 3), np.uint8)
+    a, b = enc.encrypt_image(img, "k"), enc.encrypt_image(img, "k")
+    assert not np.array_equal(a, b)
+    assert np.array_equal(enc.decrypt_image(a, "k"), enc.decrypt_image(b, "k"))
+
+def test_container_matches_reference_gcm():
+    enc = AESGCMEncryptor()
+    img = np.random.default_rng(1).integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    container = enc.encrypt_image(img, "k")
+    header = container.tobytes()[img.nbytes:]
+    assert header[:4] == b"AGCM" and not any(header[HEADER_BYTES:])
+    ref = AES.new(enc._derive_key("k"), AES.MODE_GCM, nonce=header[4:16], mac_len=16)
+    ref.update(b"aes_gcm:v1:|u1:8x8x3")
+    body, tag = ref.encrypt_and_digest(img.tobytes())
+    assert container.tobytes()[:img.nbytes] == body and header[16:32] == tag
+
+def test_tampering_and_wrong_key_rejected():
+    enc = get_encryptor("aes_gcm")
+    img = np.random.default_rng(2).integers(0, 256, size=(12, 10, 3), dtype=np.uint8)
+    cipher = enc.encrypt_image(img, "k")
+    with pytest.raises(ValueError):
+        enc.decrypt_image(cipher, "other")
+    for index in ((0, 0, 0), (-1, -1, -1), (cipher.shape[0] - 2, 0, 0)):
+        bad = cipher.copy()
+        bad[index] ^= 1
+        with pytest.raises(ValueError):
+            enc.decrypt_image(bad, "k")
+    # Shape is authenticated: the same bytes read as a (12, 30, 1) image fail
+    with pytest.raises(ValueError):
+        enc.decrypt_image(cipher.reshape(cipher.shape[0], 30, 1), "k")
+    with pytest.raises(ValueError):
+        enc.decrypt_image(np.zeros((1, 4), np.uint8), "k")
+
+def test_batches_roundtrip_and_plans_unsupported():
+    enc = get_encryptor("aes_gcm")
+    frames = np.random.default_rng(3).integers(0, 256, size=(4, 6, 6, 3), dtype=np.uint8)
+    ciphers = enc.encrypt_batch(frames, "k")
+    assert np.array_equal(enc.decrypt_batch(ciphers, "k"), frames)
+    with pytest.raises(NotImplementedError):
+        enc.prepare("k", (6, 6, 3))
+    with pytest.raises(NotImplementedError):
+        enc.encrypt_stream(frames[0], np.empty_like(frames[0]), "k")
@@ -0,0 +1,72 @@
+# tests/test_aes_parallel.py
+
+import numpy as np
+import pytest
+from Crypto.Cipher import AES
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encryption.aes_encryptor import AESEncryptor
+from encryption.registry import get_encryptor
+
+def single_shot(image, key_bytes, initial_value):
+    # The original implementation: one AES-CTR call over image.tobytes()
+    cipher = AES.new(key_bytes, AES.MODE_CTR, nonce=b"", initial_value=initial_value)
+    return cipher.encrypt(image.tobytes())
+
+@pytest.mark.parametrize("threads,chunk_bytes", [(1, 1 << 20), (2, 16), (3, 48), (8, 100)])
+def test_chunked_ciphertext_is_byte_identical(threads, chunk_bytes):
+    enc = AESEncryptor(threads=threads, chunk_bytes=chunk_bytes)
+    rng = np.random.default_rng(0)
+    for img in (rng.integers(0, 256, size=(37, 23, 3), dtype=np.uint8),
+                rng.integers(0, 60000, size=(9, 11), dtype=np.uint16),
+                rng.integers(0, 256, size=(40, 40), dtype=np.uint8)[::2, ::3]):
+        cipher = enc.encrypt_image(img, "k")
+        assert cipher.shape == img.shape and cipher.dtype == img.dtype
+        assert cipher.tobytes() == single_shot(img, *enc._derive_key_and_counter("k"))
+        assert np.array_equal(enc.decrypt_image(cipher, "k"), img)
+
+def test_counter_wraps_like_single_shot():
+    enc = AESEncryptor(threads=4, chunk_bytes=32)
+    enc._derive_key_and_counter = lambda key: (b"\x02" * 32, (1 << 128) - 3)
+    img = np.random.default_rng(1).integers(0, 256, size=(20, 20), dtype=np.uint8)
+    assert enc.encrypt_image(img, "k").tobytes() == single_shot(img, b"\x02" * 32, (1 << 128) - 3)
+
+def test_threads_config():
+    assert get_encryptor("aes", threads=4).threads == 4
+    with pytest.raises(ValueError):
+        AESEncryptor(threads=0)
+    with pytest.raises(ValueError):
+        AESEncryptor(chunk_bytes=8)
+
+def test_out_buffer_and_writable_result():
+    enc = AESEncryptor(threads=2, chunk_bytes=64)
+    img = np.random.default_rng(2).integers(0, 256, size=(17, 9, 3), dtype=np.uint8)
+    expected = enc.encrypt_image(img, "k")
+    assert expected.flags.writeable and expected.flags.owndata
+
+    out = np.empty_like(img)
+    assert enc.encrypt_image(img, "k", out=out) is out
+    assert np.array_equal(out, expected)
+
+    inplace = img.copy()
+    assert enc.encrypt_image(inplace, "k", out=inplace) is inplace
+    assert np.array_equal(inplace, expected)
+    enc.decrypt_image(inplace, "k", out=inplace)
+    assert np.array_equal(inplace, img)
+
+def test_out_buffer_validation():
+    enc = AESEncryptor()
+    img = np.zeros((8, 8), np.uint8)
+    for bad in (np.empty((8, 9), np.uint8), np.empty((8, 8), np.uint16),
+                np.empty((8, 16), np.uint8)[:, ::2], np.empty((8, 8), np.uint8)[::-1]):
+        with pytest.raises(ValueError):
+            enc.encrypt_image(img, "k", out=bad)
+    frozen = np.empty_like(img)
+    frozen.flags.writeable = False
+    with pytest.raises(ValueError):
+        enc.encrypt_image(img, "k", out=frozen)
+    buf = np.zeros(72, np.uint8)
+    with pytest.raises(ValueError):
+        enc.encrypt_image(buf[:64].reshape(8, 8), "k", out=buf[8:].reshape(8, 8))
@@ -0,0 +1,143 @@
+# tests/test_api_keys.py
+
+import json
+import subprocess
+
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import APIKeyManager, _h
+from key_store import KeyStore
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "keys.db")
+
+def manager(db, **kwargs):
+    kwargs.setdefault("dev_keys", True)
+    return APIKeyManager(store=KeyStore(db), **kwargs)
+
+def env_keys(monkeypatch, **keys):
+    """Set API_KEYS to {hash(key): record} for the given key=(name, permissions, rate_limit)"""
+    monkeypatch.setenv("API_KEYS", json.dumps({
+        _h(key): {"name": name, "permissions": permissions, "rate_limit": rate_limit}
+        for key, (name, permissions, rate_limit) in keys.items()
+    }))
+
+def test_repeat_validation_hits_cache(db):
+    mgr = manager(db, cache_ttl=60, flush_interval=3600)
+    assert mgr.validate_api_key("dev_key_1")["name"] == "Development Key 1"
+    assert mgr.resolve_api_key("dev_key_1")[0] == _h("dev_key_1")
+    assert mgr.validate_api_key("wrong") is None
+    stats = mgr.stats.snapshot()
+    assert stats["cache_hits"] == 1 and stats["rejected"] == 1 and stats["calls"] == 3
+
+def test_last_used_is_batched_and_persisted(db):
+    mgr = manager(db, flush_interval=3600)
+    key = mgr.generate_new_key("used", ["encrypt"])
+    info = mgr.validate_api_key(key)
+    assert info["last_used"] is None
+    mgr.flush_last_used()
+    assert info["last_used"] is not None
+    assert KeyStore(db).get(_h(key))["last_used"] == info["last_used"]
+
+def test_revoked_key_is_rejected_while_cached(db):
+    mgr = manager(db, cache_ttl=60)
+    key = mgr.generate_new_key("revoked", ["encrypt"])
+    assert mgr.validate_api_key(key) is not None
+    assert mgr.revoke_api_key(_h(key))
+    assert mgr.validate_api_key(key) is None
+
+def test_expired_entry_is_rehashed(db):
+    mgr = manager(db, cache_ttl=0)
+    mgr.validate_api_key("dev_key_1")
+    mgr.validate_api_key("dev_key_1")
+    assert mgr.stats.snapshot()["cache_hits"] == 0
+
+def test_keys_are_shared_between_workers(db):
+    a, b = manager(db, refresh_interval=0), manager(db, refresh_interval=0)
+    new_key = a.generate_new_key("shared", ["encrypt"])
+    assert b.validate_api_key(new_key)["name"] == "shared"
+    a.revoke_api_key(_h(new_key))
+    assert b.validate_api_key(new_key) is None
+    # ... and survive a restart
+    kept = a.generate_new_key("kept", ["encrypt"])
+    assert manager(db).validate_api_key(kept)["permissions"] == ["encrypt"]
+
+def test_env_keys_seed_the_store(db, monkeypatch):
+    env_keys(monkeypatch, env=("Env", ["admin"], 5))
+    mgr = manager(db, dev_keys=False)
+    assert mgr.validate_api_key("env")["rate_limit"] == 5
+    assert mgr.validate_api_key("dev_key_1") is None
+
+def test_api_keys_is_the_source_of_truth(db, monkeypatch):
+    env_keys(monkeypatch, a=("A", ["encrypt"], 5), b=("B", ["encrypt"], 5))
+    first = manager(db, dev_keys=False)
+    generated = first.generate_new_key("generated", ["encrypt"])
+    assert first.validate_api_key("b") is not None
+
+    # Restart with b removed and a edited: b is revoked, a changes, generated keys stay
+    env_keys(monkeypatch, a=("A", ["encrypt", "admin"], 50))
+    mgr = manager(db, dev_keys=False)
+    assert mgr.validate_api_key("a")["rate_limit"] == 50
+    assert mgr.validate_api_key("a")["permissions"] == ["encrypt", "admin"]
+    assert mgr.validate_api_key("b") is None
+    assert mgr.validate_api_key(generated)["source"] == "generated"
+
+    # An unchanged API_KEYS does not bump the revision
+    rev = KeyStore(db).revision()
+    manager(db, dev_keys=False).validate_api_key("a")
+    assert KeyStore(db).revision() == rev
+
+def test_dev_keys_are_opt_in_and_never_persisted(db, monkeypatch):
+    assert manager(db).validate_api_key("dev_key_1") is not None
+    assert KeyStore(db).get(_h("dev_key_1")) is None and len(KeyStore(db)) == 0
+
+    monkeypatch.setenv("FLASK_ENV", "production")
+    assert APIKeyManager(store=KeyStore(db)).validate_api_key("dev_key_1") is None
+
+def test_api_keys_may_list_a_dev_key_hash(db, monkeypatch):
+    env_keys(monkeypatch, dev_key_1=("Listed", ["encrypt"], 7))
+    assert manager(db, dev_keys=False).validate_api_key("dev_key_1")["rate_limit"] == 7
+    assert KeyStore(db).get(_h("dev_key_1"))["source"] == "env"
+
+def test_revision_ignores_last_used(db):
+    store = KeyStore(db)
+    key = manager(db).generate_new_key("used", ["encrypt"])
+    rev = store.revision()
+    store.touch_many([(_h(key), "2024-01-01T00:00:00")])
+    assert store.revision() == rev
+
+def test_stats_endpoint_requires_admin(db, monkeypatch):
+    mgr = manager(db)
+    monkeypatch.setattr(app_module, "api_key_manager", mgr)
+    client = app_module.app.test_client()
+    assert client.get("/api/keys/stats", headers={"X-API-Key": "dev_key_1"}).status_code == 403
+    admin = mgr.generate_new_key("admin", ["admin"])
+    r = client.get("/api/keys/stats", headers={"X-API-Key": admin})
+    assert r.status_code == 200 and r.get_json()["validation"]["calls"] >= 2
+
+def test_revoke_route(db, monkeypatch):
+    mgr = manager(db, refresh_interval=0)
+    monkeypatch.setattr(app_module, "api_key_manager", mgr)
+    client = app_module.app.test_client()
+    admin = {"X-API-Key": mgr.generate_new_key("admin", ["admin"])}
+    key = mgr.generate_new_key("victim", ["encrypt"])
+    listed = client.get("/api/keys", headers=admin).get_json()["api_keys"]
+    assert _h(key) in {k["key_hash"] for k in listed}
+
+    assert client.delete(f"/api/keys/{_h(key)}", headers={"X-API-Key": "dev_key_1"}).status_code == 403
+    assert client.delete(f"/api/keys/{_h(key)}", headers=admin).status_code == 200
+    assert mgr.validate_api_key(key) is None
+    assert client.delete(f"/api/keys/{_h(key)}", headers=admin).status_code == 404
+
+def test_import_has_no_filesystem_side_effects(tmp_path):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=backend, FLASK_ENV="development")
+    for name in ("API_KEY_DB", "JOB_FOLDER", "RATE_LIMIT_DB"):
+        env.pop(name, None)
+    subprocess.run([sys.executable, "-c", "import app"], cwd=tmp_path, env=env, check=True)
+    assert not [p for p in os.listdir(tmp_path) if p != "__pycache__"]
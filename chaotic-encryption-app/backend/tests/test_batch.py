@@ -0,0 +1,115 @@
+# tests/test_batch.py
+
+import csv
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import load_results, main, run_batch
+from pipeline import load_encrypted_image
+from encryption.registry import get_encryptor
+
+def make_images(folder, n=3, size=(12, 10)):
+    rng = np.random.default_rng(0)
+    (folder / "sub").mkdir(parents=True)
+    images = {}
+    for i in range(n):
+        name = f"img{i}.png" if i else "sub/img0.png"
+        img = rng.integers(0, 256, size=(*size, 3), dtype=np.uint8)
+        cv2.imwrite(str(folder / name), img)
+        images[name] = img
+    return images
+
+def test_batch_writes_results_and_ciphertexts(tmp_path):
+    images = make_images(tmp_path / "in")
+    out = tmp_path / "out"
+    summary = run_batch(str(tmp_path / "in"), str(out), "aes", "k", workers=0, recursive=True)
+    assert summary["processed"] == 3 and summary["errors"] == 0 and summary["complete"]
+    assert summary["bytes"] == sum(img.nbytes for img in images.values())
+
+    results = load_results(str(out))
+    assert set(results) == set(images)
+    record = results["sub/img0.png"]
+    assert record["roundtrip_ok"] and record["npcr"] > 90
+    cipher = load_encrypted_image(str(out / record["cipher"]))
+    assert np.array_equal(get_encryptor("aes").decrypt_image(cipher, "k"), images["sub/img0.png"])
+
+    with open(out / "results.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(r["id"] for r in rows) == sorted(images)
+
+def test_resume_skips_finished_images_and_retries_failures(tmp_path):
+    make_images(tmp_path / "in")
+    (tmp_path / "in" / "broken.png").write_bytes(b"not an image")
+    out = tmp_path / "out"
+    first = run_batch(str(tmp_path / "in"), str(out), "aes", "k", workers=0)
+    assert first["processed"] == 3 and first["errors"] == 1
+    assert load_results(str(out))["broken.png"]["status"] == "error"
+
+    # interrupted run: a torn last line and a lost ciphertext
+    with open(out / "results.jsonl", "a") as f:
+        f.write('{"id": "img1.pn')
+    os.remove(out / "cipher" / "img2.png.png")
+    second = run_batch(str(tmp_path / "in"), str(out), "aes", "k", workers=0)
+    assert second["skipped"] == 1 and second["processed"] == 2  # img2 and broken.png again
+    assert len((out / "results.jsonl").read_text().splitlines()) == 3
+    with open(out / "results.csv", newline="") as f:
+        assert len(list(csv.DictReader(f))) == 3
+
+def test_pool_matches_inline(tmp_path):
+    make_images(tmp_path / "in", n=4)
+    inline = run_batch(str(tmp_path / "in"), str(tmp_path / "a"), "lasm_fb", "k", workers=0, recursive=True)
+    pooled = run_batch(str(tmp_path / "in"), str(tmp_path / "b"), "lasm_fb", "k", workers=2, recursive=True)
+    assert inline["processed"] == pooled["processed"] == 4
+    for item_id, record in load_results(str(tmp_path / "a")).items():
+        a = cv2.imread(str(tmp_path / "a" / record["cipher"]))
+        b = cv2.imread(str(tmp_path / "b" / record["cipher"]))
+        assert np.array_equal(a, b), item_id
+
+def test_resume_requires_same_configuration(tmp_path, capsys):
+    make_images(tmp_path / "in", n=2)
+    out = str(tmp_path / "out")
+    run_batch(str(tmp_path / "in"), out, "aes", "k", workers=0, metrics="none")
+    with pytest.raises(ValueError, match="key_hash"):
+        run_batch(str(tmp_path / "in"), out, "aes", "other", workers=0, metrics="none")
+    assert main([str(tmp_path / "in"), "--out", out, "--algorithm", "chaos", "--workers", "0"]) == 2
+    assert "--restart" in capsys.readouterr().err
+    summary = run_batch(str(tmp_path / "in"), out, "chaos", "k", workers=0, metrics="full", restart=True)
+    assert summary["skipped"] == 0 and summary["processed"] == 1
+    with open(os.path.join(out, "batch.json")) as f:
+        assert json.load(f)["algorithm"] == "chaos"
+    assert "adj_H_encrypted" in load_results(out)["img1.png"]
+
+def test_batch_aes_gcm_metrics_use_cipher_pixels(tmp_path):
+    images = make_images(tmp_path / "in", n=2)
+    out = tmp_path / "out"
+    summary = run_batch(str(tmp_path / "in"), str(out), "aes_gcm", "k", workers=0, recursive=True,
+                        histograms="json")
+    assert summary["errors"] == 0
+    record = load_results(str(out))["sub/img0.png"]
+    assert record["roundtrip_ok"] and record["npcr"] > 90
+    cipher = load_encrypted_image(str(out / record["cipher"]))
+    assert np.array_equal(get_encryptor("aes_gcm").decrypt_image(cipher, "k"), images["sub/img0.png"])
+
+def test_same_stem_different_extension_do_not_collide(tmp_path):
+    rng = np.random.default_rng(1)
+    (tmp_path / "in").mkdir()
+    images = {name: rng.integers(0, 256, size=(12, 10, 3), dtype=np.uint8) for name in ("a.png", "a.bmp")}
+    for name, img in images.items():
+        cv2.imwrite(str(tmp_path / "in" / name), img)
+    out = tmp_path / "out"
+    summary = run_batch(str(tmp_path / "in"), str(out), "aes", "k", workers=0, histograms="npz")
+    assert summary["processed"] == 2 and summary["errors"] == 0
+
+    results = load_results(str(out))
+    assert results["a.png"]["cipher"] == "cipher/a.png.png"
+    assert results["a.bmp"]["histograms"] == "histograms/a.bmp.npz"
+    for name, img in images.items():
+        cipher = load_encrypted_image(str(out / results[name]["cipher"]))
+        assert np.array_equal(get_encryptor("aes").decrypt_image(cipher, "k"), img), name
+        assert (out / results[name]["histograms"]).exists()
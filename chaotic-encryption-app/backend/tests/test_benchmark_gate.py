@@ -0,0 +1,81 @@
+# tests/test_benchmark_gate.py
+
+import copy
+import warnings
+
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.gate import check, compare, load_baselines, main
+
+BASELINES = load_baselines()
+
+def _baselines(calibration=1.0, encrypt=0.1, peak=1_000_000):
+    return {
+        "calibration": calibration,
+        "cases": {"fodhnn": {"64x64x3": {"encrypt": encrypt, "decrypt": encrypt,
+                                         "peak_encrypt": peak, "peak_decrypt": peak}}},
+    }
+
+def test_compare_flags_time_and_memory_regressions():
+    base = _baselines()
+    assert compare(_baselines(encrypt=0.12), base) == []
+    slow = _baselines(encrypt=0.2)
+    found = compare(slow, base, threshold=0.25)
+    assert sorted(r.metric for r in found) == ["decrypt", "encrypt"]
+    assert found[0].ratio == pytest.approx(2.0) and "fodhnn 64x64x3" in str(found[0])
+    hungry = compare(_baselines(peak=1_500_000), base)
+    assert sorted(r.metric for r in hungry) == ["peak_decrypt", "peak_encrypt"]
+
+def test_compare_scales_times_by_calibration_only():
+    base = _baselines()
+    # a machine twice as slow: twice the time is expected, twice the memory is not
+    assert compare(_baselines(calibration=2.0, encrypt=0.2), base) == []
+    found = compare(_baselines(calibration=2.0, encrypt=0.2, peak=2_000_000), base)
+    assert {r.metric for r in found} == {"peak_encrypt", "peak_decrypt"}
+
+def test_compare_ignores_noise_and_unknown_cases():
+    base = _baselines(encrypt=0.0005)
+    assert compare(_baselines(encrypt=0.001), base) == []  # +100% but under MIN_SECONDS
+    other = copy.deepcopy(base)
+    other["cases"] = {"aes": other["cases"].pop("fodhnn")}
+    assert compare(_baselines(encrypt=1.0), other) == []
+
+def test_update_rescales_partial_updates(tmp_path, monkeypatch):
+    import benchmarks.gate as gate
+    path = tmp_path / "baselines.json"
+    stored = dict(_baselines(calibration=2.0), config=dict(gate.GATE_CONFIG))
+    gate.save_baselines(stored, str(path))
+    fresh = dict(_baselines(calibration=1.0, encrypt=0.3), config=dict(gate.GATE_CONFIG))
+    fresh["cases"] = {"aes": fresh["cases"]["fodhnn"]}
+    monkeypatch.setattr(gate, "measure", lambda algorithms, progress=None: copy.deepcopy(fresh))
+    assert main(["--update", "--algorithms", "aes", "--baselines", str(path)]) == 0
+    updated = load_baselines(str(path))
+    assert updated["calibration"] == 2.0 and updated["cases"]["fodhnn"]["64x64x3"]["encrypt"] == 0.1
+    assert updated["cases"]["aes"]["64x64x3"]["encrypt"] == pytest.approx(0.6)
+
+def test_check_drops_regressions_that_do_not_repeat(monkeypatch):
+    import benchmarks.gate as gate
+    # slower in both runs; peak memory up in the first run only
+    runs = iter([_baselines(encrypt=0.5, peak=3_000_000), _baselines(encrypt=0.5)])
+    monkeypatch.setattr(gate, "load_baselines", lambda path: dict(_baselines(), config=gate.GATE_CONFIG))
+    monkeypatch.setattr(gate, "measure", lambda algorithms, config, progress=None: copy.deepcopy(next(runs)))
+    found = check(["fodhnn"], confirm=1)
+    assert sorted(r.metric for r in found) == ["decrypt", "encrypt"]
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("algorithm", sorted(BASELINES["cases"]))
+def test_no_benchmark_regression(algorithm, request):
+    mode = request.config.getoption("--benchmark")
+    if mode == "off":
+        pytest.skip("benchmark gate disabled (use --benchmark=warn|fail)")
+    regressions = check([algorithm], request.config.getoption("--benchmark-threshold"),
+                        request.config.getoption("--benchmark-memory-threshold"))
+    if not regressions:
+        return
+    message = f"{algorithm} regressed:\n" + "\n".join(f"  {r}" for r in regressions)
+    if mode == "fail":
+        pytest.fail(message)
+    warnings.warn(message)
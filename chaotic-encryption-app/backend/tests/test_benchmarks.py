@@ -0,0 +1,49 @@
+# tests/test_benchmarks.py
+
+import json
+
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import benchmark_case, run_suite
+from benchmarks.suite import main, synthetic_image
+from encryption.registry import get_encryptor
+
+def test_benchmark_case_record():
+    r = benchmark_case(get_encryptor("aes"), synthetic_image(16, 3), warmup=0, repeats=3)
+    assert r["roundtrip_ok"] is True
+    assert len(r["encrypt"]["samples"]) == 3 and r["encrypt"]["min"] <= r["encrypt"]["median"]
+    assert r["encrypt_mb_s"] > 0 and r["decrypt_mb_s"] > 0
+    assert set(r["peak_bytes"]) == {"encrypt", "decrypt"}
+
+def test_cold_cache_rebuilds_schedule_every_call():
+    enc = get_encryptor("lasm_fb")
+    before = enc.warm_cache.stats()["misses"]
+    benchmark_case(enc, synthetic_image(8, 1), warmup=0, repeats=2, memory=False)
+    # 2 repeats x (encrypt + decrypt), all misses
+    assert enc.warm_cache.stats()["misses"] - before == 4
+
+    before = enc.warm_cache.stats()
+    benchmark_case(enc, synthetic_image(8, 1), warmup=1, repeats=2, cache="warm", memory=False)
+    after = enc.warm_cache.stats()
+    assert after["misses"] == before["misses"] and after["hits"] - before["hits"] == 6
+
+def test_suite_records_unsupported_cases():
+    report = run_suite(["bulban"], sizes=[8], channels=[1, 3], warmup=0, repeats=1, memory=False)
+    gray, color = report["results"]
+    assert gray["status"] == "ok" and gray["roundtrip_ok"]
+    assert color["status"] == "error" and color["error"]
+    assert report["config"]["algorithms"] == ["bulban"]
+
+def test_cli_writes_json(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    code = main(["--algorithms", "aes,chaos", "--sizes", "8", "--channels", "3",
+                 "--warmup", "0", "--repeats", "1", "--no-memory", "--output", str(out)])
+    assert code == 0
+    report = json.loads(out.read_text())
+    assert [r["algorithm"] for r in report["results"]] == ["aes", "chaos"]
+    assert "cpu_count" in report["environment"]
+    with pytest.raises(ValueError):
+        benchmark_case(get_encryptor("aes"), synthetic_image(8, 1), cache="lukewarm")
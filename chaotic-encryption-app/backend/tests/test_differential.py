@@ -0,0 +1,51 @@
+# tests/test_differential.py
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import differential_analysis, npcr_uaci_critical_values
+from analysis.common import ciphertext_difference
+from encryption.registry import get_encryptor
+
+def random_img(h, w, c, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(h, w, c), dtype=np.uint8)
+
+def test_critical_values_match_published_table():
+    # Wu et al. (2011), 256x256 gray images
+    c = npcr_uaci_critical_values(256 * 256, 0.05)
+    assert c["npcr"] == pytest.approx(99.5693, abs=1e-4)
+    assert c["uaci"] == pytest.approx([33.2824, 33.6447], abs=1e-4)
+
+def test_ciphertext_difference():
+    a = np.zeros((2, 2, 3), np.uint8)
+    b = a.copy(); b[0, 0, 0] = 255
+    npcr, uaci = ciphertext_difference(a, b)
+    assert npcr == pytest.approx(100 / 12) and uaci == pytest.approx(100 / 12)
+
+def test_inline_and_pool_agree():
+    img = random_img(12, 10, 3)
+    inline = differential_analysis("aes", img, "k", trials=6, workers=0, seed=1)
+    pooled = differential_analysis("aes", img, "k", trials=6, workers=2, seed=1)
+    assert inline.samples == pooled.samples
+    # CTR keystream: a one-pixel change alters exactly one ciphertext byte
+    assert inline.npcr["mean"] == pytest.approx(100 / img.size)
+    assert inline.passes["npcr"][0.05] == 0.0
+
+def test_accepts_instances_and_reuses_schedule():
+    enc = get_encryptor("lasm_fb")
+    enc.warm_cache.clear()
+    before = enc.warm_cache.stats()["misses"]
+    report = differential_analysis(enc, random_img(8, 8, 3), "k", trials=5, seed=2)
+    assert report.algorithm == "lasm_fb" and report.trials == 5
+    assert enc.warm_cache.stats()["misses"] - before == 1
+    assert set(report.to_dict()) >= {"npcr", "uaci", "critical_values", "passes"}
+
+def test_colour_critical_values_use_every_channel():
+    img = random_img(12, 10, 3)
+    report = differential_analysis("aes", img, "k", trials=2, workers=0, seed=3)
+    assert report.critical_values[0.05] == npcr_uaci_critical_values(img.size, 0.05)
+    assert report.critical_values[0.05] != npcr_uaci_critical_values(12 * 10, 0.05)
@@ -0,0 +1,120 @@
+# tests/test_executor.py
+
+import threading
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executor import EncryptionExecutor, ExecutorSaturated
+from pipeline import get_api_encryptor
+
+KEY = "k"
+
+@pytest.fixture(scope="module")
+def pool():
+    ex = EncryptionExecutor(pool_size=2, queue_depth=0)
+    ex.start()
+    yield ex
+    ex.shutdown()
+
+@pytest.mark.parametrize("algorithm,shape", [("aes", (32, 48, 3)), ("lasm_fb", (20, 24)), ("fodhnn", (16, 16, 3))])
+def test_pool_matches_inline(pool, algorithm, shape):
+    img = np.random.randint(0, 256, size=shape, dtype=np.uint8)
+    C = pool.encrypt(algorithm, img, KEY)
+    assert np.array_equal(C, get_api_encryptor(algorithm).encrypt_image(img, KEY))
+    assert np.array_equal(pool.decrypt(algorithm, C, KEY), img)
+
+def test_non_contiguous_input(pool):
+    img = np.random.randint(0, 256, size=(32, 32, 3), dtype=np.uint8)[:, ::2]
+    C = pool.encrypt("aes", img, KEY)
+    assert np.array_equal(pool.decrypt("aes", C, KEY), img)
+
+def test_inline_mode():
+    ex = EncryptionExecutor(pool_size=0)
+    img = np.random.randint(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    assert np.array_equal(ex.decrypt("aes", ex.encrypt("aes", img, KEY), KEY), img)
+
+def test_back_pressure(pool):
+    img = np.random.randint(0, 256, size=(64, 64, 3), dtype=np.uint8)
+    # Hold both slots so the next call is rejected without waiting
+    assert pool._slots.acquire(blocking=False) and pool._slots.acquire(blocking=False)
+    try:
+        with pytest.raises(ExecutorSaturated):
+            pool.encrypt("aes", img, KEY)
+    finally:
+        pool._slots.release(); pool._slots.release()
+    assert pool.encrypt("aes", img, KEY).shape == img.shape
+
+def test_saturated_pool_returns_503(monkeypatch):
+    import base64, cv2
+    import app as app_module
+    busy = EncryptionExecutor(pool_size=1, queue_depth=0)
+    busy._slots.acquire()
+    monkeypatch.setattr(app_module, "encryption_executor", busy)
+    ok, buf = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))
+    r = app_module.app.test_client().post(
+        "/api/encrypt",
+        json={"image": base64.b64encode(buf.tobytes()).decode(), "algorithm": "aes", "async": False},
+        headers={"X-API-Key": "dev_key_1"},
+    )
+    assert r.status_code == 503 and r.headers["Retry-After"]
+
+def test_pool_is_replaced_after_a_worker_dies():
+    import signal
+    from concurrent.futures.process import BrokenProcessPool
+    ex = EncryptionExecutor(pool_size=1, queue_depth=0)
+    try:
+        ex.start()
+        broken = ex._pool
+        os.kill(next(iter(broken._processes)), signal.SIGKILL)
+        img = np.random.randint(0, 256, size=(16, 16, 3), dtype=np.uint8)
+        with pytest.raises(BrokenProcessPool):
+            ex.encrypt("aes", img, KEY)
+        assert ex._pool is None
+        assert np.array_equal(ex.encrypt("aes", img, KEY), get_api_encryptor("aes").encrypt_image(img, KEY))
+        assert ex._pool is not broken
+    finally:
+        ex.shutdown()
+
+def test_default_pool_size_is_a_share_of_the_cpus(monkeypatch):
+    monkeypatch.delenv("ENCRYPT_POOL_SIZE", raising=False)
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert EncryptionExecutor.from_env().pool_size == 2
+    monkeypatch.setenv("WEB_CONCURRENCY", "16")
+    assert EncryptionExecutor.from_env().pool_size == 1
+    monkeypatch.setenv("ENCRYPT_POOL_SIZE", "3")
+    assert EncryptionExecutor.from_env().pool_size == 3
+
+def test_timed_out_call_keeps_its_slot_until_the_worker_is_done(monkeypatch):
+    import base64, time, cv2
+    import app as app_module
+    ex = EncryptionExecutor(pool_size=1, queue_depth=0, timeout=0.05)
+    try:
+        ex.start()
+        img = np.random.randint(0, 256, size=(256, 256, 3), dtype=np.uint8)
+        with pytest.raises(TimeoutError):
+            ex.encrypt("fodhnn", img, "slow-1")
+        # the worker is still busy with the timed-out call
+        with pytest.raises(ExecutorSaturated):
+            ex.encrypt("aes", img, KEY)
+        deadline = time.time() + 30
+        while not ex._slots.acquire(blocking=False):
+            assert time.time() < deadline
+            time.sleep(0.05)
+        ex._slots.release()
+
+        monkeypatch.setattr(app_module, "encryption_executor", ex)
+        ok, buf = cv2.imencode(".png", img)
+        r = app_module.app.test_client().post(
+            "/api/encrypt",
+            json={"image": base64.b64encode(buf.tobytes()).decode(), "algorithm": "fodhnn", "key": "slow-2"},
+            headers={"X-API-Key": "dev_key_1"},
+        )
+        assert r.status_code == 504 and r.headers["Retry-After"]
+        assert "0.05s" in r.get_json()["message"]
+    finally:
+        ex.shutdown()
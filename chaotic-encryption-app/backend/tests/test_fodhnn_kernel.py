@@ -0,0 +1,32 @@
+# tests/test_fodhnn_kernel.py
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encryption.fodhnn_encryptor import FODHNN, FODHNNKey, fractional_kernel
+
+def reference_kernel(nu, W):
+    w = np.empty(W, dtype=np.float64)
+    w[0] = 1.0
+    for m in range(1, W):
+        w[m] = w[m - 1] * (nu + m - 1.0) / m
+    return w
+
+@pytest.mark.parametrize("nu", [0.7, 0.8123456789, 0.95])
+@pytest.mark.parametrize("W", [1, 2, 256, 4096])
+def test_kernel_bit_identical(nu, W):
+    assert np.array_equal(fractional_kernel(nu, W), reference_kernel(nu, W))
+
+def test_kernel_memoized_and_read_only():
+    a = fractional_kernel(0.75, 128)
+    b = fractional_kernel(0.75, 128)
+    assert a is b
+    with pytest.raises(ValueError):
+        a[0] = 2.0
+
+def test_fodhnn_uses_shared_table():
+    key = FODHNNKey(nu=0.8, p=0.1, x0=0.3, y0=0.4, z0=0.5)
+    assert FODHNN(key, memory_window=64).w is FODHNN(key, memory_window=64).w
@@ -0,0 +1,54 @@
+# tests/test_histograms.py
+
+import subprocess
+
+import cv2
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import load_results, run_batch
+from histograms import gray_histogram, load_histograms, render_histograms, save_histograms
+from utils import generate_histogram_data
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_gray_histogram_matches_histogram_data():
+    img = np.random.default_rng(0).integers(0, 256, size=(20, 30, 3), dtype=np.uint8)
+    assert gray_histogram(img).tolist() == generate_histogram_data(img)["values"]
+
+@pytest.mark.parametrize("fmt", ["npz", "json"])
+def test_save_load_roundtrip(tmp_path, fmt):
+    plain = np.arange(256)
+    path = save_histograms(str(tmp_path / "histograms" / "a"), fmt, plain=plain, cipher=plain[::-1])
+    assert path.endswith("." + fmt) and os.listdir(tmp_path / "histograms") == [f"a.{fmt}"]
+    loaded = load_histograms(path)
+    assert sorted(loaded) == ["cipher", "plain"]
+    assert np.array_equal(loaded["cipher"], plain[::-1])
+    with pytest.raises(ValueError):
+        save_histograms(str(tmp_path / "b"), "png", plain=plain)
+
+def test_render_skips_up_to_date_charts(tmp_path):
+    save_histograms(str(tmp_path / "run" / "histograms" / "a"), "json", plain=np.ones(256))
+    save_histograms(str(tmp_path / "run" / "other" / "b"), "npz", plain=np.ones(256))  # not a histograms/ folder
+    assert render_histograms(str(tmp_path / "run")) == 1
+    assert (tmp_path / "run" / "histograms" / "a_plain.png").exists()
+    assert render_histograms(str(tmp_path / "run")) == 0
+    assert render_histograms(str(tmp_path / "run"), force=True) == 1
+
+def test_batch_stores_histogram_data(tmp_path):
+    (tmp_path / "in").mkdir()
+    img = np.random.default_rng(1).integers(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    cv2.imwrite(str(tmp_path / "in" / "x.png"), img)
+    run_batch(str(tmp_path / "in"), str(tmp_path / "out"), "aes", "k", workers=0)
+    record = load_results(str(tmp_path / "out"))["x.png"]
+    hists = load_histograms(str(tmp_path / "out" / record["histograms"]))
+    assert sorted(hists) == ["cipher", "decrypted", "plain"]
+    assert np.array_equal(hists["plain"], hists["decrypted"]) and hists["plain"].sum() == 64
+
+def test_batch_does_not_import_matplotlib():
+    code = "import sys, batch, histograms; print('matplotlib' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
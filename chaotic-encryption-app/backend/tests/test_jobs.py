@@ -0,0 +1,247 @@
+# tests/test_jobs.py
+
+import base64
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from jobs import DeferredMetrics, JobQueue, QueueFull, JOB_DONE, JOB_FAILED, expire_jobs, read_job, write_job
+from pipeline import get_api_encryptor
+
+HEADERS = {"X-API-Key": "dev_key_1"}
+
+def png_b64(img):
+    ok, buf = cv2.imencode(".png", img)
+    assert ok
+    return base64.b64encode(buf.tobytes()).decode()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs"), app_module.app.config["UPLOAD_FOLDER"], max_workers=1)
+    monkeypatch.setattr(app_module, "job_queue", queue)
+    yield app_module.app.test_client()
+    queue.shutdown()
+
+def wait_for(client, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/jobs/{job_id}", headers=HEADERS).get_json()
+        if job["status"] in (JOB_DONE, JOB_FAILED):
+            return job
+        time.sleep(0.1)
+    raise AssertionError("job did not finish")
+
+def test_job_roundtrip(client):
+    img = np.random.randint(0, 256, size=(24, 32, 3), dtype=np.uint8)
+    r = client.post("/api/jobs", json={"image": png_b64(img), "key": "k", "algorithm": "aes"}, headers=HEADERS)
+    assert r.status_code == 202
+    job = wait_for(client, r.get_json()["id"])
+    assert job["status"] == JOB_DONE and job["progress"] == 1.0
+    assert "owner" not in job and job["metrics"]["npcr"] > 0
+
+    path = os.path.join(app_module.app.config["UPLOAD_FOLDER"], job["result_filename"])
+    cipher = cv2.imread(path)
+    os.remove(path)
+    assert np.array_equal(get_api_encryptor("aes").decrypt_image(cipher, "k"), img)
+
+def test_large_encrypt_is_routed_to_queue(client, monkeypatch):
+    monkeypatch.setattr(app_module, "ASYNC_PIXEL_THRESHOLD", 100)
+    img = np.random.randint(0, 256, size=(16, 16, 3), dtype=np.uint8)
+    r = client.post("/api/encrypt", json={"image": png_b64(img), "key": "k", "algorithm": "aes"}, headers=HEADERS)
+    assert r.status_code == 202
+    job = wait_for(client, r.get_json()["id"])
+    assert job["status"] == JOB_DONE
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], job["result_filename"]))
+
+def test_job_not_visible_to_other_keys(client):
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+    r = client.post("/api/jobs", json={"image": png_b64(img), "algorithm": "aes"}, headers=HEADERS)
+    job_id = r.get_json()["id"]
+    assert client.get(f"/api/jobs/{job_id}", headers={"X-API-Key": "dev_key_2"}).status_code == 404
+    job = wait_for(client, job_id)
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], job["result_filename"]))
+
+def test_unknown_job_and_bad_operation(client):
+    assert client.get("/api/jobs/not-a-uuid", headers=HEADERS).status_code == 404
+    r = client.post("/api/jobs", json={"image": "x", "operation": "shred"}, headers=HEADERS)
+    assert r.status_code == 400
+    # dev_key_2 has no download permission but jobs only need encrypt/decrypt
+    r = client.post("/api/jobs", json={"image": "x", "operation": "decrypt"}, headers={"X-API-Key": "dev_key_2"})
+    assert r.status_code != 403
+
+@pytest.mark.parametrize("mode", ["none", "sampled", "deferred"])
+def test_encrypt_metrics_modes(client, tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(app_module, "deferred_metrics", app_module.DeferredMetrics(str(tmp_path / "jobs")))
+    img = np.random.randint(0, 256, size=(24, 32, 3), dtype=np.uint8)
+    r = client.post("/api/encrypt", json={"image": png_b64(img), "key": "k", "algorithm": "aes",
+                                          "metrics": mode}, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.get_json()
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], body["encrypted_filename"]))
+    assert body["metrics_mode"] == mode
+    if mode == "none":
+        assert body["metrics"] is None
+    elif mode == "sampled":
+        assert body["metrics"]["npcr"] > 0
+    else:
+        app_module.deferred_metrics.shutdown()
+        m = client.get(body["metrics_url"], headers=HEADERS).get_json()
+        assert m["status"] == JOB_DONE and m["metrics"]["npcr"] > 0
+        assert client.get(body["metrics_url"], headers={"X-API-Key": "dev_key_2"}).status_code == 404
+
+def test_unknown_metrics_mode(client):
+    r = client.post("/api/encrypt", json={"image": "x", "metrics": "fast"}, headers=HEADERS)
+    assert r.status_code == 400
+
+@pytest.mark.parametrize("mode", ["full", "sampled", "deferred"])
+def test_aes_gcm_encrypt_reports_metrics(client, tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(app_module, "deferred_metrics", app_module.DeferredMetrics(str(tmp_path / "jobs")))
+    img = np.random.randint(0, 256, size=(24, 32, 3), dtype=np.uint8)
+    r = client.post("/api/encrypt", json={"image": png_b64(img), "key": "k", "algorithm": "aes_gcm",
+                                          "metrics": mode}, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.get_json()
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], body["encrypted_filename"]))
+    metrics = body["metrics"]
+    if mode == "deferred":
+        app_module.deferred_metrics.shutdown()
+        m = client.get(body["metrics_url"], headers=HEADERS).get_json()
+        assert m["status"] == JOB_DONE
+        metrics = m["metrics"]
+    assert metrics["npcr"] > 0
+
+    # The container (header rows included) survives the PNG round trip through /api/decrypt
+    r = client.post("/api/decrypt", json={"image": body["encrypted_image"], "key": "k", "algorithm": "aes_gcm"},
+                    headers=HEADERS)
+    assert r.status_code == 200
+    out = r.get_json()
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], out["decrypted_filename"]))
+    decrypted = cv2.imdecode(np.frombuffer(base64.b64decode(out["decrypted_image"]), np.uint8), cv2.IMREAD_COLOR)
+    assert np.array_equal(decrypted, img)
+
+def test_aes_gcm_job(client):
+    img = np.random.randint(0, 256, size=(24, 32, 3), dtype=np.uint8)
+    r = client.post("/api/jobs", json={"image": png_b64(img), "key": "k", "algorithm": "aes_gcm"}, headers=HEADERS)
+    job = wait_for(client, r.get_json()["id"])
+    assert job["status"] == JOB_DONE and job["metrics"]["npcr"] > 0
+    path = os.path.join(app_module.app.config["UPLOAD_FOLDER"], job["result_filename"])
+    cipher = cv2.imread(path)
+    os.remove(path)
+    assert np.array_equal(get_api_encryptor("aes_gcm").decrypt_image(cipher, "k"), img)
+
+def test_queue_recovers_after_a_worker_dies(client):
+    import signal
+    img = np.random.randint(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    first = wait_for(client, client.post("/api/jobs", json={"image": png_b64(img), "algorithm": "aes"},
+                                         headers=HEADERS).get_json()["id"])
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], first["result_filename"]))
+    os.kill(next(iter(app_module.job_queue._executor._processes)), signal.SIGKILL)
+    # A job racing the crash may fail; the pool is replaced and later jobs succeed
+    for _ in range(3):
+        job = wait_for(client, client.post("/api/jobs", json={"image": png_b64(img), "algorithm": "aes"},
+                                           headers=HEADERS).get_json()["id"])
+        if job["status"] == JOB_DONE:
+            break
+    assert job["status"] == JOB_DONE
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], job["result_filename"]))
+    # inputs of jobs lost with the crashed worker are removed too
+    assert not [f for f in os.listdir(app_module.app.config["UPLOAD_FOLDER"]) if f.startswith("jobinput_")]
+
+def test_old_records_are_deleted_on_submit(tmp_path):
+    job_dir = str(tmp_path / "jobs")
+    os.makedirs(job_dir)
+    old, fresh = "00000000-0000-0000-0000-000000000001", "00000000-0000-0000-0000-000000000002"
+    for job_id in (old, fresh):
+        write_job(job_dir, {"id": job_id, "status": JOB_DONE})
+    stale = time.time() - 3 * 3600
+    os.utime(os.path.join(job_dir, f"{old}.json"), (stale, stale))
+    open(os.path.join(job_dir, f"{old}.json.123.tmp"), "w").close()
+    os.utime(os.path.join(job_dir, f"{old}.json.123.tmp"), (stale, stale))
+
+    metrics = DeferredMetrics(job_dir, ttl_hours=2)
+    img = np.zeros((4, 4), dtype=np.uint8)
+    record = metrics.submit(img, img)
+    metrics.shutdown()
+    assert read_job(job_dir, old) is None and read_job(job_dir, fresh) is not None
+    assert sorted(os.listdir(job_dir)) == sorted([f"{fresh}.json", f"{record['id']}.json"])
+
+    # ttl_hours <= 0 keeps everything
+    os.utime(os.path.join(job_dir, f"{fresh}.json"), (stale, stale))
+    keep = DeferredMetrics(job_dir, ttl_hours=0)
+    keep.submit(img, img)
+    keep.shutdown()
+    assert read_job(job_dir, fresh) is not None
+
+def test_queuing_by_size_is_opt_in(monkeypatch):
+    if "ASYNC_PIXEL_THRESHOLD" not in os.environ:
+        assert app_module.ASYNC_PIXEL_THRESHOLD == 0
+    big = np.empty((5000, 5000), dtype=np.uint8)
+    monkeypatch.setattr(app_module, "ASYNC_PIXEL_THRESHOLD", 0)
+    assert not app_module.should_queue(None, big)
+    monkeypatch.setattr(app_module, "ASYNC_PIXEL_THRESHOLD", 4_000_000)
+    assert app_module.should_queue(None, big) and not app_module.should_queue(False, big)
+
+@pytest.mark.parametrize("flag,queued", [("false", False), ("0", False), ("", False), (False, False),
+                                         ("true", True), (1, True)])
+def test_async_flag_strings(client, flag, queued):
+    img = np.random.randint(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    r = client.post("/api/encrypt", json={"image": png_b64(img), "key": "k", "algorithm": "aes", "async": flag},
+                    headers=HEADERS)
+    assert r.status_code == (202 if queued else 200)
+    body = r.get_json()
+    name = wait_for(client, body["id"])["result_filename"] if queued else body["encrypted_filename"]
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], name))
+
+@pytest.mark.parametrize("flag", ["maybe", 2, [1]])
+def test_async_flag_rejects_non_booleans(client, flag):
+    r = client.post("/api/decrypt", json={"image": "x", "async": flag}, headers=HEADERS)
+    assert r.status_code == 400 and "async" in r.get_json()["error"]
+
+def test_expired_jobs_take_their_result_image_along(tmp_path):
+    job_dir, output_dir = str(tmp_path / "jobs"), str(tmp_path / "out")
+    os.makedirs(job_dir); os.makedirs(output_dir)
+    job_id = "00000000-0000-0000-0000-000000000003"
+    write_job(job_dir, {"id": job_id, "status": JOB_DONE, "result_filename": "encrypted_x.png"})
+    open(os.path.join(output_dir, "encrypted_x.png"), "w").close()
+    open(os.path.join(output_dir, "encrypted_y.png"), "w").close()
+    assert expire_jobs(job_dir, 1, now=time.time() + 7200, output_dir=output_dir) == 1
+    assert os.listdir(output_dir) == ["encrypted_y.png"] and not os.listdir(job_dir)
+
+def test_full_queue_returns_503(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs"), app_module.app.config["UPLOAD_FOLDER"], max_workers=1, max_pending=1)
+    monkeypatch.setattr(app_module, "job_queue", queue)
+    monkeypatch.setattr(queue, "_pending", 1)  # one job in flight
+    client = app_module.app.test_client()
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+    r = client.post("/api/jobs", json={"image": png_b64(img), "algorithm": "aes"}, headers=HEADERS)
+    assert r.status_code == 503 and r.headers["Retry-After"]
+    assert not [f for f in os.listdir(app_module.app.config["UPLOAD_FOLDER"]) if f.startswith("jobinput_")]
+    with pytest.raises(QueueFull):
+        queue.submit("encrypt", "aes", "k", "unused.png")
+    assert queue._pending == 1
+
+def test_deferred_metrics_are_dropped_when_the_queue_is_full(client, tmp_path, monkeypatch):
+    metrics = DeferredMetrics(str(tmp_path / "jobs"), max_pending=1)
+    monkeypatch.setattr(app_module, "deferred_metrics", metrics)
+    monkeypatch.setattr(metrics, "_pending", 1)  # one computation in flight
+    img = np.random.randint(0, 256, size=(8, 8, 3), dtype=np.uint8)
+    with pytest.raises(QueueFull):
+        metrics.submit(img, img)
+    r = client.post("/api/encrypt", json={"image": png_b64(img), "key": "k", "algorithm": "aes",
+                                          "metrics": "deferred"}, headers=HEADERS)
+    assert r.status_code == 200
+    body = r.get_json()
+    os.remove(os.path.join(app_module.app.config["UPLOAD_FOLDER"], body["encrypted_filename"]))
+    assert body["encrypted_image"] and body["metrics"] is None and "metrics_url" not in body
+    assert "pending" in body["metrics_error"]
+
+    monkeypatch.setattr(metrics, "_pending", 0)
+    metrics.submit(img, img)
+    metrics.shutdown()
+    assert metrics._pending == 0
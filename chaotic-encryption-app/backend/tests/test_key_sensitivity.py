@@ -0,0 +1,81 @@
+# tests/test_key_sensitivity.py
+
+import hashlib
+import pickle
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import key_sensitivity_analysis
+from analysis.key_sensitivity import parse_bits
+from encryption.encryptor_interface import PerturbedKey, key_digest
+from encryption.registry import get_encryptor
+
+def random_img(h, w, c=None, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (h, w) if c is None else (h, w, c)
+    return rng.integers(0, 256, size=shape, dtype=np.uint8)
+
+def test_perturbed_key_flips_one_digest_bit():
+    plain = hashlib.sha256(b"secret|ctx").digest()
+    for bit in (0, 7, 8, 255):
+        flipped = key_digest(PerturbedKey("secret", bit), "|ctx")
+        diff = int.from_bytes(plain, "big") ^ int.from_bytes(flipped, "big")
+        assert diff == 1 << (255 - bit)
+    assert key_digest("secret", "|ctx") == plain
+
+def test_perturbed_key_pickles_and_validates():
+    k = PerturbedKey("secret", 42)
+    restored = pickle.loads(pickle.dumps(k))
+    assert isinstance(restored, PerturbedKey) and restored.bit == 42 and restored == "secret"
+    assert "secret" not in repr(k)
+    with pytest.raises(ValueError):
+        PerturbedKey("secret", 256)
+
+def test_aes_variants_all_differ_and_pool_agrees():
+    img = random_img(16, 16, 3)
+    inline = key_sensitivity_analysis("aes", img, "k", bits=range(8), workers=0)
+    pooled = key_sensitivity_analysis("aes", img, "k", bits=range(8), workers=2)
+    assert inline.samples == pooled.samples
+    assert inline.variants == 8 and inline.insensitive_bits == []
+    assert inline.cipher_npcr["min"] > 95.0
+    assert inline.wrong_key_npcr["min"] > 95.0
+
+def test_reports_unused_key_material():
+    # Bulban derives its parameters from the first 8 digest bytes only
+    report = key_sensitivity_analysis("bulban", random_img(16, 16), "k", bits=[0, 63, 64, 200], workers=0)
+    assert report.insensitive_bits == [64, 200]
+
+def test_decryption_reuses_variant_schedule():
+    enc = get_encryptor("lasm_fb")
+    enc.warm_cache.clear()
+    before = enc.warm_cache.stats()
+    report = key_sensitivity_analysis(enc, random_img(8, 8, 3), "k", bits=[3, 200])
+    # the schedule only uses the leading digest words
+    assert report.algorithm == enc.get_algorithm_name() and report.insensitive_bits == [200]
+    # one miss per key (original + 2 variants); each wrong-key decryption is a hit
+    after = enc.warm_cache.stats()
+    assert after["misses"] - before["misses"] == 3
+    assert after["hits"] - before["hits"] == 2
+
+def test_parse_bits():
+    assert parse_bits("4") == [0, 1, 2, 3]
+    assert parse_bits("1-3,200") == [1, 2, 3, 200]
+    with pytest.raises(ValueError):
+        key_sensitivity_analysis("aes", random_img(4, 4, 3), "k", bits=[])
+
+def test_rejects_random_nonce_ciphers(tmp_path):
+    import cv2
+    from analysis import differential_analysis
+    from analysis.key_sensitivity import main
+    img = random_img(8, 8, 3)
+    with pytest.raises(ValueError, match="random nonce"):
+        key_sensitivity_analysis("aes_gcm", img, "k", bits=[0], workers=0)
+    with pytest.raises(ValueError, match="random nonce"):
+        differential_analysis("aes_gcm", img, "k", trials=1, workers=0)
+    cv2.imwrite(str(tmp_path / "img.png"), img)
+    with pytest.raises(SystemExit, match="aes_gcm"):
+        main([str(tmp_path / "img.png"), "--algorithm", "aes_gcm", "--bits", "1", "--workers", "0"])
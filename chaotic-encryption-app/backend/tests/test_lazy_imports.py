@@ -0,0 +1,44 @@
+# tests/test_lazy_imports.py
+
+import json
+import subprocess
+
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.imports import import_times
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def loaded_after(statement):
+    code = f"import json, sys; {statement}; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    return set(json.loads(out.stdout))
+
+def test_package_import_loads_no_encryptor():
+    modules = loaded_after("import encryption")
+    assert not {m for m in modules if m.startswith("encryption.")}
+    assert "cv2" not in modules and "numpy" not in modules
+
+def test_first_use_loads_only_that_encryptor():
+    modules = loaded_after("from encryption import get_encryptor; get_encryptor('fodhnn')")
+    encryptors = {m for m in modules if m.startswith("encryption.")}
+    assert "encryption.fodhnn_encryptor" in encryptors
+    assert not encryptors & {"encryption.aes_encryptor", "encryption.chaos_encryptor", "encryption.another_2d"}
+    assert "cv2" not in modules
+
+def test_lazy_names_resolve():
+    import encryption
+    from encryption.aes_encryptor import AESEncryptor
+    assert encryption.AESEncryptor is AESEncryptor
+    assert isinstance(encryption.get_encryptor("aes"), encryption.EncryptorInterface)
+    with pytest.raises(AttributeError):
+        encryption.NoSuchEncryptor
+
+def test_import_times_report():
+    report = import_times(["import encryption", "import no_such_module"], repeats=2)
+    ok, bad = report["results"]
+    assert ok["status"] == "ok" and len(ok["seconds"]["samples"]) == 2 and ok["heavy"] == []
+    assert bad["status"] == "error" and "no_such_module" in bad["error"]
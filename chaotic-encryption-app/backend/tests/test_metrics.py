@@ -0,0 +1,95 @@
+# tests/test_metrics.py
+
+import cv2
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (
+    calculate_adjacent_correlation, calculate_entropy, calculate_npcr, calculate_uaci,
+    compute_metrics, sample_metrics,
+)
+
+def random_img(h, w, c, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (h, w) if c == 1 else (h, w, c)
+    return rng.integers(0, 256, size=shape, dtype=np.uint8)
+
+@pytest.mark.parametrize("c", [1, 3])
+def test_fused_metrics_match_individual_functions(c):
+    original = random_img(97, 131, c, seed=1)
+    encrypted = random_img(97, 131, c, seed=2)
+    encrypted[:10] = original[:10]  # some unchanged pixels
+    m = compute_metrics(original, encrypted)
+    assert m == {
+        'entropy_original': float(calculate_entropy(original)),
+        'entropy_encrypted': float(calculate_entropy(encrypted)),
+        'npcr': float(calculate_npcr(original, encrypted)),
+        'uaci': float(calculate_uaci(original, encrypted)),
+    }
+
+def test_identical_images():
+    img = np.full((8, 8), 7, dtype=np.uint8)
+    m = compute_metrics(img, img)
+    assert m['npcr'] == 0.0 and m['uaci'] == 0.0 and m['entropy_original'] == 0.0
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        compute_metrics(random_img(4, 4, 1), random_img(4, 5, 1))
+
+def test_sampled_metrics_cover_full_values():
+    original = random_img(400, 500, 3, seed=3)
+    original[:200] //= 4  # skewed histogram so entropy is not trivially 8
+    encrypted = random_img(400, 500, 3, seed=4)
+    full = compute_metrics(original, encrypted)
+    est = sample_metrics(original, encrypted, sample_size=20000, seed=7)
+    assert est["sampled"] and est["sample_size"] == 20000
+    for name in ("npcr", "uaci", "entropy_original", "entropy_encrypted"):
+        low, high = est["intervals"][name]
+        assert low <= est[name] <= high
+        assert abs(full[name] - est[name]) <= 2 * (high - low)
+    assert sample_metrics(original, encrypted, sample_size=20000, seed=7) == est
+
+def test_sampling_small_image_is_exact():
+    original, encrypted = random_img(10, 10, 1, seed=5), random_img(10, 10, 1, seed=6)
+    est = sample_metrics(original, encrypted, sample_size=1000)
+    assert not est["sampled"] and est["npcr"] == compute_metrics(original, encrypted)["npcr"]
+
+def reference_adjacent_correlation(image):
+    # Float64 Pearson on explicit pair copies (the original implementation)
+    g = (cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image).astype(np.float64)
+    pairs = {"H": (g[:, :-1], g[:, 1:]), "V": (g[:-1, :], g[1:, :]), "D": (g[:-1, :-1], g[1:, 1:])}
+    out = {}
+    for k, (a, b) in pairs.items():
+        if a.size == 0 or a.std() == 0 or b.std() == 0:
+            out[k] = 0.0
+            continue
+        a, b = a.ravel() - a.mean(), b.ravel() - b.mean()
+        out[k] = float((a * b).mean() / (a.std() * b.std()))
+    return out
+
+@pytest.mark.parametrize("shape", [(1, 6, 3), (6, 1), (2, 2), (41, 57, 3), (128, 96)])
+def test_adjacent_correlation_matches_float_reference(shape):
+    img = random_img(*shape[:2], shape[2] if len(shape) == 3 else 1, seed=8)
+    img[: shape[0] // 2] //= 3
+    expected = reference_adjacent_correlation(img)
+    got = calculate_adjacent_correlation(img)
+    for k in "HVD":
+        assert got[k] == pytest.approx(expected[k], abs=1e-12)
+
+def test_adjacent_correlation_non_uint8_and_constant():
+    img = random_img(30, 40, 1, seed=9)
+    wide = calculate_adjacent_correlation(img.astype(np.float32))
+    assert wide == pytest.approx(calculate_adjacent_correlation(img), abs=1e-12)
+    assert calculate_adjacent_correlation(np.full((9, 9), 4, np.uint8)) == {"H": 0.0, "V": 0.0, "D": 0.0}
+
+def test_sampled_adjacent_correlation():
+    rng = np.random.default_rng(10)
+    smooth = np.cumsum(rng.integers(0, 3, size=(200, 300)), axis=1).clip(0, 255).astype(np.uint8)
+    full = calculate_adjacent_correlation(smooth)
+    est = calculate_adjacent_correlation(smooth, sample=5000, seed=3)
+    assert est == calculate_adjacent_correlation(smooth, sample=5000, seed=3)
+    for k in "HVD":
+        assert abs(est[k] - full[k]) < 0.05
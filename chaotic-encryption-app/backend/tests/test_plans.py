@@ -0,0 +1,94 @@
+# tests/test_plans.py
+
+import pickle
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encryption.another_2d import LASMEncryptorFB
+from encryption.cache import LRUCache
+from encryption.encryptor_interface import EncryptionPlan, EncryptorInterface
+from encryption.registry import available_algorithms, get_encryptor
+
+def shapes_for(name):
+    shapes = [(16, 16), (12, 20)]
+    if name != "bulban":  # grayscale only
+        shapes += [(8, 8, 3), (10, 6, 3), (5, 7, 1)]
+    return shapes
+
+@pytest.mark.parametrize("name", [n for n in available_algorithms() if n != "aes_gcm"])  # random nonce
+def test_plan_matches_per_call_api(name):
+    enc = get_encryptor(name)
+    rng = np.random.default_rng(0)
+    for shape in shapes_for(name):
+        plan = enc.prepare("plan-key", shape)
+        frames = rng.integers(0, 256, size=(3,) + shape, dtype=np.uint8)
+        cipher = plan.encrypt(frames[0])
+        assert np.array_equal(cipher, enc.encrypt_image(frames[0], "plan-key"))
+        assert np.array_equal(plan.decrypt(cipher), enc.decrypt_image(cipher, "plan-key"))
+        assert np.array_equal(plan.encrypt(frames), enc.encrypt_batch(frames, "plan-key"))
+
+@pytest.mark.parametrize("name", ["fodhnn", "acm_2dscl", "aes"])
+def test_plan_pickles_and_is_read_only(name):
+    enc = get_encryptor(name)
+    plan = enc.prepare("k", (12, 12, 3))
+    img = np.random.default_rng(1).integers(0, 256, size=(12, 12, 3), dtype=np.uint8)
+    copy = pickle.loads(pickle.dumps(plan))
+    assert repr(copy) == f"EncryptionPlan(algorithm='{name}', shape=(12, 12, 3))"
+    assert np.array_equal(copy.encrypt(img), plan.encrypt(img))
+    with pytest.raises(AttributeError):
+        plan.shape = (1, 1)
+    for schedule in (plan.schedule, copy.schedule):
+        stack = list(schedule)
+        while stack:
+            item = stack.pop()
+            if isinstance(item, tuple):
+                stack.extend(item)
+            elif isinstance(item, np.ndarray):
+                assert not item.flags.writeable
+
+def test_acm_plan_indices_are_int32():
+    confusion, mask, chen = get_encryptor("acm_2dscl").prepare("k", (12, 20, 3)).schedule
+    for index in [i for pair in confusion for i in pair] + list(chen[2:]):
+        assert index.dtype == np.int32
+
+def test_plan_does_no_key_work_per_call():
+    enc = LASMEncryptorFB()
+    enc.warm_cache = LRUCache(maxsize=4)
+    plan = enc.prepare("k", (10, 10))
+    before = enc.warm_cache.stats()
+    for _ in range(3):
+        plan.encrypt(np.zeros((10, 10), np.uint8))
+    assert enc.warm_cache.stats() == before
+
+def test_plan_validation():
+    enc = get_encryptor("chaos")
+    with pytest.raises(ValueError):
+        enc.prepare("", (4, 4))
+    with pytest.raises(ValueError):
+        enc.prepare("k", (4, 4, 2))
+    with pytest.raises(ValueError):
+        enc.prepare("k", (0, 4))
+    with pytest.raises(ValueError):
+        get_encryptor("bulban").prepare("k", (4, 4, 3))
+    plan = enc.prepare("k", (4, 4))
+    with pytest.raises(ValueError):
+        plan.encrypt(np.zeros((4, 5), np.uint8))
+    assert plan.encrypt(np.zeros((0, 4, 4), np.uint8)).shape == (0, 4, 4)
+
+class XorEncryptor(EncryptorInterface):
+    def get_algorithm_name(self):
+        return "xor"
+
+    def encrypt_image(self, image, key):
+        return image ^ np.uint8(len(key))
+
+    decrypt_image = encrypt_image
+
+def test_default_plan_falls_back_to_per_call():
+    plan = XorEncryptor().prepare("abc", (2, 2))
+    assert isinstance(plan, EncryptionPlan)
+    assert plan.encrypt(np.full((2, 2), 7, np.uint8)).tolist() == [[4, 4], [4, 4]]
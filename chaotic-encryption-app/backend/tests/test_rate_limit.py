@@ -0,0 +1,58 @@
+# tests/test_rate_limit.py
+
+import threading
+
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limit import MemoryStore, RateLimiter, SQLiteStore
+
+class Clock:
+    def __init__(self): self.t = 1000.0
+    def __call__(self): return self.t
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "rl.db"), expire_every=1)
+
+def test_limit_then_refill(store):
+    clock = Clock()
+    rl = RateLimiter(store, window=3600, clock=clock)
+    results = [rl.check("k", 3) for _ in range(4)]
+    assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+    clock.t += 1200  # a third of the window refills one token
+    assert rl.check("k", 3) == (True, 0)
+    assert rl.check("other", 3) == (True, 2)
+
+def test_idle_buckets_expire(store):
+    clock = Clock()
+    rl = RateLimiter(store, window=60, clock=clock)
+    for i in range(50):
+        rl.check(f"k{i}", 5)
+    clock.t += 61
+    rl.check("fresh", 5)
+    assert len(store) == 1
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "rl.db")
+    clock = Clock()
+    a = RateLimiter(SQLiteStore(path), clock=clock)
+    b = RateLimiter(SQLiteStore(path), clock=clock)
+    assert a.check("k", 2) == (True, 1)
+    assert b.check("k", 2) == (True, 0)
+    assert a.check("k", 2) == (False, 0)
+
+def test_concurrent_checks_never_overspend(store):
+    rl = RateLimiter(store, clock=Clock())
+    allowed = []
+    def worker():
+        for _ in range(25):
+            allowed.append(rl.check("k", 60)[0])
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert sum(allowed) == 60
@@ -0,0 +1,84 @@
+# tests/test_registry.py
+
+import threading
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encryption.cache import LRUCache
+from encryption.encryptor_interface import EncryptorInterface
+from encryption.registry import EncryptorRegistry, registry, get_encryptor
+
+KEY = "k"
+
+def random_img(h, w, c):
+    if c == 1:
+        return np.random.randint(0, 256, size=(h, w), dtype=np.uint8)
+    return np.random.randint(0, 256, size=(h, w, c), dtype=np.uint8)
+
+@pytest.mark.parametrize("name", registry.names())
+def test_builtin_names_match_instances(name):
+    enc = get_encryptor(name)
+    assert isinstance(enc, EncryptorInterface)
+    assert enc.get_algorithm_name() == name
+
+def test_instances_are_shared_per_config():
+    assert get_encryptor("fodhnn") is get_encryptor("fodhnn")
+    a = get_encryptor("fodhnn", memory_window=64)
+    assert a is get_encryptor("fodhnn", memory_window=64)
+    assert a is not get_encryptor("fodhnn")
+    assert a.memory_window == 64
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        get_encryptor("nope")
+
+def test_warm_cache_hit_gives_same_cipher():
+    reg = EncryptorRegistry()
+    reg.register("lasm_fb", lambda **cfg: get_encryptor("lasm_fb").__class__(**cfg))
+    enc = reg.get("lasm_fb")
+    img = random_img(24, 20, 3)
+    C1 = enc.encrypt_image(img, KEY)
+    C2 = enc.encrypt_image(img, KEY)
+    assert np.array_equal(C1, C2)
+    assert np.array_equal(enc.decrypt_image(C1, KEY), img)
+    stats = enc.warm_cache.stats()
+    assert stats["hits"] >= 2 and stats["entries"] == 1
+
+def test_cache_can_be_disabled():
+    reg = EncryptorRegistry(cache_factory=None)
+    reg.register("lasm_fb", lambda **cfg: get_encryptor("lasm_fb").__class__(**cfg))
+    assert reg.get("lasm_fb").warm_cache is None
+
+def test_name_mismatch_rejected():
+    reg = EncryptorRegistry()
+    reg.register("other", lambda **cfg: get_encryptor("aes").__class__())
+    with pytest.raises(ValueError):
+        reg.get("other")
+
+def test_concurrent_get_builds_once():
+    reg = EncryptorRegistry()
+    built = []
+    def factory(**cfg):
+        built.append(1)
+        return get_encryptor("aes").__class__()
+    reg.register("aes", factory)
+    threads = [threading.Thread(target=reg.get, args=("aes",)) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(built) == 1
+
+def test_lru_cache_eviction_and_freeze():
+    cache = LRUCache(maxsize=2, max_bytes=100)
+    cache.put("a", np.zeros(10, dtype=np.uint8))
+    cache.put("b", np.zeros(10, dtype=np.uint8))
+    cache.get("a")
+    cache.put("c", np.zeros(10, dtype=np.uint8))
+    assert "a" in cache and "c" in cache and "b" not in cache
+    with pytest.raises(ValueError):
+        cache.get("a")[0] = 1
+    cache.put("big", np.zeros(90, dtype=np.uint8))
+    assert cache.stats()["bytes"] <= 100
@@ -0,0 +1,56 @@
+# tests/test_shm_transport.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shm_transport import SegmentPool, attach
+
+def _invert(src, dst):
+    out = attach(dst)
+    out[...] = 255 - attach(src)
+    return None
+
+@pytest.fixture
+def segments():
+    pool = SegmentPool()
+    yield pool
+    pool.close()
+
+def test_put_roundtrip_in_process(segments):
+    img = np.random.randint(0, 256, size=(40, 30, 3), dtype=np.uint8)
+    seg = segments.put(img)
+    assert np.array_equal(attach(seg.descriptor), img)
+    segments.release(seg)
+
+def test_segments_are_reused_by_size_class(segments):
+    a = segments.put(np.zeros((100, 100), dtype=np.uint8))
+    name = a.shm.name
+    segments.release(a)
+    b = segments.empty((90, 110), np.uint8)
+    assert b.shm.name == name
+    assert segments.stats()["reused"] == 1
+    segments.release(b)
+
+def test_free_list_is_bounded():
+    pool = SegmentPool(max_free_bytes=64 * 1024)
+    a, b = pool.empty((10,), np.uint8), pool.empty((10,), np.uint8)
+    pool.release(a); pool.release(b)
+    assert pool.stats()["free_segments"] == 1
+    pool.close()
+
+def test_worker_writes_into_preallocated_block(segments):
+    ctx = multiprocessing.get_context("spawn")
+    img = np.random.randint(0, 256, size=(64, 48, 3), dtype=np.uint8)
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+        for _ in range(3):
+            src, dst = segments.put(img), segments.empty(img.shape, img.dtype)
+            assert ex.submit(_invert, src.descriptor, dst.descriptor).result() is None
+            assert np.array_equal(dst.array, 255 - img)
+            segments.release(src); segments.release(dst)
+    assert segments.stats()["created"] == 2
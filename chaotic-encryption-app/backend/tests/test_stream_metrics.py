@@ -0,0 +1,53 @@
+# tests/test_stream_metrics.py
+
+import numpy as np
+import pytest
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (
+    calculate_adjacent_correlation, calculate_psnr, compute_metrics, iter_row_tiles,
+    stream_adjacent_correlation, stream_entropy, stream_metrics, stream_npcr_uaci, stream_psnr,
+)
+
+def random_img(h, w, c, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (h, w) if c == 1 else (h, w, c)
+    img = rng.integers(0, 256, size=shape, dtype=np.uint8)
+    img[: h // 3] //= 5  # non-uniform histogram, correlated rows
+    return img
+
+@pytest.mark.parametrize("c", [1, 3])
+@pytest.mark.parametrize("rows", [1, 7, 64, 1000])
+def test_stream_matches_in_memory(c, rows):
+    a, b = random_img(123, 77, c, seed=1), random_img(123, 77, c, seed=2)
+    full = compute_metrics(a, b)
+    streamed = stream_metrics(a, b, rows=rows)
+    assert streamed["npcr"] == full["npcr"] and streamed["uaci"] == full["uaci"]
+    for name in ("entropy_original", "entropy_encrypted"):
+        assert streamed[name] == pytest.approx(full[name], abs=1e-6)
+    assert stream_entropy(a, rows=rows) == pytest.approx(full["entropy_original"], abs=1e-6)
+    assert stream_npcr_uaci(a, b, rows=rows)["npcr"] == full["npcr"]
+    assert stream_psnr(a, b, rows=rows) == pytest.approx(calculate_psnr(a, b), rel=1e-12)
+    expected = calculate_adjacent_correlation(a)
+    got = stream_adjacent_correlation(a, rows=rows)
+    for k in "HVD":
+        assert got[k] == pytest.approx(expected[k], abs=1e-12)
+
+def test_memmap_and_tile_iterables(tmp_path):
+    a, b = random_img(300, 50, 3, seed=3), random_img(300, 50, 3, seed=4)
+    path = tmp_path / "a.npy"
+    np.save(path, a)
+    mm = np.load(path, mmap_mode="r")
+    assert stream_metrics(mm, b, rows=32) == stream_metrics(a, b, rows=32)
+    # Uneven tiles from a generator give the same result as fixed bands
+    tiles = (a[s:e] for s, e in [(0, 5), (5, 120), (120, 121), (121, 300)])
+    assert stream_adjacent_correlation(tiles) == stream_adjacent_correlation(iter_row_tiles(a, 16))
+
+def test_mismatched_streams():
+    a = random_img(20, 10, 1)
+    with pytest.raises(ValueError):
+        stream_npcr_uaci(a, a[:15])
+    with pytest.raises(ValueError):
+        stream_psnr(a, a[:, :9])
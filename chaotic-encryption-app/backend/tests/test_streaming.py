@@ -0,0 +1,71 @@
+# tests/test_streaming.py
+
+import tracemalloc
+
+import numpy as np
+import pytest
+from numpy.lib.format import open_memmap
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encryption.aes_encryptor import AESEncryptor
+from encryption.registry import get_encryptor
+from streaming import main, stream_file
+
+@pytest.mark.parametrize("name", ["aes", "2dlasm"])
+@pytest.mark.parametrize("shape", [(37, 23), (21, 17, 3), (16, 16, 1)])
+def test_stream_matches_in_memory(name, shape):
+    enc = get_encryptor(name)
+    img = np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+    expected = enc.encrypt_image(img, "k")
+    for band_rows in (1, 4, 100):
+        cipher = np.empty_like(img)
+        enc.encrypt_stream(img, cipher, "k", band_rows)
+        assert np.array_equal(cipher, expected)
+        plain = np.empty_like(img)
+        enc.decrypt_stream(cipher, plain, "k", band_rows)
+        assert np.array_equal(plain, img)
+
+def test_aes_stream_keeps_counter_across_bands():
+    enc = AESEncryptor()
+    enc._derive_key_and_counter = lambda key: (b"\x01" * 32, (1 << 128) - 2)  # wraps mid-image
+    img = np.random.default_rng(1).integers(0, 60000, size=(13, 7, 3), dtype=np.uint16)
+    out = np.empty_like(img)
+    enc.encrypt_stream(img, out, "k", band_rows=3)
+    assert np.array_equal(out, enc.encrypt_image(img, "k"))
+
+def test_stream_memory_independent_of_height(tmp_path):
+    enc = get_encryptor("aes")
+    shape = (4000, 500, 3)
+    src = open_memmap(str(tmp_path / "src.npy"), mode="w+", dtype=np.uint8, shape=shape)
+    src[:] = 7
+    dst = open_memmap(str(tmp_path / "dst.npy"), mode="w+", dtype=np.uint8, shape=shape)
+    tracemalloc.start()
+    enc.encrypt_stream(src, dst, "k", band_rows=32)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < src.nbytes / 10
+
+def test_stream_file_roundtrip(tmp_path):
+    img = np.random.default_rng(2).integers(0, 256, size=(30, 20, 3), dtype=np.uint8)
+    np.save(tmp_path / "img.npy", img)
+    summary = stream_file(str(tmp_path / "img.npy"), str(tmp_path / "enc.npy"), "2dlasm", "k", band_rows=7)
+    assert summary["shape"] == [30, 20, 3]
+    assert np.array_equal(np.load(tmp_path / "enc.npy"), get_encryptor("2dlasm").encrypt_image(img, "k"))
+    assert main([str(tmp_path / "enc.npy"), str(tmp_path / "dec.npy"), "--algorithm", "2dlasm",
+                 "--key", "k", "--decrypt"]) == 0
+    assert np.array_equal(np.load(tmp_path / "dec.npy"), img)
+    assert sorted(os.listdir(tmp_path)) == ["dec.npy", "enc.npy", "img.npy"]
+
+def test_stream_errors():
+    img = np.zeros((4, 4), np.uint8)
+    with pytest.raises(NotImplementedError):
+        get_encryptor("fodhnn").encrypt_stream(img, np.empty_like(img), "k")
+    aes = get_encryptor("aes")
+    with pytest.raises(ValueError):
+        aes.encrypt_stream(img, np.empty((4, 5), np.uint8), "k")
+    with pytest.raises(ValueError):
+        aes.encrypt_stream(img, img, "k")
+    with pytest.raises(ValueError):
+        aes.encrypt_stream(img, np.empty_like(img), "")
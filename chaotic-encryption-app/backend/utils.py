@@ -1,7 +1,54 @@
 import numpy as np
 import cv2
 from scipy import stats
-from typing import Tuple
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    """Grayscale view of a BGR or already single-channel image"""
+    if len(image.shape) == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+def _entropy_from_hist(hist: np.ndarray) -> float:
+    """Shannon entropy (bits) of a 256-bin histogram"""
+    hist = hist.flatten()
+    hist = hist[hist > 0]
+    hist = hist / hist.sum()
+    return -np.sum(hist * np.log2(hist))
+
+def _hist256(gray: np.ndarray) -> np.ndarray:
+    """Exact int64 histogram of a uint8 tile"""
+    if gray.size < 2 ** 24:
+        # calcHist counts in float32, exact below 2**24
+        return cv2.calcHist([np.ascontiguousarray(gray)], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+    return np.bincount(gray.ravel(), minlength=256)
+
+def _pair_moments(a: np.ndarray, b: np.ndarray) -> Tuple:
+    """
+    (n, sum a, sum b, sum a^2, sum b^2, sum ab) of two equally shaped arrays
+
+    Accumulated in int64 for integer images (float64 otherwise) directly
+    on the given views; einsum casts in small buffers, so nothing image-sized
+    is allocated. Returned as Python numbers.
+    """
+    acc = np.int64 if a.dtype.kind in 'biu' else np.float64
+    subs = 'ijk'[:a.ndim]
+    prod = f'{subs},{subs}->'
+    return (a.size, a.sum(dtype=acc).item(), b.sum(dtype=acc).item(),
+            np.einsum(prod, a, a, dtype=acc).item(), np.einsum(prod, b, b, dtype=acc).item(),
+            np.einsum(prod, a, b, dtype=acc).item())
+
+def _pearson_from_moments(moments) -> float:
+    """Pearson coefficient from pair moments; 0.0 when either side is constant"""
+    # Python ints keep the integer case exact (n * sum a^2 overflows int64 on large images)
+    n, sa, sb, saa, sbb, sab = moments
+    if n == 0:
+        return 0.0
+    var_a = n * saa - sa * sa
+    var_b = n * sbb - sb * sb
+    if var_a <= 0 or var_b <= 0:
+        return 0.0
+    return float((n * sab - sa * sb) / np.sqrt(float(var_a) * float(var_b)))
 
 def calculate_entropy(image: np.ndarray) -> float:
     """
@@ -17,25 +64,13 @@ def calculate_entropy(image: np.ndarray) -> float:
         return 0.0
     
     # Convert to grayscale if color image
-    if len(image.shape) == 3:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = image
+    gray = _to_gray(image)
     
     # Calculate histogram
     hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-    hist = hist.flatten()
-    
-    # Remove zero values to avoid log(0)
-    hist = hist[hist > 0]
     
-    # Normalize histogram
-    hist = hist / hist.sum()
-    
-    # Calculate entropy
-    entropy = -np.sum(hist * np.log2(hist))
-    
-    return entropy
+    # Normalize (dropping empty bins to avoid log(0)) and calculate entropy
+    return _entropy_from_hist(hist)
 
 def calculate_npcr(original: np.ndarray, encrypted: np.ndarray) -> float:
     """
@@ -105,6 +140,135 @@ def calculate_uaci(original: np.ndarray, encrypted: np.ndarray) -> float:
     
     return uaci
 
+def compute_metrics(original: np.ndarray, encrypted: np.ndarray) -> dict:
+    """
+    Entropy of both images plus NPCR and UACI, computed together
+    
+    Same values as calculate_entropy / calculate_npcr / calculate_uaci, but each
+    image is converted to gray once and the difference image is computed once
+    and reduced with OpenCV's count/sum kernels.
+    
+    Args:
+        original: Original image
+        encrypted: Encrypted image
+        
+    Returns:
+        Dictionary with entropy_original, entropy_encrypted, npcr and uaci
+    """
+    if original.shape != encrypted.shape:
+        raise ValueError("Images must have the same dimensions")
+    
+    orig_gray = _to_gray(original)
+    enc_gray = _to_gray(encrypted)
+    
+    hist_orig = cv2.calcHist([orig_gray], [0], None, [256], [0, 256])
+    hist_enc = cv2.calcHist([enc_gray], [0], None, [256], [0, 256])
+    
+    diff = cv2.absdiff(orig_gray, enc_gray)
+    total_pixels = orig_gray.size
+    different_pixels = cv2.countNonZero(diff)
+    # Double accumulator, exact for any realistic image (sum < 2**53)
+    diff_sum = cv2.sumElems(diff)[0]
+    
+    return {
+        'entropy_original': float(_entropy_from_hist(hist_orig)),
+        'entropy_encrypted': float(_entropy_from_hist(hist_enc)),
+        'npcr': float((different_pixels / total_pixels) * 100),
+        'uaci': float((diff_sum / (total_pixels * 255)) * 100),
+    }
+
+def _sample_gray(image: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Gray values of the pixels at (rows, cols), converted exactly like cvtColor"""
+    if image.flags.c_contiguous:
+        # Gathering by flat pixel index is much faster than paired fancy indexing
+        h, w = image.shape[:2]
+        picked = image.reshape((h * w,) + image.shape[2:]).take(rows * w + cols, axis=0)
+    else:
+        picked = image[rows, cols]
+    if picked.ndim == 2:
+        # (n, 3) BGR pixels -> an n x 1 image, so OpenCV's own rounding applies
+        return cv2.cvtColor(picked[:, None, :], cv2.COLOR_BGR2GRAY).ravel()
+    return picked
+
+def sample_metrics(original: np.ndarray, encrypted: np.ndarray, sample_size: int = 65536,
+                   seed=None, confidence: float = 0.95) -> dict:
+    """
+    Estimate entropy, NPCR and UACI from a random subset of pixels
+    
+    Pixel coordinates are drawn (with replacement) from a generator seeded by
+    ``seed``, so the same seed always scores the same pixels. Only the sampled
+    pixels are converted to gray. Entropy uses the Miller-Madow bias
+    correction; intervals are normal approximations (Wilson for NPCR).
+    
+    Args:
+        original: Original image
+        encrypted: Encrypted image
+        sample_size: Number of pixels to sample; images this small are scored in full
+        seed: Seed for the pixel sampler (any value accepted by np.random.default_rng)
+        confidence: Confidence level of the reported intervals
+        
+    Returns:
+        Dictionary with the compute_metrics fields, plus 'sampled', 'sample_size',
+        'confidence' and 'intervals' ({metric: [low, high]})
+    """
+    if original.shape != encrypted.shape:
+        raise ValueError("Images must have the same dimensions")
+    
+    h, w = original.shape[:2]
+    if sample_size >= h * w:
+        results = compute_metrics(original, encrypted)
+        results.update(sampled=False, sample_size=h * w, confidence=confidence,
+                       intervals={k: [v, v] for k, v in results.items()})
+        return results
+    
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, h * w, size=sample_size)
+    rows, cols = np.divmod(idx, w)
+    orig_gray = _sample_gray(original, rows, cols)
+    enc_gray = _sample_gray(encrypted, rows, cols)
+    
+    n = sample_size
+    z = float(stats.norm.ppf(0.5 + confidence / 2))
+    
+    def entropy_estimate(values):
+        counts = np.bincount(values, minlength=256)
+        p = counts[counts > 0] / n
+        plug_in = -np.sum(p * np.log2(p))
+        estimate = plug_in + (p.size - 1) / (2 * n * np.log(2))
+        se = np.sqrt(max(np.sum(p * np.log2(p) ** 2) - plug_in ** 2, 0.0) / n)
+        return float(min(estimate, 8.0)), [float(estimate - z * se), float(min(estimate + z * se, 8.0))]
+    
+    diff = np.abs(orig_gray.astype(np.int16) - enc_gray.astype(np.int16))
+    
+    # NPCR: Wilson score interval for the proportion of changed pixels
+    p_changed = np.count_nonzero(diff) / n
+    denom = 1 + z ** 2 / n
+    center = (p_changed + z ** 2 / (2 * n)) / denom
+    half = z * np.sqrt(p_changed * (1 - p_changed) / n + z ** 2 / (4 * n ** 2)) / denom
+    
+    # UACI: mean absolute difference with its standard error
+    scaled = diff / 255
+    uaci = scaled.mean()
+    uaci_se = scaled.std(ddof=1) / np.sqrt(n)
+    
+    entropy_original, ci_original = entropy_estimate(orig_gray)
+    entropy_encrypted, ci_encrypted = entropy_estimate(enc_gray)
+    return {
+        'entropy_original': entropy_original,
+        'entropy_encrypted': entropy_encrypted,
+        'npcr': float(p_changed * 100),
+        'uaci': float(uaci * 100),
+        'sampled': True,
+        'sample_size': n,
+        'confidence': confidence,
+        'intervals': {
+            'entropy_original': ci_original,
+            'entropy_encrypted': ci_encrypted,
+            'npcr': [float((center - half) * 100), float((center + half) * 100)],
+            'uaci': [float((uaci - z * uaci_se) * 100), float((uaci + z * uaci_se) * 100)],
+        },
+    }
+
 def calculate_histogram_similarity(original: np.ndarray, encrypted: np.ndarray) -> float:
     """
     Calculate histogram similarity between two images
@@ -166,43 +330,87 @@ def calculate_psnr(original: np.ndarray, decrypted: np.ndarray) -> float:
     
     return psnr
 
-def calculate_adjacent_correlation(image: np.ndarray, sample: int | None = None) -> dict:
+# Adjacent-pixel directions: (name, row offset, column offset)
+_ADJACENT_DIRECTIONS = (("H", 0, 1), ("V", 1, 0), ("D", 1, 1))
+
+def _border_sums(values: np.ndarray) -> Tuple[int, int]:
+    """(sum, sum of squares) of a small 1-D border slice"""
+    v = values.astype(np.int64)
+    return int(v.sum()), int(v @ v)
+
+def _adjacent_moments_u8(gray: np.ndarray) -> dict:
+    """
+    Pair moments of all three directions of a 2-D uint8 image
+
+    Sums and sums of squares of each side come from one histogram of the
+    whole image minus the excluded border row/column; only the cross
+    products need a pass per direction (int64 einsum over views, no copies).
+    """
+    hist = _hist256(gray)
+    levels = np.arange(256, dtype=np.int64)
+    total = (int(hist @ levels), int(hist @ (levels * levels)))
+
+    def without(rows, cols):
+        # Sums over gray minus the given edge row and/or column (corner counted once)
+        s, q = total
+        if rows is not None:
+            rs, rq = _border_sums(gray[rows, :])
+            s, q = s - rs, q - rq
+        if cols is not None:
+            cs, cq = _border_sums(gray[:, cols])
+            s, q = s - cs, q - cq
+        if rows is not None and cols is not None:
+            corner = int(gray[rows, cols])
+            s, q = s + corner, q + corner * corner
+        return s, q
+
+    h, w = gray.shape
+    moments = {}
+    for name, dy, dx in _ADJACENT_DIRECTIONS:
+        a = gray[:h - dy, :w - dx]
+        b = gray[dy:, dx:]
+        sa, saa = without(-1 if dy else None, -1 if dx else None)
+        sb, sbb = without(0 if dy else None, 0 if dx else None)
+        sab = int(np.einsum('ij,ij->', a, b, dtype=np.int64))
+        moments[name] = (a.size, sa, sb, saa, sbb, sab)
+    return moments
+
+def calculate_adjacent_correlation(image: np.ndarray, sample: int | None = None,
+                                   seed=None) -> dict:
     """
     Pearson correlation between adjacent pixel pairs in gray image.
     Returns dict with H (horizontal), V (vertical), D (main diagonal).
     If the image is constant (std=0), returns 0.0 for that direction.
+
+    The full path works from exact integer sums and cross-products, without
+    float copies of the image. With ``sample``, that many pair positions per
+    direction are drawn uniformly (with replacement, from a generator seeded
+    by ``seed``) and only those pixels are read.
     """
     if image is None:
         return {"H": 0.0, "V": 0.0, "D": 0.0}
 
-    if len(image.shape) == 3:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    else:
-        gray = image
-    g = gray.astype(np.float64)
-
-    pairs = {
-        "H": (g[:, :-1].ravel(), g[:, 1:].ravel()),
-        "V": (g[:-1, :].ravel(), g[1:, :].ravel()),
-        "D": (g[:-1, :-1].ravel(), g[1:, 1:].ravel()),
-    }
-
-    def corr(a, b):
-        n = a.size
-        if n == 0:
-            return 0.0
-        if sample is not None and sample > 0 and sample < n:
-            idx = np.random.choice(n, sample, replace=False)
-            a, b = a[idx], b[idx]
-        a = a - a.mean()
-        b = b - b.mean()
-        sa = a.std()
-        sb = b.std()
-        if sa == 0 or sb == 0:
-            return 0.0
-        return float((a * b).mean() / (sa * sb))
+    h, w = image.shape[:2]
+    if sample is not None and 0 < sample < (h - 1) * (w - 1):
+        rng = np.random.default_rng(seed)
+        result = {}
+        for name, dy, dx in _ADJACENT_DIRECTIONS:
+            rows = rng.integers(0, h - dy, size=sample)
+            cols = rng.integers(0, w - dx, size=sample)
+            a = _sample_gray(image, rows, cols)
+            b = _sample_gray(image, rows + dy, cols + dx)
+            result[name] = _pearson_from_moments(_pair_moments(a, b))
+        return result
 
-    return {k: corr(*v) for k, v in pairs.items()}
+    gray = _to_gray(image)
+    if gray.dtype == np.uint8 and gray.size:
+        moments = _adjacent_moments_u8(gray)
+    else:
+        moments = {
+            name: _pair_moments(gray[:h - dy, :w - dx], gray[dy:, dx:])
+            for name, dy, dx in _ADJACENT_DIRECTIONS
+        }
+    return {name: _pearson_from_moments(m) for name, m in moments.items()}
 
 
 def analyze_encryption_quality(original: np.ndarray, encrypted: np.ndarray, decrypted: np.ndarray = None) -> dict:
@@ -217,13 +425,8 @@ def analyze_encryption_quality(original: np.ndarray, encrypted: np.ndarray, decr
     Returns:
         Dictionary with all quality metrics
     """
-    results = {
-        'entropy_original': calculate_entropy(original),
-        'entropy_encrypted': calculate_entropy(encrypted),
-        'npcr': calculate_npcr(original, encrypted),
-        'uaci': calculate_uaci(original, encrypted),
-        'histogram_similarity': calculate_histogram_similarity(original, encrypted)
-    }
+    results = compute_metrics(original, encrypted)
+    results['histogram_similarity'] = calculate_histogram_similarity(original, encrypted)
 
     # NEW: adjacent-pixel correlations
     results['adj_corr_original']  = calculate_adjacent_correlation(original)
@@ -258,3 +461,131 @@ def generate_histogram_data(image: np.ndarray) -> dict:
         'bins': list(range(256)),
         'values': hist.flatten().tolist()
     }
+
+
+# ---------------------------
+# Streaming (tiled) metrics
+# ---------------------------
+#
+# The stream_* functions give the same metrics as their calculate_* versions
+# for images that do not fit in memory. Each image argument is either an
+# array - typically np.memmap / np.load(path, mmap_mode='r'), read in bands of
+# ``rows`` rows - or any iterable of row tiles (consecutive horizontal bands
+# of equal width). Only one tile per image is held at a time and every
+# accumulator is integer, so results do not depend on the tiling.
+
+DEFAULT_TILE_ROWS = 256
+
+TileSource = Union[np.ndarray, Iterable[np.ndarray]]
+
+def iter_row_tiles(image: np.ndarray, rows: int = DEFAULT_TILE_ROWS) -> Iterator[np.ndarray]:
+    """Yield consecutive bands of ``rows`` rows (views; memmaps are read lazily)"""
+    if rows <= 0:
+        raise ValueError("rows must be positive")
+    for start in range(0, image.shape[0], rows):
+        yield image[start:start + rows]
+
+def _tiles(source: TileSource, rows: int) -> Iterator[np.ndarray]:
+    if isinstance(source, np.ndarray):
+        return iter_row_tiles(source, rows)
+    return iter(source)
+
+def _paired_tiles(a: TileSource, b: TileSource, rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    sentinel = object()
+    tiles_a, tiles_b = _tiles(a, rows), _tiles(b, rows)
+    while True:
+        ta, tb = next(tiles_a, sentinel), next(tiles_b, sentinel)
+        if ta is sentinel and tb is sentinel:
+            return
+        if ta is sentinel or tb is sentinel or ta.shape != tb.shape:
+            raise ValueError("Images must have the same dimensions")
+        yield ta, tb
+
+def stream_histogram(image: TileSource, rows: int = DEFAULT_TILE_ROWS) -> np.ndarray:
+    """256-bin int64 histogram of the gray image"""
+    hist = np.zeros(256, dtype=np.int64)
+    for tile in _tiles(image, rows):
+        hist += _hist256(_to_gray(tile))
+    return hist
+
+def stream_entropy(image: TileSource, rows: int = DEFAULT_TILE_ROWS) -> float:
+    """Streaming calculate_entropy"""
+    hist = stream_histogram(image, rows)
+    if not hist.any():
+        return 0.0
+    return float(_entropy_from_hist(hist))
+
+def stream_npcr_uaci(original: TileSource, encrypted: TileSource,
+                     rows: int = DEFAULT_TILE_ROWS) -> dict:
+    """Streaming calculate_npcr and calculate_uaci: {'npcr': ..., 'uaci': ...}"""
+    total = changed = diff_sum = 0
+    for orig_tile, enc_tile in _paired_tiles(original, encrypted, rows):
+        diff = cv2.absdiff(_to_gray(orig_tile), _to_gray(enc_tile))
+        total += diff.size
+        changed += cv2.countNonZero(diff)
+        diff_sum += int(diff.sum(dtype=np.int64))
+    if total == 0:
+        return {'npcr': 0.0, 'uaci': 0.0}
+    return {
+        'npcr': (changed / total) * 100,
+        'uaci': (diff_sum / (total * 255)) * 100,
+    }
+
+def stream_metrics(original: TileSource, encrypted: TileSource,
+                   rows: int = DEFAULT_TILE_ROWS) -> dict:
+    """Streaming compute_metrics: both entropies, NPCR and UACI in one pass over the tiles"""
+    hist_orig = np.zeros(256, dtype=np.int64)
+    hist_enc = np.zeros(256, dtype=np.int64)
+    total = changed = diff_sum = 0
+    for orig_tile, enc_tile in _paired_tiles(original, encrypted, rows):
+        orig_gray, enc_gray = _to_gray(orig_tile), _to_gray(enc_tile)
+        hist_orig += _hist256(orig_gray)
+        hist_enc += _hist256(enc_gray)
+        diff = cv2.absdiff(orig_gray, enc_gray)
+        total += diff.size
+        changed += cv2.countNonZero(diff)
+        diff_sum += int(diff.sum(dtype=np.int64))
+    if total == 0:
+        raise ValueError("No image data")
+    return {
+        'entropy_original': float(_entropy_from_hist(hist_orig)),
+        'entropy_encrypted': float(_entropy_from_hist(hist_enc)),
+        'npcr': (changed / total) * 100,
+        'uaci': (diff_sum / (total * 255)) * 100,
+    }
+
+def stream_psnr(original: TileSource, decrypted: TileSource, rows: int = DEFAULT_TILE_ROWS) -> float:
+    """Streaming calculate_psnr (all channels, integer squared error)"""
+    count = sse = 0
+    for orig_tile, dec_tile in _paired_tiles(original, decrypted, rows):
+        diff = (orig_tile.astype(np.int64) - dec_tile.astype(np.int64)).ravel()
+        count += diff.size
+        sse += int(np.dot(diff, diff))
+    if sse == 0:
+        return float('inf')
+    mse = sse / count
+    return float(20 * np.log10(255.0 / np.sqrt(mse)))
+
+def stream_adjacent_correlation(image: TileSource, rows: int = DEFAULT_TILE_ROWS) -> dict:
+    """
+    Streaming calculate_adjacent_correlation (full path, no sampling)
+
+    Vertical and diagonal pairs that straddle two tiles are formed from the
+    last row of the previous tile, which is carried over.
+    """
+    moments = {k: (0,) * 6 for k in ('H', 'V', 'D')}
+
+    def add(name, a, b):
+        moments[name] = tuple(x + y for x, y in zip(moments[name], _pair_moments(a, b)))
+
+    prev_row: Optional[np.ndarray] = None
+    for tile in _tiles(image, rows):
+        gray = _to_gray(tile)
+        if gray.shape[0] == 0:
+            continue
+        add('H', gray[:, :-1], gray[:, 1:])
+        block = gray if prev_row is None else np.concatenate([prev_row, gray])
+        add('V', block[:-1, :], block[1:, :])
+        add('D', block[:-1, :-1], block[1:, 1:])
+        prev_row = gray[-1:].copy()
+    return {k: _pearson_from_moments(m) for k, m in moments.items()}
@@ -94,6 +94,10 @@ const Decrypt = () => {
       value: 'aes', label: 'Traditional - AES-256',
       desc: 'Standard AES stream-mode encryption. Deterministic nonce for demo; use random nonce in production.'
     },
+    {
+      value: 'aes_gcm', label: 'Traditional - AES-256-GCM',
+      desc: 'Authenticated AES with a random nonce per image. The cipher image carries the nonce and tag in a few extra rows; any change to it fails decryption.'
+    },
   ];
 
   // ---- progress modal ----